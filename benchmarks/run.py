@@ -0,0 +1,424 @@
+"""Scaling benchmarks for the API routes and model fits over synthetic data.
+
+    python -m benchmarks.run --scales 1,10,100 --output benchmarks/latest.json
+    python -m benchmarks.run --scales 1,10,100 --baseline benchmarks/baseline.json
+
+Each scale multiplies the size of the real price file (about 9,000 daily
+rows). Every route is requested through the Flask test client once with an
+empty cache (``cold``), then ``--repeat`` times with the cache cleared before
+each request (``warm``: the work a request does once the process is warmed
+up, summarised as ``p50``/``p95``/throughput), then ``--repeat`` times more
+served from the HTTP body cache (``cached_p50_ms``). Model fits run on the full synthetic
+return series. Peak memory is the Python-level allocation peak of a
+separate cold run, traced with ``tracemalloc``. Benchmarks with ``max_rows``
+are skipped above that size instead of running for hours. The JSON report
+also holds a per-benchmark scaling exponent (slope of log time against log
+rows) and, given a baseline, the ratio to it for every shared measurement.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib.util
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "dashboard" / "backend"
+for path in (REPO_ROOT, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from benchmarks.synthetic import BASE_ROWS, synthetic_events, synthetic_prices  # noqa: E402
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_EVENTS = 5000
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are timer noise, whatever the ratio.
+MIN_REGRESSION_MS = 2.0
+SUPERLINEAR_EXPONENT = 1.2
+
+
+@dataclass(frozen=True)
+class RouteBench:
+    name: str
+    url: str
+    max_rows: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ModelBench:
+    name: str
+    run: Callable[["Workload"], Any]
+    max_rows: Optional[int] = None
+    requires: Optional[str] = None
+    setup: Optional[Callable[["Workload"], Any]] = None
+
+
+@dataclass
+class Workload:
+    prices: pd.DataFrame
+    events: pd.DataFrame
+    workdir: Path
+
+    @property
+    def returns(self) -> np.ndarray:
+        values = self.prices["log_return"].to_numpy()
+        return values[np.isfinite(values)]
+
+    def prices_csv(self) -> Path:
+        path = self.workdir / "prices.csv"
+        if not path.exists():
+            self.prices.to_csv(path, index=False)
+        return path
+
+
+ROUTES = (
+    RouteBench("prices", "/api/prices/", max_rows=1_000_000),
+    RouteBench("prices_downsampled", "/api/prices/?max_points=2000"),
+    RouteBench("prices_ohlc_auto", "/api/prices/?resolution=auto"),
+    RouteBench("prices_statistics", "/api/prices/statistics"),
+    RouteBench("prices_volatility", "/api/prices/volatility?window=30"),
+    RouteBench("prices_macro_overlay", "/api/prices/macro-overlay"),
+    RouteBench("events", "/api/events/"),
+    RouteBench("events_correlation", "/api/events/correlation?event_date={event_date}"),
+    RouteBench("events_impact", "/api/events/impact"),
+    RouteBench("events_sweep", "/api/events/sweep"),
+    RouteBench("change_points", "/api/change-points/"),
+    RouteBench("change_points_details", "/api/change-points/details"),
+    RouteBench("change_points_posterior", "/api/change-points/posterior"),
+    RouteBench("change_points_business_impact", "/api/change-points/business-impact"),
+    RouteBench("change_points_detect_binseg", "/api/change-points/detect?method=binseg"),
+    RouteBench("change_points_detect_pelt", "/api/change-points/detect?method=pelt", max_rows=100_000),
+    RouteBench("change_points_detect_exact", "/api/change-points/detect?method=exact", max_rows=10_000),
+)
+
+
+def _binseg(work: Workload) -> Any:
+    from src.models.segmentation import detect_change_points
+
+    return detect_change_points(work.returns, method="binseg")
+
+
+def _pelt(work: Workload) -> Any:
+    from src.models.segmentation import detect_change_points
+
+    return detect_change_points(work.returns, method="pelt")
+
+
+def _exact(work: Workload) -> Any:
+    from src.models.exact_change_point import exact_change_point_posterior
+
+    return exact_change_point_posterior(work.returns)
+
+
+def _online(work: Workload) -> Any:
+    from src.models.online_change_point import OnlineChangePointDetector
+
+    returns = work.returns
+    return OnlineChangePointDetector(beta0=float(returns.var())).update_many(returns)
+
+
+def _mcmc(work: Workload) -> Any:
+    from src.models.change_point import fit_mean_change_point_model
+
+    return fit_mean_change_point_model(
+        work.returns, draws=200, tune=200, chains=2, cores=1, random_seed=0, marginalize=True
+    )
+
+
+def _load_csv(work: Workload) -> Any:
+    from services.price_store import PriceSeries
+
+    return PriceSeries.from_csv(work.prices_csv())
+
+
+def _ingest(work: Workload) -> Any:
+    from src.data.ingest import ingest_prices
+
+    return ingest_prices(work.prices_csv(), work.workdir / f"columns-{time.perf_counter_ns()}")
+
+
+def _load_columnar(work: Workload) -> Any:
+    from src.data.ingest import price_frame
+
+    return price_frame(work.workdir / "columns")
+
+
+def _ingest_once(work: Workload) -> None:
+    from src.data.ingest import ingest_prices
+
+    ingest_prices(work.prices_csv(), work.workdir / "columns")
+
+
+MODELS = (
+    ModelBench("load_prices_csv", _load_csv, max_rows=1_000_000, setup=Workload.prices_csv),
+    ModelBench("ingest_prices", _ingest, max_rows=1_000_000, setup=Workload.prices_csv),
+    ModelBench("load_prices_columnar", _load_columnar, max_rows=1_000_000, setup=_ingest_once),
+    ModelBench("segmentation_binseg", _binseg),
+    ModelBench("segmentation_pelt", _pelt, max_rows=100_000),
+    ModelBench("exact_posterior", _exact, max_rows=10_000),
+    ModelBench("online_bocpd", _online, max_rows=100_000),
+    ModelBench("mcmc_mean_shift", _mcmc, max_rows=100_000, requires="pymc"),
+)
+
+
+def _peak_mb(call: Callable[[], Any]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _timed(call: Callable[[], Any]) -> tuple[float, Any]:
+    gc.collect()
+    started = time.perf_counter()
+    result = call()
+    return (time.perf_counter() - started) * 1000.0, result
+
+
+def _build_app(work: Workload) -> Any:
+    import routes.events
+    from app import create_app
+    from services.price_store import PriceSeries, PriceStore
+
+    class FrameStore(PriceStore):
+        def _load(self) -> PriceSeries:
+            return PriceSeries.from_frame(work.prices)
+
+    events_path = work.workdir / "events.csv"
+    work.events.to_csv(events_path, index=False)
+    routes.events.EVENTS_PATH = events_path
+
+    app = create_app()
+    app.config["FILE_WATCHER"].stop()
+    app.config["PRICE_STORE"] = FrameStore(work.workdir / "prices.csv")
+    app.config["PRICE_STORE"].get()
+    return app
+
+
+def bench_routes(work: Workload, scale: int, repeat: int) -> List[Dict[str, Any]]:
+    app = _build_app(work)
+    cache = app.config["CACHE"]
+    client = app.test_client()
+    event_date = str(work.events["date"].iloc[len(work.events) // 2])
+    rows = len(work.prices)
+    results = []
+    try:
+        for bench in ROUTES:
+            record: Dict[str, Any] = {"name": bench.name, "kind": "route", "scale": scale, "rows": rows}
+            if bench.max_rows is not None and rows > bench.max_rows:
+                results.append({**record, "status": "skipped"})
+                continue
+            url = bench.url.format(event_date=event_date)
+            cache.clear()
+            cold_ms, response = _timed(lambda: client.get(url))
+            warm = []
+            for _ in range(repeat):
+                cache.clear()
+                warm.append(_timed(lambda: client.get(url))[0])
+            cached = [_timed(lambda: client.get(url))[0] for _ in range(repeat)]
+            cache.clear()
+            peak = _peak_mb(lambda: client.get(url))
+            results.append(
+                {
+                    **record,
+                    "status": response.status_code,
+                    "cold_ms": cold_ms,
+                    "p50_ms": float(np.percentile(warm, 50)) if warm else None,
+                    "p95_ms": float(np.percentile(warm, 95)) if warm else None,
+                    "throughput_rps": 1000.0 / float(np.mean(warm)) if warm else None,
+                    "cached_p50_ms": float(np.percentile(cached, 50)) if cached else None,
+                    "bytes": len(response.get_data()),
+                    "peak_mb": peak,
+                    "cache": cache.stats(),
+                }
+            )
+    finally:
+        app.config["SHAP_JOBS"].shutdown()
+    return results
+
+
+def bench_models(work: Workload, scale: int) -> List[Dict[str, Any]]:
+    rows = len(work.prices)
+    results = []
+    for bench in MODELS:
+        record: Dict[str, Any] = {"name": bench.name, "kind": "model", "scale": scale, "rows": rows}
+        if bench.max_rows is not None and rows > bench.max_rows:
+            results.append({**record, "status": "skipped"})
+            continue
+        if bench.requires and importlib.util.find_spec(bench.requires) is None:
+            results.append({**record, "status": f"missing {bench.requires}"})
+            continue
+        try:
+            if bench.setup is not None:
+                bench.setup(work)
+            elapsed, _ = _timed(lambda: bench.run(work))
+            peak = _peak_mb(lambda: bench.run(work))
+        except Exception as exc:  # Record the failure and keep benchmarking the rest.
+            results.append({**record, "status": f"error: {exc}"})
+            continue
+        results.append(
+            {
+                **record,
+                "status": "ok",
+                "cold_ms": elapsed,
+                "rows_per_second": rows / (elapsed / 1000.0) if elapsed else None,
+                "peak_mb": peak,
+            }
+        )
+    return results
+
+
+def _succeeded(result: Dict[str, Any]) -> bool:
+    return result.get("status") in (200, "ok") and result.get("cold_ms") is not None
+
+
+def scaling_exponents(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Slope of log(cold time) against log(rows) per benchmark; ~1 is linear."""
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        if _succeeded(result):
+            by_name.setdefault(result["name"], []).append(result)
+    exponents = {}
+    for name, runs in by_name.items():
+        if len({run["rows"] for run in runs}) < 2:
+            continue
+        rows = np.log([run["rows"] for run in runs])
+        times = np.log([max(run["cold_ms"], 1e-3) for run in runs])
+        slope = float(np.polyfit(rows, times, 1)[0])
+        exponents[name] = {"exponent": slope, "superlinear": slope > SUPERLINEAR_EXPONENT}
+    return exponents
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE
+) -> List[Dict[str, Any]]:
+    """Ratio to the baseline of every timing and memory figure both runs measured."""
+    previous = {(item["name"], item["scale"]): item for item in baseline.get("results", [])}
+    rows = []
+    for item in current["results"]:
+        before = previous.get((item["name"], item["scale"]))
+        if before is None or not (_succeeded(item) and _succeeded(before)):
+            continue
+        for metric in ("cold_ms", "p50_ms", "peak_mb"):
+            new, old = item.get(metric), before.get(metric)
+            if new is None or not old:
+                continue
+            ratio = new / old
+            noise = metric.endswith("_ms") and new - old < MIN_REGRESSION_MS
+            rows.append(
+                {
+                    "name": item["name"],
+                    "scale": item["scale"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": ratio,
+                    "regression": ratio > 1.0 + tolerance and not noise,
+                }
+            )
+    return rows
+
+
+def run(
+    scales: List[int], n_events: int = DEFAULT_EVENTS, repeat: int = DEFAULT_REPEAT, seed: int = 0
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for scale in scales:
+        prices = synthetic_prices(BASE_ROWS * scale, seed=seed)
+        events = synthetic_events(n_events, prices["Date"].iloc[0], prices["Date"].iloc[-1], seed=seed)
+        with tempfile.TemporaryDirectory(prefix="brent-bench-") as workdir:
+            work = Workload(prices=prices, events=events, workdir=Path(workdir))
+            results.extend(bench_routes(work, scale, repeat))
+            results.extend(bench_models(work, scale))
+        print(f"scale {scale}x ({len(prices)} rows) done", file=sys.stderr)
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "scales": scales,
+            "events": n_events,
+            "repeat": repeat,
+        },
+        "results": results,
+        "scaling": scaling_exponents(results),
+    }
+
+
+def _fmt(value: Any, digits: int = 1) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_report(report: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]] = None) -> None:
+    print(
+        f"{'benchmark':<32}{'scale':>6}{'rows':>10}{'status':>10}"
+        f"{'cold ms':>11}{'p50 ms':>9}{'p95 ms':>9}{'peak MB':>9}"
+    )
+    for item in report["results"]:
+        print(
+            f"{item['name']:<32}{item['scale']:>6}{item['rows']:>10}{str(item['status'])[:9]:>10}"
+            f"{_fmt(item.get('cold_ms')):>11}{_fmt(item.get('p50_ms')):>9}{_fmt(item.get('p95_ms')):>9}"
+            f"{_fmt(item.get('peak_mb')):>9}"
+        )
+    if report["scaling"]:
+        print("\nscaling exponent (time ~ rows^k)")
+        for name, info in sorted(report["scaling"].items(), key=lambda entry: -entry[1]["exponent"]):
+            flag = "  <- superlinear" if info["superlinear"] else ""
+            print(f"  {name:<32}{info['exponent']:6.2f}{flag}")
+    if comparison:
+        regressions = [row for row in comparison if row["regression"]]
+        print(f"\n{len(regressions)} regression(s) against baseline")
+        for row in regressions:
+            print(
+                f"  {row['name']} x{row['scale']} {row['metric']}: "
+                f"{row['baseline']:.1f} -> {row['current']:.1f} ({row['ratio']:.2f}x)"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark API routes and model fits on synthetic data.")
+    parser.add_argument(
+        "--scales", default=",".join(map(str, DEFAULT_SCALES)), help="Comma-separated multiples of the real data size."
+    )
+    parser.add_argument("--events", type=int, default=DEFAULT_EVENTS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Warm requests per route.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=REPO_ROOT / "benchmarks" / "latest.json")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against.")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before flagging, e.g. 0.25."
+    )
+    args = parser.parse_args(argv)
+
+    report = run([int(scale) for scale in args.scales.split(",") if scale], args.events, args.repeat, args.seed)
+    comparison = None
+    if args.baseline is not None:
+        comparison = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        report["comparison"] = {"baseline": str(args.baseline), "tolerance": args.tolerance, "rows": comparison}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, default=str))
+    print_report(report, comparison)
+    return 1 if comparison and any(row["regression"] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
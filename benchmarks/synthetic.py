@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BASE_ROWS = 9011
+START_DATE = "1987-05-20"
+# Keep generated timestamps well inside datetime64[ns] (which ends in 2262).
+LATEST_END = pd.Timestamp("2200-01-01")
+FREQUENCIES = ("D", "h", "min", "s")
+CATEGORIES = (
+    "Geopolitical Conflict",
+    "Economic Shock",
+    "OPEC Policy",
+    "Sanctions",
+    "Global Health Shock",
+)
+
+
+def frequency_for(rows: int, start: str = START_DATE) -> str:
+    """Coarsest of daily, hourly, minute and second bars that fits ``rows`` before 2200."""
+    span = LATEST_END - pd.Timestamp(start)
+    for freq in FREQUENCIES:
+        if pd.Timedelta(1, unit=freq) * rows < span:
+            return freq
+    raise ValueError(f"{rows} rows do not fit at one-second resolution")
+
+
+def synthetic_prices(
+    rows: int, freq: Optional[str] = None, start: str = START_DATE, n_regimes: int = 12, seed: int = 0
+) -> pd.DataFrame:
+    """Regime-switching geometric random walk in the processed price file's layout.
+
+    The series is cut into ``n_regimes`` regimes of random length, each with
+    its own drift and volatility, so change-point methods have real breaks to
+    find. ``freq`` defaults to the coarsest bar size that fits ``rows``:
+    daily up to about 10x the real data, then hourly, minute or second ticks.
+    """
+    rng = np.random.default_rng(seed)
+    freq = freq or frequency_for(rows, start)
+    n_regimes = max(1, min(n_regimes, rows))
+    breaks = np.sort(rng.choice(np.arange(1, rows), size=n_regimes - 1, replace=False)) if n_regimes > 1 else []
+    lengths = np.diff(np.concatenate(([0], breaks, [rows]))).astype(np.int64)
+    drift = np.repeat(rng.normal(0.0, 5e-4, n_regimes), lengths)
+    scale = np.repeat(rng.uniform(0.005, 0.04, n_regimes), lengths)
+
+    log_return = drift + scale * rng.standard_normal(rows)
+    log_return[0] = np.nan
+    log_price = np.log(60.0) + np.nancumsum(log_return)
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range(start, periods=rows, freq=freq),
+            "Price": np.exp(log_price),
+            "log_price": log_price,
+            "log_return": log_return,
+        }
+    )
+
+
+def synthetic_events(count: int, start: pd.Timestamp, end: pd.Timestamp, seed: int = 0) -> pd.DataFrame:
+    """``count`` events with unique dates spread over ``[start, end]``, in the events file's layout."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    picked = np.sort(rng.choice(len(days), size=min(count, len(days)), replace=False))
+    return pd.DataFrame(
+        {
+            "date": days[picked].strftime("%Y-%m-%d"),
+            "event": [f"Synthetic event {i}" for i in range(len(picked))],
+            "category": rng.choice(CATEGORIES, size=len(picked)),
+        }
+    )
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from pathlib import Path
 import sys
+from typing import Optional
 
-from flask import Flask
+from flask import Flask, Response
 from flask_cors import CORS
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
@@ -14,12 +15,89 @@ from cache import InMemoryCache
 from routes.change_points import change_points_bp
 from routes.events import events_bp
 from routes.prices import prices_bp
+from services.artifacts import ArtifactStore, bundled_volatility
+from services.change_point_service import CHANGE_POINT_FILE
+from services.model_registry import ModelRegistry
+from services.ohlc import OHLCService
+from services.online_detector import OnlineDetectorService
+from services.price_store import PriceSeries, PriceStore
+from services.shared_dataset import SharedDataset, SharedPriceStore
+from services.shap_jobs import ShapJobQueue
+from services.volatility import VolatilityService
+from utils.config import (
+    ARTIFACTS_DIR,
+    DEFAULT_MODEL_VERSION,
+    EVENTS_PATH,
+    MODEL_CACHE_BYTES,
+    MODELS_DIR,
+    ONLINE_STATE_PATH,
+    PRICES_PATH,
+    PROFILE_DIR,
+    SHAP_ARTIFACTS_DIR,
+    SHARED_DATASET_DIR,
+)
+from utils.file_watcher import FileWatcher
+from utils.instrumentation import PROMETHEUS_CONTENT_TYPE, init_instrumentation
+from utils.profiler import SlowRequestProfiler
 
 
-def create_app() -> Flask:
+def _watch_sources(watcher: FileWatcher, cache: InMemoryCache, store: PriceStore, artifacts: ArtifactStore) -> None:
+    """Invalidate cached artifacts as soon as the file they were built from changes."""
+
+    def prices_changed(old: str, new: str) -> None:
+        series = store.clear()
+        if series is not None:
+            cache.invalidate(*series.versions)
+
+    def file_changed(old: str, new: str) -> None:
+        cache.invalidate(old)
+
+    def bundle_changed(old: str, new: str) -> None:
+        bundle = artifacts.clear()
+        if bundle is not None:
+            cache.invalidate(bundle.version)
+
+    watcher.watch(store.path, prices_changed)
+    watcher.watch(EVENTS_PATH, file_changed)
+    watcher.watch(CHANGE_POINT_FILE, file_changed)
+    watcher.watch(artifacts.path, bundle_changed)
+
+
+def create_app(shared_dataset: bool = False, profile_slow_ms: Optional[float] = None) -> Flask:
+    """Build the app; ``shared_dataset=True`` attaches to the dataset published by ``serve.py``.
+
+    With ``profile_slow_ms`` set, requests are stack-sampled and those taking
+    at least that long are dumped as folded stacks under ``reports/profiles``.
+    Results precomputed by ``build.py`` are looked up in ``app.config["ARTIFACTS"]``.
+    """
     app = Flask(__name__)
     CORS(app)
-    app.config["CACHE"] = InMemoryCache(ttl_seconds=120)
+    profiler = None if profile_slow_ms is None else SlowRequestProfiler(PROFILE_DIR, profile_slow_ms)
+    init_instrumentation(app, profiler)
+    app.config["CACHE"] = InMemoryCache()
+    app.config["VOLATILITY"] = VolatilityService(app.config["CACHE"])
+    app.config["OHLC"] = OHLCService(app.config["CACHE"])
+    app.config["ARTIFACTS"] = ArtifactStore(ARTIFACTS_DIR, app.config["CACHE"])
+    if shared_dataset:
+
+        def attached(dataset: SharedDataset) -> None:
+            app.config["VOLATILITY"].preload(dataset.series, dataset.volatility)
+
+        app.config["PRICE_STORE"] = SharedPriceStore(SHARED_DATASET_DIR, on_attach=attached, source=PRICES_PATH)
+    else:
+
+        def loaded(series: PriceSeries) -> None:
+            app.config["VOLATILITY"].preload(series, bundled_volatility(app.config["ARTIFACTS"], series))
+
+        app.config["PRICE_STORE"] = PriceStore(PRICES_PATH, on_load=loaded)
+    app.config["MODELS"] = ModelRegistry(MODELS_DIR, app.config["CACHE"], DEFAULT_MODEL_VERSION, MODEL_CACHE_BYTES)
+    app.config["SHAP_JOBS"] = ShapJobQueue(app.config["CACHE"], SHAP_ARTIFACTS_DIR)
+    app.config["ONLINE_DETECTOR"] = OnlineDetectorService(ONLINE_STATE_PATH, app.config["PRICE_STORE"])
+    app.config["FILE_WATCHER"] = FileWatcher()
+    _watch_sources(
+        app.config["FILE_WATCHER"], app.config["CACHE"], app.config["PRICE_STORE"], app.config["ARTIFACTS"]
+    )
+    app.config["FILE_WATCHER"].start()
 
     app.register_blueprint(prices_bp, url_prefix="/api/prices")
     app.register_blueprint(change_points_bp, url_prefix="/api/change-points")
@@ -29,6 +107,12 @@ def create_app() -> Flask:
     def health_check() -> tuple[dict[str, str], int]:
         return {"status": "OK"}, 200
 
+    @app.route("/api/metrics", methods=["GET"])
+    def metrics() -> Response:
+        """Latency, payload size, span and cache metrics in Prometheus text format."""
+        body = app.config["METRICS"].render(app.config["CACHE"].stats())
+        return Response(body, content_type=PROMETHEUS_CONTENT_TYPE)
+
     return app
 
 
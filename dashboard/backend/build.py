@@ -0,0 +1,197 @@
+"""Build the artifact bundle the dashboard serves, rerunning only the stages whose inputs changed.
+
+Each derived result (segmented change points with their regimes and business
+impact, rolling volatility, event impacts, the event dataset, VAR results and
+SHAP plots) is a stage with declared inputs and outputs
+(``services.pipeline``). A stage reruns when the content of one of its input
+files, its parameters or its code changed; independent stages run in parallel
+worker processes and unchanged outputs are linked from the previous bundle.
+The bundle is published read-only under ``artifacts/``, where the app looks
+results up (``services.artifacts``) instead of computing them per request.
+
+    python build.py --jobs 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BACKEND_DIR.parents[1]
+for _path in (BACKEND_DIR, REPO_ROOT):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+import numpy as np
+
+from services.event_impact import DEFAULT_IMPACT_WINDOW, EventImpactEngine, ranked_impacts
+from services.event_service import EventCatalogue
+from services.pipeline import Stage, build_bundle
+from services.price_store import PriceSeries
+from services.range_stats import RangeStatistics
+from services.volatility import PRESET_WINDOWS, rolling_volatility
+from utils.config import ARTIFACTS_DIR, EVENTS_PATH, PRICES_PATH
+
+SRC_DIR = REPO_ROOT / "src"
+SERVICES_DIR = BACKEND_DIR / "services"
+
+logger = logging.getLogger(__name__)
+
+
+def _code(*paths: Path) -> Dict[str, Path]:
+    """Modules a stage calls into, declared as inputs so editing them makes the stage stale."""
+    return {f"code:{path.name}": path for path in paths}
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    path.write_text(json.dumps(payload, indent=2))
+
+
+def change_points(
+    inputs: Dict[str, Path], outputs: Dict[str, Path], method: str, cost: str, penalty: str, min_size: int
+) -> Dict[str, Any]:
+    """Segment the daily log returns and summarise each regime and its business impact."""
+    from src.models.segmentation import detect_change_points, segmentation_results
+
+    series = PriceSeries.from_csv(inputs["prices"])
+    finite = np.isfinite(series.log_returns)
+    returns, dates = series.log_returns[finite], series.dates[finite]
+    breaks = detect_change_points(returns, method=method, cost=cost, penalty=penalty, min_size=min_size)
+    payload = segmentation_results(returns, dates, breaks)
+    payload.update({"method": method, "cost": cost, "penalty": penalty})
+    _write_json(outputs["change_point_results.json"], payload)
+    return {"prices_version": series.version}
+
+
+def volatility(inputs: Dict[str, Path], outputs: Dict[str, Path], windows: List[int]) -> Dict[str, Any]:
+    """Rolling log-return std for every window, one row per window aligned with the price rows."""
+    series = PriceSeries.from_csv(inputs["prices"])
+    np.save(outputs["volatility.npy"], rolling_volatility(series.log_returns, windows))
+    return {"prices_version": series.version}
+
+
+def event_impacts(inputs: Dict[str, Path], outputs: Dict[str, Path], window_days: int) -> Dict[str, Any]:
+    """The ``/api/events/impact`` payload."""
+    series = PriceSeries.from_csv(inputs["prices"])
+    engine = EventImpactEngine(RangeStatistics(series))
+    payload = ranked_impacts(EventCatalogue.from_csv(inputs["events"]), engine, window_days)
+    _write_json(outputs["event_impacts.json"], payload)
+    return {"prices_version": series.version}
+
+
+def events_dataset(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    """The curated event list of ``src/data/create_event_data.py``."""
+    from src.data.create_event_data import create_events_dataset
+
+    create_events_dataset(outputs["events2.csv"])
+
+
+def var_results(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> Dict[str, Any]:
+    """VAR fit of log returns on the macro indicators."""
+    from src.data.macro_loader import load_macro_data
+    from src.models.var_model import run_var_pipeline
+
+    series = PriceSeries.from_csv(inputs["prices"])
+    run_var_pipeline(load_macro_data(series.to_frame()), output_path=str(outputs["var_results.json"]))
+    return {"prices_version": series.version}
+
+
+def shap_plots(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> Dict[str, Any]:
+    """Global and latest-date SHAP plots, as served by ``/api/change-points/shap`` without a date."""
+    from src.data.macro_loader import load_macro_data
+    from src.models.explainability import run_shap_analysis
+
+    series = PriceSeries.from_csv(inputs["prices"])
+    run_shap_analysis(
+        load_macro_data(series.to_frame()),
+        global_path=str(outputs["shap_global.png"]),
+        local_path=str(outputs["shap_local.png"]),
+    )
+    return {"prices_version": series.version}
+
+
+def default_stages(prices_path: Path = PRICES_PATH, events_path: Path = EVENTS_PATH) -> List[Stage]:
+    price_code = _code(SERVICES_DIR / "price_store.py")
+    macro_code = _code(SRC_DIR / "data" / "macro_loader.py")
+    return [
+        Stage(
+            name="change_points",
+            run=change_points,
+            inputs={"prices": prices_path, **price_code, **_code(SRC_DIR / "models" / "segmentation.py")},
+            outputs=("change_point_results.json",),
+            params={"method": "binseg", "cost": "meanvar", "penalty": "bic", "min_size": 5},
+        ),
+        Stage(
+            name="volatility",
+            run=volatility,
+            inputs={"prices": prices_path, **price_code, **_code(SERVICES_DIR / "volatility.py")},
+            outputs=("volatility.npy",),
+            params={"windows": list(PRESET_WINDOWS)},
+        ),
+        Stage(
+            name="event_impacts",
+            run=event_impacts,
+            inputs={
+                "prices": prices_path,
+                "events": events_path,
+                **price_code,
+                **_code(
+                    SERVICES_DIR / "event_impact.py", SERVICES_DIR / "event_service.py", SERVICES_DIR / "range_stats.py"
+                ),
+            },
+            outputs=("event_impacts.json",),
+            params={"window_days": DEFAULT_IMPACT_WINDOW},
+        ),
+        Stage(
+            name="events_dataset",
+            run=events_dataset,
+            inputs=_code(SRC_DIR / "data" / "create_event_data.py"),
+            outputs=("events2.csv",),
+        ),
+        Stage(
+            name="var_results",
+            run=var_results,
+            inputs={"prices": prices_path, **price_code, **macro_code, **_code(SRC_DIR / "models" / "var_model.py")},
+            outputs=("var_results.json",),
+            optional=True,
+        ),
+        Stage(
+            name="shap_plots",
+            run=shap_plots,
+            inputs={
+                "prices": prices_path,
+                **price_code,
+                **macro_code,
+                **_code(SRC_DIR / "models" / "explainability.py"),
+            },
+            outputs=("shap_global.png", "shap_local.png"),
+            optional=True,
+        ),
+    ]
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=ARTIFACTS_DIR, help="Directory the bundles are published in.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes; 1 runs in-process.")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    result = build_bundle(args.root, default_stages(), jobs=args.jobs, force=args.force)
+    for name, record in result.manifest["stages"].items():
+        detail = record.get("reason") or f"{record.get('seconds', 0.0):.2f}s"
+        logger.info("%-16s %-8s %s", name, record["status"], detail)
+    if result.published:
+        logger.info("Published %s (version %s)", result.directory, result.manifest["version"])
+    else:
+        logger.info("Up to date: %s (version %s)", result.directory, result.manifest["version"])
+
+
+if __name__ == "__main__":
+    main()
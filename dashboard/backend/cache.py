@@ -1,37 +1,213 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_MAX_WALK_DEPTH = 4
 
 
 @dataclass
 class CacheEntry:
     value: Any
-    expires_at: datetime
+    expires_at: Optional[float]
+    size: int
+    tags: Tuple[str, ...] = ()
+
+
+@dataclass
+class _InFlight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+def _freeze_and_measure(value: Any, seen: Set[int], depth: int = 0) -> int:
+    """Mark NumPy arrays inside ``value`` read-only and estimate its size in bytes.
+
+    Containers, dataclasses and plain objects are walked a few levels deep;
+    objects shared between parts of the value are counted once.
+    """
+    if id(value) in seen or value is None:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    size = sys.getsizeof(value, 64)
+    if depth >= _MAX_WALK_DEPTH:
+        return size
+    if isinstance(value, Mapping):
+        return size + sum(_freeze_and_measure(item, seen, depth + 1) for item in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_freeze_and_measure(item, seen, depth + 1) for item in value)
+    attrs = getattr(value, "__dict__", None)
+    if attrs:
+        return size + sum(_freeze_and_measure(item, seen, depth + 1) for item in attrs.values())
+    return size
 
 
 class InMemoryCache:
-    """Simple in-memory TTL cache for Flask data loading."""
+    """Thread-safe LRU cache with a memory budget and optional TTL.
 
-    def __init__(self, ttl_seconds: int = 120) -> None:
+    Values are frozen on insertion (NumPy arrays inside them become
+    read-only), so hits hand out the stored object without a defensive copy.
+    Expiry uses the monotonic clock; with ``ttl_seconds=None`` entries live
+    until evicted or invalidated. Entries may carry tags (typically the
+    version of the data they were built from) and :meth:`invalidate` drops
+    every entry with a tag at once. :meth:`get_or_load` runs one loader per
+    key at a time; concurrent callers for the same key wait for its result.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
         self.ttl_seconds = ttl_seconds
-        self._store: Dict[str, CacheEntry] = {}
+        self.max_bytes = max_bytes
+        self._store: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, _InFlight] = {}
+        self._tagged: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.invalidations = 0
 
-    def get(self, key: str) -> Optional[Any]:
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
         item = self._store.get(key)
         if item is None:
             return None
-        if datetime.now(timezone.utc) > item.expires_at:
-            self._store.pop(key, None)
+        if item.expires_at is not None and time.monotonic() > item.expires_at:
+            self._discard(key)
+            self.expirations += 1
             return None
-        return item.value
+        self._store.move_to_end(key)
+        return item
 
-    def set(self, key: str, value: Any) -> None:
-        self._store[key] = CacheEntry(
-            value=value,
-            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds),
-        )
+    def _discard(self, key: str) -> None:
+        item = self._store.pop(key, None)
+        if item is None:
+            return
+        self._bytes -= item.size
+        for tag in item.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._lookup(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return item.value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """The value for ``key`` without counting a hit or refreshing its place in the LRU order."""
+        with self._lock:
+            item = self._store.get(key)
+            if item is None or (item.expires_at is not None and time.monotonic() > item.expires_at):
+                return None
+            return item.value
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+        size = _freeze_and_measure(value, set())
+        tags = tuple(dict.fromkeys(tags))
+        expires_at = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._store[key] = CacheEntry(value=value, expires_at=expires_at, size=size, tags=tags)
+            self._bytes += size
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes and self._store:
+                oldest = next(iter(self._store))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], tags: Iterable[str] = ()) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` once on a miss."""
+        with self._lock:
+            item = self._lookup(key)
+            if item is not None:
+                self.hits += 1
+                return item.value
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            with self._lock:
+                self.loads += 1
+            self.set(key, flight.value, tags)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry tagged with any of ``tags``; return how many were dropped."""
+        with self._lock:
+            keys = set().union(*(self._tagged.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._discard(key)
+            self.invalidations += len(keys)
+            return len(keys)
 
     def clear(self) -> None:
-        self._store.clear()
+        with self._lock:
+            self._store.clear()
+            self._tagged.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._store),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+            }
@@ -1,103 +1,431 @@
 from __future__ import annotations
 
 import base64
-import json
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request, url_for
 
 from src.constants import CHANGE_POINT_RESULTS_PATH, SHAP_GLOBAL_PNG, SHAP_LOCAL_PNG
 from src.data.macro_loader import load_macro_data
 from src.models.explainability import run_shap_analysis
+from src.models.exact_change_point import DEFAULT_PRUNE_THRESHOLD, exact_change_point_posterior, posterior_results
+from src.models.online_change_point import DEFAULT_ALERT_WINDOW
+from src.models.segmentation import METHODS, detect_change_points, segmentation_results
+from services.artifacts import ArtifactStore
+from services.change_point_service import cached_change_point_results
+from services.model_registry import ModelRegistry
+from services.online_detector import OnlineDetectorService
+from services.posterior import DEFAULT_HDI_PROB, DEFAULT_MAX_SAMPLES, evenly_spaced
+from services.price_store import PriceSeries, derived
+from services.shap_jobs import ShapArtifacts, ShapJobQueue, artifact_key
+from services.range_stats import RangeStatistics
+from utils.config import PRICES_PATH
+from utils.fingerprint import file_version
+from utils.http_cache import conditional, version_tags
+from utils.instrumentation import span
 
 change_points_bp = Blueprint("change_points", __name__)
+DETECT_METHODS = METHODS + ("exact",)
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 RESULTS_PATH = BASE_DIR / CHANGE_POINT_RESULTS_PATH
-PRICES_PATH = BASE_DIR / "data" / "processed" / "brentoilprices_processed.csv"
 SHAP_GLOBAL_PATH = BASE_DIR / SHAP_GLOBAL_PNG
 SHAP_LOCAL_PATH = BASE_DIR / SHAP_LOCAL_PNG
 
 
+def _price_series() -> PriceSeries:
+    return current_app.config["PRICE_STORE"].get()
+
+
+def _price_version() -> str:
+    return _price_series().version
+
+
+def _artifacts() -> ArtifactStore:
+    return current_app.config["ARTIFACTS"]
+
+
+def _registry() -> ModelRegistry:
+    return current_app.config["MODELS"]
+
+
+def _model_version() -> Optional[str]:
+    return request.args.get("model_version") or None
+
+
+def _model_tag() -> str:
+    """Version of the requested model's configuration and posterior file (the default model's without one)."""
+    return _registry().entry(_model_version()).tag
+
+
+def _results_version() -> str:
+    if _model_version() is not None:
+        return f"{_model_tag()}:{_price_version()}"
+    return f"{file_version(RESULTS_PATH)}:{_artifacts().tag('change_points', (PRICES_PATH,))}"
+
+
+def _range_stats() -> RangeStatistics:
+    return derived(current_app.config.get("CACHE"), _price_series(), "range_stats", RangeStatistics)
+
+
+def _model_results(version: str) -> Dict[str, Any]:
+    """Results of a registered model in the ``change_point_results.json`` schema.
+
+    Each tau's rounded posterior mean is the last row of the regime before
+    the change (an index into the finite log returns the model was fitted
+    on), so the segmentation breaks one row after it. Change points also
+    carry the dates of their tau HDI, regimes the posterior means of
+    ``mu``/``sigma``.
+    """
+    registry = _registry()
+    entry = registry.entry(version)
+    series = _price_series()
+
+    def build() -> Dict[str, Any]:
+        summary = registry.summary(version)
+        finite = np.isfinite(series.log_returns)
+        returns, dates = series.log_returns[finite], series.dates[finite]
+        breaks: Dict[int, Dict[str, Any]] = {}
+        for cp in summary["change_points"]:
+            if np.isfinite(cp["mean"]) and 0 < int(round(cp["mean"])) + 1 < returns.shape[0]:
+                breaks.setdefault(int(round(cp["mean"])) + 1, cp)
+        results = segmentation_results(returns, dates, sorted(breaks))
+        for cp, tau in zip(results["change_points"], (breaks[index] for index in sorted(breaks))):
+            cp["tau_hdi_dates"] = [_tau_date(dates, tau["hdi_lower"]), _tau_date(dates, tau["hdi_upper"])]
+        for regime, posterior in zip(results["regimes"], summary["regimes"]):
+            regime["posterior_mu"] = posterior.get("mu", {}).get("mean")
+            regime["posterior_sigma"] = posterior.get("sigma", {}).get("mean")
+        results["model_version"] = entry.version
+        return results
+
+    cache = current_app.config.get("CACHE")
+    if cache is None:
+        return build()
+    key = f"model_results:{entry.tag}:{series.version}"
+    return cache.get_or_load(key, build, tags=version_tags((entry.tag, series.version)))
+
+
 def _load_change_point_results() -> Dict[str, Any]:
-    if RESULTS_PATH.exists():
-        with RESULTS_PATH.open("r", encoding="utf-8") as handle:
-            return json.load(handle)
-    return {
-        "n_change_points": 1,
-        "change_points": [{"name": "cp_1", "tau_date": "2012-06-04", "tau_index": 1500}],
-        "regimes": [],
-        "business_impact": [],
-    }
+    """A registered model's results when ``model_version`` is given.
+
+    Otherwise the saved MCMC results, else the segmentation in the artifact
+    bundle, else the canned example.
+    """
+    version = _model_version()
+    if version is not None:
+        return _model_results(version)
+    if not RESULTS_PATH.exists():
+        built = _artifacts().load_json("change_points", "change_point_results.json", (PRICES_PATH,))
+        if built is not None:
+            return built
+    return cached_change_point_results(current_app.config.get("CACHE"), RESULTS_PATH)
 
 
 @change_points_bp.route("/", methods=["GET"])
+@conditional(_results_version)
 def get_change_points() -> Any:
-    return jsonify(_load_change_point_results())
+    try:
+        return jsonify(_load_change_point_results())
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Model posterior not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
 
 
 @change_points_bp.route("/details", methods=["GET"])
+@conditional(_results_version, _price_version)
 def get_change_point_details() -> Any:
     try:
         results = _load_change_point_results()
-        prices = pd.read_csv(PRICES_PATH)
-        prices["Date"] = pd.to_datetime(prices["Date"], errors="coerce")
+        stats = _range_stats()
+        n_rows = len(stats)
+        n_returns = int(stats.return_count(0, n_rows))
 
         regimes: List[Dict[str, Any]] = []
         for cp in results.get("change_points", []):
-            tau_date = pd.to_datetime(cp["tau_date"])
-            before = prices[prices["Date"] < tau_date]
-            after = prices[prices["Date"] >= tau_date]
-            if before.empty or after.empty:
+            # tau_index is the last finite log return of the regime before the
+            # change, the basis the results' regime durations are counted in.
+            if "tau_index" in cp:
+                before = int(cp["tau_index"]) + 1
+            else:
+                tau_date = np.datetime64(pd.to_datetime(cp["tau_date"]), "ns")
+                before = int(stats.return_count(0, np.searchsorted(stats.dates, tau_date, "right")))
+            if not 0 < before < n_returns:
                 continue
+            split = int(stats.return_rows(before))
+            before_mean, before_std = stats.mean_std(0, split)
+            after_mean, after_std = stats.mean_std(split, n_rows)
             regimes.append(
                 {
                     "change_point": cp,
-                    "before_mean": float(before["Price"].mean()),
-                    "after_mean": float(after["Price"].mean()),
-                    "before_volatility": float(before["Price"].std()),
-                    "after_volatility": float(after["Price"].std()),
-                    "mean_shift_percent": float(
-                        ((after["Price"].mean() - before["Price"].mean()) / before["Price"].mean())
-                        * 100.0
-                    ),
-                    "duration_before": int(len(before)),
-                    "duration_after": int(len(after)),
+                    "before_mean": float(before_mean),
+                    "after_mean": float(after_mean),
+                    "before_volatility": float(before_std),
+                    "after_volatility": float(after_std),
+                    "mean_shift_percent": float((after_mean - before_mean) / before_mean * 100.0),
+                    "duration_before": before,
+                    "duration_after": n_returns - before,
                 }
             )
         return jsonify({"regime_analysis": regimes, "business_impact": results.get("business_impact", [])})
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except FileNotFoundError:
         return jsonify({"error": "Required files not found"}), 404
     except Exception as exc:  # pragma: no cover
         return jsonify({"error": str(exc)}), 500
 
 
+def _int_list(value: Optional[str]) -> Optional[List[int]]:
+    if not value:
+        return None
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def _tau_date(dates: np.ndarray, index: float) -> Optional[str]:
+    if not np.isfinite(index) or not 0 <= round(index) < dates.shape[0]:
+        return None
+    return str(np.datetime_as_string(dates[int(round(index))], unit="D"))
+
+
 @change_points_bp.route("/posterior", methods=["GET"])
+@conditional(_model_tag, _price_version)
 def get_posterior_samples() -> Any:
-    """Provide synthetic posterior samples shaped for dashboard rendering."""
-    results = _load_change_point_results()
-    cps = results.get("change_points", [])
-    posterior: Dict[str, Dict[str, Any]] = {}
-    for idx, cp in enumerate(cps, start=1):
-        center = cp.get("tau_index", 1)
-        samples = np.random.normal(center, 5.0, 300).clip(min=0).tolist()
-        posterior[f"tau_{idx}"] = {
-            "samples": samples,
-            "posterior_mean": float(np.mean(samples)),
-            "hdi_lower": float(np.percentile(samples, 3)),
-            "hdi_upper": float(np.percentile(samples, 97)),
-            "tau_date": cp.get("tau_date"),
-        }
-    return jsonify(posterior)
+    """Posterior draws and summaries of a registered model's trace.
+
+    Query parameters: ``model_version`` (default model when absent), ``var``
+    (repeatable or comma-separated, default all), ``chains``
+    (comma-separated), ``thin`` (draw stride), ``max_samples`` (cap on
+    returned draws per variable) and ``hdi_prob``.
+    """
+    try:
+        registry = _registry()
+        version = _model_version()
+        names = [name for value in request.args.getlist("var") for name in value.split(",") if name]
+        chains = _int_list(request.args.get("chains"))
+        thin = request.args.get("thin", default=1, type=int)
+        max_samples = request.args.get("max_samples", default=DEFAULT_MAX_SAMPLES, type=int)
+        hdi_prob = request.args.get("hdi_prob", default=DEFAULT_HDI_PROB, type=float)
+        if not 0 < hdi_prob < 1:
+            raise ValueError("hdi_prob must be between 0 and 1")
+
+        summaries = registry.summaries(
+            version, names or list(registry.variables(version)), chains=chains, thin=thin, hdi_prob=hdi_prob
+        )
+        dates = _price_series().dates
+        posterior: Dict[str, Dict[str, Any]] = {}
+        for summary in summaries:
+            entry = {
+                "samples": evenly_spaced(summary.draws, max_samples).tolist(),
+                "n_draws": int(summary.draws.shape[0]),
+                "posterior_mean": summary.mean,
+                "sd": summary.sd,
+                "hdi_lower": summary.hdi_lower,
+                "hdi_upper": summary.hdi_upper,
+                "hdi_prob": summary.hdi_prob,
+                "histogram": {
+                    "counts": summary.histogram_counts.tolist(),
+                    "edges": summary.histogram_edges.tolist(),
+                },
+            }
+            if summary.name.startswith("tau"):
+                entry["tau_date"] = _tau_date(dates, summary.mean)
+            posterior[summary.name] = entry
+        return jsonify(posterior)
+    except FileNotFoundError:
+        return jsonify({"error": "Posterior samples not found"}), 404
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
 
 
 @change_points_bp.route("/business-impact", methods=["GET"])
+@conditional(_results_version)
 def get_business_impact() -> Any:
-    results = _load_change_point_results()
-    return jsonify({"business_impact": results.get("business_impact", [])})
+    try:
+        results = _load_change_point_results()
+        return jsonify({"business_impact": results.get("business_impact", [])})
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Model posterior not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
+
+
+@change_points_bp.route("/models", methods=["GET"])
+def list_models() -> Any:
+    """Registered model versions with their config hash and whether their draws are in memory."""
+    registry = _registry()
+    models = [{**entry.describe(), "loaded": registry.is_loaded(entry)} for entry in registry.index().values()]
+    return jsonify({"default_version": registry.default_version, "models": models, "cache": registry.stats()})
+
+
+@change_points_bp.route("/models/<version>", methods=["GET"])
+@conditional(_price_version)
+def get_model_summary(version: str) -> Any:
+    """Tau HDIs (as row indices and dates) and regime ``mu``/``sigma`` of one model version."""
+    try:
+        registry = _registry()
+        entry = registry.entry(version)
+        summary = registry.summary(version)
+        finite = np.isfinite(_price_series().log_returns)
+        dates = _price_series().dates[finite]
+        change_points = [
+            {
+                **cp,
+                "tau_date": _tau_date(dates, cp["mean"]),
+                "hdi_dates": [_tau_date(dates, cp["hdi_lower"]), _tau_date(dates, cp["hdi_upper"])],
+            }
+            for cp in summary["change_points"]
+        ]
+        return jsonify({**entry.describe(), **summary, "change_points": change_points})
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 404
+    except FileNotFoundError:
+        return jsonify({"error": "Model posterior not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def _penalty(value: str) -> Any:
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+@change_points_bp.route("/detect", methods=["GET"])
+@conditional(_price_version)
+def detect_change_points_in_range() -> Any:
+    """Change points in log returns over ``start_date``..``end_date``.
+
+    ``method`` is ``binseg`` (default) or ``pelt`` for penalised
+    segmentation, or ``exact`` for the exact Bayesian posterior, where
+    ``prune_threshold`` (default ``DEFAULT_PRUNE_THRESHOLD``; ``0`` is exact)
+    drops candidate change positions whose posterior weight falls below it. Responds in the
+    ``change_point_results.json`` schema, so it can stand in for the MCMC
+    results on any range picked in the dashboard.
+    """
+    try:
+        series = _price_series()
+        start_date = _parse_date(request.args.get("start_date"))
+        end_date = _parse_date(request.args.get("end_date"))
+        method = request.args.get("method", "binseg")
+        cost = request.args.get("cost", "meanvar")
+        penalty = _penalty(request.args.get("penalty", "bic"))
+        min_size = request.args.get("min_size", default=5, type=int)
+        max_change_points = request.args.get("max_change_points", type=int)
+        prune_threshold = request.args.get("prune_threshold", default=DEFAULT_PRUNE_THRESHOLD, type=float)
+        if method not in DETECT_METHODS:
+            raise ValueError(f"Unknown method '{method}'. Use one of {DETECT_METHODS}.")
+        if not 0 <= prune_threshold < 1:
+            raise ValueError("prune_threshold must be in [0, 1)")
+
+        lo, hi = series.bounds(start_date, end_date)
+        returns = series.log_returns[lo:hi]
+        finite = np.isfinite(returns)
+        returns, dates = returns[finite], series.dates[lo:hi][finite]
+        if returns.shape[0] < 2 * max(min_size, 2):
+            return jsonify({"error": "Not enough data in the selected range"}), 404
+
+        if method == "exact":
+            posterior = exact_change_point_posterior(
+                returns, max_change_points=max_change_points or 5, min_size=min_size, prune_threshold=prune_threshold
+            )
+            payload = posterior_results(returns, dates, posterior)
+        else:
+            breaks = detect_change_points(
+                returns,
+                method=method,
+                cost=cost,
+                penalty=penalty,
+                min_size=min_size,
+                max_change_points=max_change_points,
+            )
+            payload = segmentation_results(returns, dates, breaks)
+        payload.update(
+            {
+                "method": method,
+                "cost": cost,
+                "penalty": penalty,
+                **({"prune_threshold": prune_threshold} if method == "exact" else {}),
+                "filters": {
+                    "start_date": request.args.get("start_date"),
+                    "end_date": request.args.get("end_date"),
+                },
+            }
+        )
+        return jsonify(payload)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Price data not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
+
+
+def _alert_window() -> int:
+    window = request.args.get("window", default=DEFAULT_ALERT_WINDOW, type=int)
+    if window < 1:
+        raise ValueError("window must be a positive integer")
+    return window
+
+
+@change_points_bp.route("/online", methods=["GET"])
+def get_online_state() -> Any:
+    """Current state of the streaming detector; ``window`` sets the alert horizon in days."""
+    try:
+        service: OnlineDetectorService = current_app.config["ONLINE_DETECTOR"]
+        return jsonify(service.summary(_alert_window()))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Price data not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
+
+
+@change_points_bp.route("/online", methods=["POST"])
+def append_online_observations() -> Any:
+    """Feed new daily prices to the streaming detector.
+
+    The JSON body is ``{"observations": [{"date": ..., "price": ...}, ...]}``.
+    Responds with the updated probability that a change happened within the
+    last ``window`` days, the run-length summary and the probability after
+    each absorbed observation.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        observations = body.get("observations")
+        if not isinstance(observations, list) or not observations:
+            raise ValueError("Body must contain a non-empty 'observations' list.")
+        if not all(isinstance(item, dict) for item in observations):
+            raise ValueError("Each observation must be an object with 'date' and 'price'.")
+        frame = pd.DataFrame(
+            {"Date": [item.get("date") for item in observations], "Price": [item.get("price") for item in observations]}
+        )
+        service: OnlineDetectorService = current_app.config["ONLINE_DETECTOR"]
+        return jsonify(service.append(frame, _alert_window()))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Price data not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
 
 
 def _png_to_base64(path: Path) -> str | None:
@@ -106,28 +434,89 @@ def _png_to_base64(path: Path) -> str | None:
     return base64.b64encode(path.read_bytes()).decode("utf-8")
 
 
+def _shap_payload(artifacts: ShapArtifacts) -> Dict[str, Any]:
+    return {
+        "status": "done",
+        "global_plot_b64": base64.b64encode(artifacts.global_png).decode("utf-8"),
+        "local_plot_b64": base64.b64encode(artifacts.local_png).decode("utf-8"),
+        "global_plot_path": str(artifacts.global_path),
+        "local_plot_path": str(artifacts.local_path),
+    }
+
+
+def _bundled_shap(series: PriceSeries) -> Optional[ShapArtifacts]:
+    """The plots ``build.py`` made for ``series``, if the bundle has them."""
+    paths = [
+        _artifacts().lookup("shap_plots", name, prices_version=series.version)
+        for name in ("shap_global.png", "shap_local.png")
+    ]
+    if None in paths:
+        return None
+    return ShapArtifacts(paths[0].read_bytes(), paths[1].read_bytes(), paths[0], paths[1])
+
+
+def _shap_job_response(job_id: str, status: Dict[str, Any]) -> Any:
+    status_url = url_for("change_points.get_shap_job", job_id=job_id)
+    return jsonify({"job_id": job_id, "status_url": status_url, **status}), 202, {"Location": status_url}
+
+
 @change_points_bp.route("/shap", methods=["GET"])
+@conditional(_price_version)
 def get_shap_assets() -> Any:
+    """SHAP plots for ``selected_date``; ``202`` with a job to poll while they are computed."""
     selected_date = request.args.get("selected_date")
     try:
-        prices = pd.read_csv(PRICES_PATH)
-        prices["Date"] = pd.to_datetime(prices["Date"], errors="coerce")
-        merged = load_macro_data(prices)
-        run_shap_analysis(
-            merged,
-            global_path=str(SHAP_GLOBAL_PATH),
-            local_path=str(SHAP_LOCAL_PATH),
-            selected_date=selected_date,
+        jobs: ShapJobQueue = current_app.config["SHAP_JOBS"]
+        series = _price_series()
+        model = _registry().entry(_model_version())
+        key = artifact_key(series.version, model.version, selected_date)
+        artifacts = jobs.lookup(key)
+        if artifacts is None and selected_date is None and _model_version() is None:
+            artifacts = _bundled_shap(series)
+        if artifacts is not None:
+            return jsonify(_shap_payload(artifacts))
+
+        metrics = current_app.config.get("METRICS")
+
+        def task(global_path: Path, local_path: Path) -> None:
+            # Runs on the job queue's thread, outside any request, so only the histogram sees it.
+            with span("load_macro_data", metrics):
+                macro = load_macro_data(series.to_frame())
+            with span("run_shap_analysis", metrics):
+                run_shap_analysis(
+                    macro,
+                    global_path=str(global_path),
+                    local_path=str(local_path),
+                    selected_date=selected_date,
+                )
+
+        job_id = jobs.submit(key, task)
+        return _shap_job_response(job_id, jobs.status(job_id))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Required files not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
+
+
+@change_points_bp.route("/shap/jobs/<job_id>", methods=["GET"])
+def get_shap_job(job_id: str) -> Any:
+    jobs: ShapJobQueue = current_app.config["SHAP_JOBS"]
+    status = jobs.status(job_id)
+    if status["status"] == "done":
+        return jsonify(_shap_payload(jobs.lookup(job_id)))
+    if status["status"] == "unknown":
+        return jsonify({"error": "Unknown SHAP job"}), 404
+    if status["status"] == "failed":
+        # Keep serving the last published artifacts if the analysis fails.
+        status.update(
+            {
+                "global_plot_b64": _png_to_base64(SHAP_GLOBAL_PATH),
+                "local_plot_b64": _png_to_base64(SHAP_LOCAL_PATH),
+                "global_plot_path": str(SHAP_GLOBAL_PATH),
+                "local_plot_path": str(SHAP_LOCAL_PATH),
+            }
         )
-    except Exception:
-        # Keep serving existing artifacts if dynamic generation fails.
-        pass
-
-    return jsonify(
-        {
-            "global_plot_b64": _png_to_base64(SHAP_GLOBAL_PATH),
-            "local_plot_b64": _png_to_base64(SHAP_LOCAL_PATH),
-            "global_plot_path": str(SHAP_GLOBAL_PATH),
-            "local_plot_path": str(SHAP_LOCAL_PATH),
-        }
-    )
+        return jsonify({"job_id": job_id, **status})
+    return _shap_job_response(job_id, status)
@@ -1,57 +1,79 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
-import pandas as pd
-from flask import Blueprint, jsonify, request
+import numpy as np
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from services.event_impact import DEFAULT_IMPACT_WINDOW, EventImpactEngine, ranked_impacts, round_price
+from services.event_service import EventCatalogue, cached_event_catalogue
+from services.price_store import PriceSeries, derived
+from services.range_stats import RangeStatistics
+from utils.config import EVENTS_PATH
+from utils.fingerprint import file_version
+from utils.http_cache import conditional
+from utils.instrumentation import span
+from utils.serializers import RawJSON, dumps, json_response, matrix_json, matrix_rows_json, records_json
 
 events_bp = Blueprint("events", __name__)
 
-BASE_DIR = Path(__file__).resolve().parents[3]
-EVENTS_PATH = BASE_DIR / "data" / "processed" / "events.csv"
-PRICES_PATH = BASE_DIR / "data" / "processed" / "brentoilprices_processed.csv"
+DEFAULT_SWEEP_WINDOWS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+MAX_SWEEP_CELLS = 2_000_000
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _price_series() -> PriceSeries:
+    return current_app.config["PRICE_STORE"].get()
+
+
+def _price_version() -> str:
+    return _price_series().version
+
+
+def _events_version() -> str:
+    return file_version(EVENTS_PATH)
+
+
+def _impact_engine() -> EventImpactEngine:
+    cache = current_app.config.get("CACHE")
+    return derived(
+        cache,
+        _price_series(),
+        "event_impact",
+        lambda series: EventImpactEngine(derived(cache, series, "range_stats", RangeStatistics)),
+    )
+
+
+def _catalogue() -> EventCatalogue:
+    return cached_event_catalogue(current_app.config.get("CACHE"), EVENTS_PATH)
 
 
-def _event_date_column(df: pd.DataFrame) -> Optional[str]:
-    for col in ("start_date", "date", "event_date"):
-        if col in df.columns:
-            return col
-    return None
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d")
 
 
 @events_bp.route("/", methods=["GET"])
+@conditional(_events_version)
 def get_events() -> Any:
+    """Events newest first; ``overlap=true`` matches ``start_date``/``end_date`` spans instead of start dates."""
     try:
-        df = pd.read_csv(EVENTS_PATH)
-        start_date = request.args.get("start_date")
-        end_date = request.args.get("end_date")
-        category = request.args.get("category")
-
-        date_col = _event_date_column(df)
-        if date_col is not None:
-            df["_date"] = pd.to_datetime(df[date_col], errors="coerce")
-            if start_date:
-                df = df[df["_date"] >= datetime.strptime(start_date, "%Y-%m-%d")]
-            if end_date:
-                df = df[df["_date"] <= datetime.strptime(end_date, "%Y-%m-%d")]
-
-        if category and "category" in df.columns:
-            df = df[df["category"] == category]
-
-        events: list[Dict[str, Any]] = []
-        for _, row in df.iterrows():
-            events.append(
-                {
-                    "date": str(row.get(date_col, "")) if date_col else None,
-                    "title": row.get("event_name") or row.get("title") or row.get("event") or "",
-                    "description": row.get("description") or "",
-                    "category": row.get("category") or "",
-                }
-            )
-        events.sort(key=lambda item: item["date"] or "", reverse=True)
-        return jsonify({"events": events, "count": len(events)})
+        catalogue = _catalogue()
+        start_date = _parse_date(request.args.get("start_date"))
+        end_date = _parse_date(request.args.get("end_date"))
+        category = request.args.get("category") or None
+
+        if request.args.get("overlap", "").lower() in ("1", "true", "yes"):
+            positions = catalogue.overlapping(start_date, end_date, category)
+        else:
+            positions = catalogue.select(start_date, end_date, category)
+        rows = catalogue.json_rows
+        events = RawJSON("[" + ",".join(rows[i] for i in positions[::-1]) + "]")
+        return json_response({"count": len(positions), "events": events})
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except FileNotFoundError:
         return jsonify({"events": [], "count": 0})
     except Exception as exc:  # pragma: no cover
@@ -59,6 +81,7 @@ def get_events() -> Any:
 
 
 @events_bp.route("/correlation", methods=["GET"])
+@conditional(_events_version, _price_version)
 def get_event_correlation() -> Any:
     try:
         event_date = request.args.get("event_date")
@@ -66,40 +89,29 @@ def get_event_correlation() -> Any:
         if not event_date:
             return jsonify({"error": "event_date parameter required"}), 400
 
-        events_df = pd.read_csv(EVENTS_PATH)
-        prices_df = pd.read_csv(PRICES_PATH)
-        prices_df["Date"] = pd.to_datetime(prices_df["Date"], errors="coerce")
-        date_col = _event_date_column(events_df)
-        if date_col is None:
+        catalogue = _catalogue()
+        if catalogue.date_column is None:
             return jsonify({"error": "No date column found in events"}), 400
 
-        event_rows = events_df[events_df[date_col].astype(str) == event_date]
-        if event_rows.empty:
+        event_dt = datetime.strptime(event_date, "%Y-%m-%d")
+        position = catalogue.find(event_dt)
+        if position is None:
             return jsonify({"error": "Event not found"}), 404
-        event_row = event_rows.iloc[0]
-        event_title = event_row.get("event_name") or event_row.get("title") or event_row.get("event", "")
+        event_title = catalogue.titles[position]
 
-        event_dt = datetime.strptime(event_date, "%Y-%m-%d")
-        before_start = event_dt - timedelta(days=window)
-        after_end = event_dt + timedelta(days=window)
-        before = prices_df[(prices_df["Date"] >= before_start) & (prices_df["Date"] < event_dt)]
-        after = prices_df[(prices_df["Date"] > event_dt) & (prices_df["Date"] <= after_end)]
-        before_avg = before["Price"].mean() if not before.empty else None
-        after_avg = after["Price"].mean() if not after.empty else None
-        pct = ((after_avg - before_avg) / before_avg * 100.0) if before_avg and after_avg else None
-
-        nearby = prices_df[(prices_df["Date"] >= before_start) & (prices_df["Date"] <= after_end)].copy()
-        nearby["Date"] = nearby["Date"].dt.strftime("%Y-%m-%d")
-        return jsonify(
+        impact = _impact_engine().impacts(np.array([event_dt], dtype="datetime64[ns]"), window)
+        series = _price_series()
+        lo, hi = series.bounds(event_dt - timedelta(days=window), event_dt + timedelta(days=window))
+        return json_response(
             {
                 "event": {"date": event_date, "title": event_title},
                 "analysis": {
                     "window_days": window,
-                    "before_avg_price": round(float(before_avg), 2) if before_avg else None,
-                    "after_avg_price": round(float(after_avg), 2) if after_avg else None,
-                    "price_change_percent": round(float(pct), 2) if pct else None,
+                    "before_avg_price": round_price(impact.before_mean[0]),
+                    "after_avg_price": round_price(impact.after_mean[0]),
+                    "price_change_percent": round_price(impact.pct_change[0]),
                 },
-                "chart_data": nearby[["Date", "Price"]].to_dict(orient="records"),
+                "chart_data": records_json({"Date": series.dates[lo:hi], "Price": series.prices[lo:hi]}),
             }
         )
     except FileNotFoundError:
@@ -109,39 +121,105 @@ def get_event_correlation() -> Any:
 
 
 @events_bp.route("/impact", methods=["GET"])
+@conditional(_events_version, _price_version)
 def get_event_impact() -> Any:
+    """Price change in the 30 days around each event, from the artifact bundle when it is fresh."""
     try:
-        events_df = pd.read_csv(EVENTS_PATH)
-        prices_df = pd.read_csv(PRICES_PATH)
-        prices_df["Date"] = pd.to_datetime(prices_df["Date"], errors="coerce")
-        date_col = _event_date_column(events_df)
-        if date_col is None:
-            return jsonify({"impacts": [], "count": 0})
-
-        impacts: list[Dict[str, Any]] = []
-        for _, event in events_df.iterrows():
-            if not event.get(date_col):
-                continue
-            event_dt = pd.to_datetime(event.get(date_col), errors="coerce")
-            if pd.isna(event_dt):
-                continue
-            before = prices_df[(prices_df["Date"] >= event_dt - timedelta(days=30)) & (prices_df["Date"] < event_dt)]
-            after = prices_df[(prices_df["Date"] > event_dt) & (prices_df["Date"] <= event_dt + timedelta(days=30))]
-            before_avg = before["Price"].mean() if not before.empty else None
-            after_avg = after["Price"].mean() if not after.empty else None
-            pct = ((after_avg - before_avg) / before_avg * 100.0) if before_avg and after_avg else None
-            impacts.append(
-                {
-                    "date": str(event.get(date_col)),
-                    "title": event.get("event_name") or event.get("title") or event.get("event", ""),
-                    "category": event.get("category") or "",
-                    "price_change_percent": round(float(pct), 2) if pct else None,
-                }
-            )
-
-        impacts.sort(key=lambda item: abs(item["price_change_percent"] or 0.0), reverse=True)
-        return jsonify({"impacts": impacts, "count": len(impacts)})
+        built = current_app.config["ARTIFACTS"].load_json(
+            "event_impacts", "event_impacts.json", (EVENTS_PATH,), prices_version=_price_version()
+        )
+        if built is not None:
+            return jsonify(built)
+        return jsonify(ranked_impacts(_catalogue(), _impact_engine(), DEFAULT_IMPACT_WINDOW))
     except FileNotFoundError:
         return jsonify({"impacts": [], "count": 0})
     except Exception as exc:  # pragma: no cover
         return jsonify({"error": str(exc)}), 500
+
+
+def _sweep_windows() -> np.ndarray:
+    raw = request.args.get("windows")
+    if not raw:
+        return np.asarray(DEFAULT_SWEEP_WINDOWS, dtype=np.int64)
+    windows = np.asarray([int(item) for item in raw.split(",") if item.strip()], dtype=np.int64)
+    if windows.size == 0 or (windows < 1).any():
+        raise ValueError("windows must be a comma-separated list of positive integers")
+    return windows
+
+
+def _sweep_events(catalogue: EventCatalogue) -> tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Dates and ``date``/``title``/``category`` columns of the swept events.
+
+    ``event_dates`` lists the events; otherwise every dated event in
+    ``category`` (or in the catalogue) is swept.
+    """
+    raw = request.args.get("event_dates")
+    if raw:
+        labels = [item.strip() for item in raw.split(",") if item.strip()]
+        found = [catalogue.find(datetime.strptime(label, "%Y-%m-%d")) for label in labels]
+        columns = {
+            "date": np.array(labels, dtype=object),
+            "title": np.array([None if i is None else catalogue.titles[i] for i in found], dtype=object),
+            "category": np.array([None if i is None else catalogue.categories[i] for i in found], dtype=object),
+        }
+        return np.array(labels, dtype="datetime64[ns]"), columns
+
+    positions = catalogue.select(category=request.args.get("category") or None)
+    positions = positions[positions < catalogue.n_dated]
+    columns = {
+        "date": catalogue.raw_dates[positions],
+        "title": catalogue.titles[positions],
+        "category": catalogue.categories[positions],
+    }
+    return catalogue.dates[positions], columns
+
+
+def _sweep_rows(
+    header: Dict[str, Any], events: Dict[str, np.ndarray], matrices: Dict[str, np.ndarray]
+) -> Iterator[str]:
+    yield dumps(header) + "\n"
+    rows = {name: matrix_rows_json(values) for name, values in matrices.items()}
+    for index in range(header["count"]):
+        event = {key: values[index] for key, values in events.items()}
+        yield dumps({**event, **{name: fragments[index] for name, fragments in rows.items()}}) + "\n"
+
+
+@events_bp.route("/sweep", methods=["GET"])
+@conditional(_events_version, _price_version)
+def sweep_event_windows() -> Any:
+    """Before/after means, percent change and volatility for every event x window pair.
+
+    Events come from ``event_dates`` (comma-separated, need not be in the
+    catalogue) or ``category`` (default: every dated event); ``windows`` is
+    a comma-separated list of day counts. Each matrix has one row per event
+    and one column per window. ``stream=true`` sends NDJSON instead: a
+    header line, then one line per event.
+    """
+    try:
+        windows = _sweep_windows()
+        dates, events = _sweep_events(_catalogue())
+        if dates.shape[0] * windows.size > MAX_SWEEP_CELLS:
+            return jsonify({"error": f"Sweep is limited to {MAX_SWEEP_CELLS} event x window cells"}), 400
+
+        impact = _impact_engine().impacts(dates[:, None], windows[None, :])
+        matrices = {
+            "before_avg_price": np.round(impact.before_mean, 2),
+            "after_avg_price": np.round(impact.after_mean, 2),
+            "price_change_percent": np.round(impact.pct_change, 2),
+            "before_volatility": np.round(impact.before_volatility, 6),
+            "after_volatility": np.round(impact.after_volatility, 6),
+            "before_count": impact.before_count,
+            "after_count": impact.after_count,
+        }
+        header = {"windows": windows.tolist(), "count": int(dates.shape[0])}
+        if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+            return Response(_sweep_rows(header, events, matrices), mimetype=NDJSON_MIMETYPE)
+        with span("serialize"):
+            encoded = {"events": records_json(events), **{name: matrix_json(values) for name, values in matrices.items()}}
+        return json_response({**header, **encoded})
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Data file not found"}), 404
+    except Exception as exc:  # pragma: no cover
+        return jsonify({"error": str(exc)}), 500
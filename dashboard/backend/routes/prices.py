@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from datetime import datetime
-from pathlib import Path
 from typing import Any, Dict, Optional
 
 import numpy as np
@@ -10,33 +9,42 @@ from flask import Blueprint, current_app, jsonify, request
 
 from src.constants import DEFAULT_VOLATILITY_WINDOW
 from src.data.macro_loader import load_macro_data
+from services.change_point_service import (
+    CHANGE_POINT_FILE,
+    cached_change_point_results,
+    change_point_positions,
+)
+from services.downsampling import downsample_indices
+from services.ohlc import DEFAULT_TARGET_BARS, OHLCPyramid
+from services.price_store import PriceSeries, derived
+from services.range_stats import RangeStatistics
+from utils.fingerprint import file_version
+from utils.http_cache import conditional
+from utils.instrumentation import span
+from utils.serializers import columns_response, frame_columns
 
 prices_bp = Blueprint("prices", __name__)
 
-BASE_DIR = Path(__file__).resolve().parents[3]
-DATA_PATH = BASE_DIR / "data" / "processed" / "brentoilprices_processed.csv"
 
+def _price_series() -> PriceSeries:
+    return current_app.config["PRICE_STORE"].get()
 
-def _get_cache() -> Any:
-    return current_app.config.get("CACHE")
 
+def _price_version() -> str:
+    return _price_series().version
 
+
+def _results_version() -> str:
+    return file_version(CHANGE_POINT_FILE)
+
+
+def _range_stats() -> RangeStatistics:
+    return derived(current_app.config.get("CACHE"), _price_series(), "range_stats", RangeStatistics)
+
+
+@span("load_prices")
 def _load_prices() -> pd.DataFrame:
-    cache = _get_cache()
-    cache_key = "prices_df"
-    if cache is not None:
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return cached.copy()
-
-    df = pd.read_csv(DATA_PATH)
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Price"] = pd.to_numeric(df["Price"], errors="coerce")
-    if "log_return" in df.columns:
-        df["log_return"] = pd.to_numeric(df["log_return"], errors="coerce")
-    if cache is not None:
-        cache.set(cache_key, df.copy())
-    return df
+    return _price_series().to_frame()
 
 
 def _parse_date(value: Optional[str]) -> Optional[datetime]:
@@ -45,44 +53,91 @@ def _parse_date(value: Optional[str]) -> Optional[datetime]:
     return datetime.strptime(value, "%Y-%m-%d")
 
 
+def _finite(value: float) -> Optional[float]:
+    """``value``, or ``None`` (JSON null) when it is NaN or infinite."""
+    return value if np.isfinite(value) else None
+
+
+def _downsample(dates: np.ndarray, values: np.ndarray, keep: np.ndarray) -> Optional[np.ndarray]:
+    """Rows to return when ``max_points`` is requested and the range is larger."""
+    max_points = request.args.get("max_points", type=int)
+    if max_points is None or values.shape[0] <= max_points:
+        return None
+    method = request.args.get("downsample", "lttb")
+    return downsample_indices(dates.view("int64"), values, max_points, method=method, keep=keep)
+
+
+def _change_point_rows(dates: np.ndarray) -> np.ndarray:
+    return change_point_positions(dates, cached_change_point_results(current_app.config.get("CACHE")))
+
+
+def _ohlc_response(series: PriceSeries, start_date: Optional[datetime], end_date: Optional[datetime]) -> Any:
+    """Bars of the requested ``resolution``; ``Price`` repeats ``Close`` for line charts."""
+    pyramid: OHLCPyramid = current_app.config["OHLC"].get(series)
+    target = request.args.get("max_points", DEFAULT_TARGET_BARS, type=int)
+    resolution = pyramid.resolve(request.args.get("resolution", ""), start_date, end_date, target)
+    level = pyramid.levels[resolution]
+    lo, hi = level.bounds(start_date, end_date)
+    bars = level.slice(lo, hi)
+    source_lo, source_hi = series.bounds(start_date, end_date)
+    return columns_response(
+        {
+            "Date": bars.start,
+            "Price": bars.close,
+            "Open": bars.open,
+            "High": bars.high,
+            "Low": bars.low,
+            "Close": bars.close,
+            "Mean": bars.mean,
+            "Count": bars.count,
+            "log_return": bars.log_return,
+            "realized_vol": bars.realized_vol,
+        },
+        {
+            "count": hi - lo,
+            "source_count": source_hi - source_lo,
+            "resolution": resolution,
+            "filters": {
+                "start_date": request.args.get("start_date"),
+                "end_date": request.args.get("end_date"),
+                "resolution": request.args.get("resolution"),
+                "max_points": request.args.get("max_points", type=int),
+            },
+        },
+    )
+
+
 @prices_bp.route("/", methods=["GET"])
+@conditional(_price_version, _results_version)
 def get_prices() -> Any:
     try:
-        df = _load_prices()
+        series = _price_series()
         start_date = _parse_date(request.args.get("start_date"))
         end_date = _parse_date(request.args.get("end_date"))
-
-        if start_date is not None:
-            df = df[df["Date"] >= start_date]
-        if end_date is not None:
-            df = df[df["Date"] <= end_date]
-
-        df = df.sort_values("Date")
-        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-
-        records = df.to_dict(orient="records")
-        normalized: list[Dict[str, Any]] = []
-        for record in records:
-            item: Dict[str, Any] = {}
-            for key, value in record.items():
-                if pd.isna(value):
-                    item[key] = None
-                elif isinstance(value, (np.integer, np.floating)):
-                    item[key] = float(value)
-                else:
-                    item[key] = value
-            normalized.append(item)
-
-        return jsonify(
+        if request.args.get("resolution"):
+            return _ohlc_response(series, start_date, end_date)
+
+        lo, hi = series.bounds(start_date, end_date)
+        dates = series.dates[lo:hi]
+        columns = {"Date": dates, **{name: values[lo:hi] for name, values in series.columns.items()}}
+        rows = _downsample(dates, series.prices[lo:hi], _change_point_rows(dates))
+        if rows is not None:
+            columns = {name: values[rows] for name, values in columns.items()}
+
+        return columns_response(
+            columns,
             {
-                "data": normalized,
-                "count": len(normalized),
+                "count": int(columns["Date"].shape[0]),
+                "source_count": hi - lo,
                 "filters": {
                     "start_date": request.args.get("start_date"),
                     "end_date": request.args.get("end_date"),
+                    "max_points": request.args.get("max_points", type=int),
                 },
-            }
+            },
         )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except FileNotFoundError:
         return jsonify({"error": "Data file not found"}), 404
     except Exception as exc:  # pragma: no cover
@@ -90,22 +145,38 @@ def get_prices() -> Any:
 
 
 @prices_bp.route("/statistics", methods=["GET"])
+@conditional(_price_version)
 def get_statistics() -> Any:
     try:
-        df = _load_prices()
+        series = _price_series()
+        start_date = _parse_date(request.args.get("start_date"))
+        end_date = _parse_date(request.args.get("end_date"))
+        lo, hi = series.bounds(start_date, end_date)
+        summary = _range_stats().summary(lo, hi)
+        if summary.count == 0:
+            return jsonify({"error": "No price data in requested range"}), 404
+
         stats: Dict[str, Any] = {
-            "min_price": float(df["Price"].min()),
-            "max_price": float(df["Price"].max()),
-            "mean_price": float(df["Price"].mean()),
-            "std_price": float(df["Price"].std()),
-            "median_price": float(df["Price"].median()),
-            "count": int(df["Price"].count()),
+            "min_price": _finite(summary.min),
+            "max_price": _finite(summary.max),
+            "mean_price": _finite(summary.mean),
+            # A single-row range has no sample std.
+            "std_price": _finite(summary.std),
+            "median_price": _finite(summary.median),
+            "quantiles": {str(q): _finite(value) for q, value in summary.quantiles.items()},
+            "count": summary.count,
             "date_range": {
-                "start": df["Date"].min().strftime("%Y-%m-%d"),
-                "end": df["Date"].max().strftime("%Y-%m-%d"),
+                "start": pd.Timestamp(series.dates[lo]).strftime("%Y-%m-%d"),
+                "end": pd.Timestamp(series.dates[hi - 1]).strftime("%Y-%m-%d"),
+            },
+            "filters": {
+                "start_date": request.args.get("start_date"),
+                "end_date": request.args.get("end_date"),
             },
         }
         return jsonify(stats)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except FileNotFoundError:
         return jsonify({"error": "Data file not found"}), 404
     except Exception as exc:  # pragma: no cover
@@ -113,29 +184,29 @@ def get_statistics() -> Any:
 
 
 @prices_bp.route("/volatility", methods=["GET"])
+@conditional(_price_version, _results_version)
 def get_volatility() -> Any:
     try:
         window = int(request.args.get("window", DEFAULT_VOLATILITY_WINDOW))
-        df = _load_prices().sort_values("Date")
-        if "log_return" not in df.columns:
-            df["log_return"] = np.log(df["Price"]).diff()
-        df["Volatility"] = df["log_return"].rolling(window=window).std()
-        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-
-        records = (
-            df[["Date", "Price", "Volatility"]]
-            .dropna(subset=["Volatility"])
-            .to_dict(orient="records")
-        )
-        return jsonify(
+        series = _price_series()
+        volatility = current_app.config["VOLATILITY"].get(series, window)
+        keep = np.flatnonzero(~np.isnan(volatility))
+        avg_volatility = float(volatility[keep].mean()) if keep.size else 0.0
+        dates = series.dates[keep]
+        rows = _downsample(dates, volatility[keep], _change_point_rows(dates))
+        if rows is not None:
+            keep = keep[rows]
+
+        return columns_response(
+            {"Date": series.dates[keep], "Price": series.prices[keep], "Volatility": volatility[keep]},
             {
-                "data": records,
                 "window": window,
-                "avg_volatility": float(pd.DataFrame(records)["Volatility"].mean())
-                if records
-                else 0.0,
-            }
+                "avg_volatility": avg_volatility,
+                "source_count": int(np.count_nonzero(~np.isnan(volatility))),
+            },
         )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except FileNotFoundError:
         return jsonify({"error": "Data file not found"}), 404
     except Exception as exc:  # pragma: no cover
@@ -143,14 +214,15 @@ def get_volatility() -> Any:
 
 
 @prices_bp.route("/macro-overlay", methods=["GET"])
+@conditional(_price_version)
 def get_macro_overlay() -> Any:
     """Return oil prices merged with GDP, inflation, and FX series."""
     try:
         df = _load_prices()
-        merged = load_macro_data(df)
-        merged["Date"] = merged["Date"].dt.strftime("%Y-%m-%d")
+        with span("load_macro_data"):
+            merged = load_macro_data(df)
         out_cols = ["Date", "Price", "GDP", "Inflation", "ExchangeRate"]
-        return jsonify({"data": merged[out_cols].to_dict(orient="records"), "count": len(merged)})
+        return columns_response(frame_columns(merged[out_cols]), {"count": len(merged)})
     except FileNotFoundError:
         return jsonify({"error": "Data file not found"}), 404
     except Exception as exc:  # pragma: no cover
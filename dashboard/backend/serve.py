@@ -0,0 +1,82 @@
+"""Production entry point: publish the shared dataset once, then serve it from a pre-fork worker pool.
+
+The parent process loads the processed prices, writes them and their rolling
+volatility as memory-mappable arrays (``services.shared_dataset``) and
+republishes a new generation whenever the source file changes. Workers run
+``create_app(shared_dataset=True)``, map the same files read-only and
+reattach when the generation counter moves, so adding workers adds no copy of
+the data.
+
+    python serve.py --workers 8 --bind 0.0.0.0:5000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app import create_app
+from services.shared_dataset import publish_source
+from utils.config import PRICES_PATH, SHARED_DATASET_DIR
+from utils.file_watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+
+def publish() -> int:
+    # A worker that appended prices already published the file's new contents.
+    generation = publish_source(SHARED_DATASET_DIR, PRICES_PATH)
+    logger.info("Serving dataset generation %d", generation)
+    return generation
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", default="0.0.0.0:5000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4, help="Threads per worker.")
+    parser.add_argument(
+        "--profile-slow-ms", type=float, help="Sample request stacks and keep those of requests at least this slow."
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from gunicorn.app.base import BaseApplication
+
+    publish()
+    watcher = FileWatcher()
+    watcher.watch(PRICES_PATH, lambda old, new: publish())
+
+    class Server(BaseApplication):
+        def __init__(self, options: Dict[str, Any]) -> None:
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            # Runs in each worker after the fork, so every worker owns its own cache and watcher.
+            return create_app(shared_dataset=True, profile_slow_ms=args.profile_slow_ms)
+
+    Server(
+        {
+            "bind": args.bind,
+            "workers": args.workers,
+            "threads": args.threads,
+            "preload_app": False,
+            "when_ready": lambda server: watcher.start(),
+        }
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from services.pipeline import SKIPPED
+from services.price_store import PriceSeries
+from services.shared_dataset import CURRENT_FILE, MANIFEST_FILE, read_current
+from utils.fingerprint import content_hash, file_version
+
+NO_BUNDLE = "none"
+
+
+@dataclass(frozen=True)
+class Bundle:
+    """One published artifact bundle: its directory and manifest."""
+
+    directory: Path
+    manifest: Mapping[str, Any]
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    def stage(self, name: str) -> Optional[Mapping[str, Any]]:
+        record = self.manifest["stages"].get(name)
+        return None if record is None or record["status"] == SKIPPED else record
+
+
+class ArtifactStore:
+    """Read-only lookups into the bundle ``build.py`` last published under ``root``.
+
+    An artifact is handed out only while it is fresh: every source file its
+    stage was built from, directly or through upstream stages, still has the
+    content hash recorded in the manifest. Otherwise the lookup returns
+    ``None`` and callers compute the value as they would without a bundle.
+    Source files are re-hashed only when their mtime or size changes.
+    """
+
+    def __init__(self, root: Path | str, cache: Any = None) -> None:
+        self.root = Path(root)
+        self.path = self.root / CURRENT_FILE
+        self.cache = cache
+        self._bundle: Optional[Bundle] = None
+        self._loaded = False
+        self._hashes: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _open(self) -> Optional[Bundle]:
+        current = read_current(self.root)
+        if current is None:
+            return None
+        directory = self.root / current["directory"]
+        try:
+            manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        except FileNotFoundError:
+            return None
+        return Bundle(directory=directory, manifest=MappingProxyType(manifest))
+
+    def get(self) -> Optional[Bundle]:
+        with self._lock:
+            if not self._loaded:
+                self._bundle, self._loaded = self._open(), True
+            return self._bundle
+
+    def clear(self) -> Optional[Bundle]:
+        """Forget the opened bundle so the next lookup rereads ``CURRENT``; return it."""
+        with self._lock:
+            bundle, self._bundle, self._loaded = self._bundle, None, False
+            return bundle
+
+    def _source_hash(self, path: str) -> str:
+        version = file_version(path)
+        if version == "missing":
+            return version
+        known = self._hashes.get(path)
+        if known is None or known[0] != version:
+            known = self._hashes[path] = (version, content_hash(path))
+        return known[1]
+
+    def _fresh(
+        self, stage: str, sources: Iterable[Path | str], meta: Mapping[str, Any]
+    ) -> Optional[Tuple[Bundle, Mapping[str, Any]]]:
+        bundle = self.get()
+        record = bundle.stage(stage) if bundle is not None else None
+        if record is None:
+            return None
+        recorded = record["sources"]
+        if any(str(Path(path).resolve()) not in recorded for path in sources):
+            return None
+        if any(record["meta"].get(key) != value for key, value in meta.items()):
+            return None
+        if any(self._source_hash(path) != digest for path, digest in recorded.items()):
+            return None
+        return bundle, record
+
+    def tag(self, stage: str, sources: Iterable[Path | str] = (), **meta: Any) -> str:
+        """Version of what :meth:`lookup` returns for ``stage``, for ``conditional``."""
+        found = self._fresh(stage, sources, meta)
+        return NO_BUNDLE if found is None else found[0].version
+
+    def lookup(self, stage: str, output: str, sources: Iterable[Path | str] = (), **meta: Any) -> Optional[Path]:
+        """Path of a fresh artifact, or ``None``.
+
+        ``sources`` are files the caller would otherwise read; the stage must
+        have been built from them. ``meta`` values must match what the stage
+        recorded, e.g. ``prices_version`` for the price series in use.
+        """
+        found = self._fresh(stage, sources, meta)
+        if found is None or output not in found[1]["outputs"]:
+            return None
+        bundle, record = found
+        return bundle.directory / record["outputs"][output]
+
+    def params(self, stage: str) -> Mapping[str, Any]:
+        bundle = self.get()
+        record = bundle.stage(stage) if bundle is not None else None
+        return {} if record is None else record["params"]
+
+    def load_json(self, stage: str, output: str, sources: Iterable[Path | str] = (), **meta: Any) -> Optional[Any]:
+        """A fresh JSON artifact, parsed once per bundle."""
+        path = self.lookup(stage, output, sources, **meta)
+        if path is None:
+            return None
+        if self.cache is None:
+            return json.loads(path.read_text())
+        version = self.get().version
+        return self.cache.get_or_load(f"artifact:{path}", lambda: json.loads(path.read_text()), tags=(version,))
+
+    def load_array(
+        self, stage: str, output: str, sources: Iterable[Path | str] = (), **meta: Any
+    ) -> Optional[np.ndarray]:
+        """A fresh ``.npy`` artifact, memory-mapped read-only."""
+        path = self.lookup(stage, output, sources, **meta)
+        return None if path is None else np.load(path, mmap_mode="r")
+
+
+def bundled_volatility(artifacts: ArtifactStore, series: PriceSeries) -> Mapping[int, np.ndarray]:
+    """Rolling volatility rows from the bundle, if they were built from ``series``."""
+    values = artifacts.load_array("volatility", "volatility.npy", prices_version=series.version)
+    if values is None:
+        return {}
+    return {int(window): values[row] for row, window in enumerate(artifacts.params("volatility")["windows"])}
@@ -1,11 +1,45 @@
+from __future__ import annotations
+
 import json
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from src.constants import CHANGE_POINT_RESULTS_PATH
+from utils.fingerprint import file_version
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+CHANGE_POINT_FILE = BASE_DIR / CHANGE_POINT_RESULTS_PATH
+
+
+def load_change_point_results(path: Path = CHANGE_POINT_FILE) -> Dict[str, Any]:
+    """Load saved change-point results, or a small canned example when absent."""
+    if path.exists():
+        with path.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    return {
+        "n_change_points": 1,
+        "change_points": [{"name": "cp_1", "tau_date": "2012-06-04", "tau_index": 1500}],
+        "regimes": [],
+        "business_impact": [],
+    }
+
+
+def cached_change_point_results(cache: Any, path: Path = CHANGE_POINT_FILE) -> Dict[str, Any]:
+    """:func:`load_change_point_results` memoised under the file's version."""
+    if cache is None:
+        return load_change_point_results(path)
+    version = file_version(path)
+    return cache.get_or_load(
+        f"change_points:{path}:{version}", lambda: load_change_point_results(path), tags=(version,)
+    )
 
-# Example: saved from Task 2 output
-CHANGE_POINT_FILE = "../data/results/change_points.json"
 
-def get_change_points():
-    try:
-        with open(CHANGE_POINT_FILE) as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"message": "Change point results not found"}
+def change_point_positions(dates: np.ndarray, results: Dict[str, Any]) -> np.ndarray:
+    """Map each change point's ``tau_date`` to its row in a sorted date array."""
+    tau_dates = pd.to_datetime(
+        [cp.get("tau_date") for cp in results.get("change_points", [])], errors="coerce"
+    ).dropna()
+    return np.searchsorted(dates, tau_dates.to_numpy(dtype="datetime64[ns]"), "left")
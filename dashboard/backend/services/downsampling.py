@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _bucket_matrix(starts: np.ndarray, stops: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Index matrix of contiguous buckets padded to the widest one, plus its mask."""
+    width = int((stops - starts).max())
+    index = starts[:, None] + np.arange(width)[None, :]
+    mask = index < stops[:, None]
+    return np.where(mask, index, 0), mask
+
+
+def _bucket_edges(n: int, n_buckets: int, first: int = 0) -> np.ndarray:
+    return np.linspace(first, n, n_buckets + 1).astype(np.int64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection, vectorized across buckets.
+
+    The first and last points are kept and the interior is split into
+    ``n_out - 2`` buckets. Each bucket keeps the point forming the largest
+    triangle with the previous and next bucket centroids; using the previous
+    centroid rather than the previously selected point lets every bucket be
+    scored at once instead of sequentially.
+    """
+    n = y.shape[0]
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    edges = _bucket_edges(n - 1, n_out - 2, first=1)
+    starts, stops = edges[:-1], edges[1:]
+    counts = (stops - starts).astype(np.float64)
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    mean_x = (cum_x[stops] - cum_x[starts]) / counts
+    mean_y = (cum_y[stops] - cum_y[starts]) / counts
+
+    prev_x = np.concatenate(([x[0]], mean_x[:-1]))
+    prev_y = np.concatenate(([y[0]], mean_y[:-1]))
+    next_x = np.concatenate((mean_x[1:], [x[-1]]))
+    next_y = np.concatenate((mean_y[1:], [y[-1]]))
+
+    index, mask = _bucket_matrix(starts, stops)
+    area = np.abs(
+        (prev_x[:, None] - next_x[:, None]) * (y[index] - prev_y[:, None])
+        - (prev_x[:, None] - x[index]) * (next_y[:, None] - prev_y[:, None])
+    )
+    area = np.where(mask, area, -np.inf)
+    chosen = index[np.arange(index.shape[0]), np.argmax(area, axis=1)]
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the minimum and maximum of each of ``n_out // 2`` equal buckets."""
+    n = y.shape[0]
+    n_buckets = max(1, n_out // 2)
+    if n_out >= n:
+        return np.arange(n)
+
+    edges = _bucket_edges(n, n_buckets)
+    index, mask = _bucket_matrix(edges[:-1], edges[1:])
+    values = y[index]
+    rows = np.arange(index.shape[0])
+    lows = index[rows, np.argmin(np.where(mask, values, np.inf), axis=1)]
+    highs = index[rows, np.argmax(np.where(mask, values, -np.inf), axis=1)]
+    return np.unique(np.concatenate((lows, highs)))
+
+
+def downsample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    method: str = "lttb",
+    keep: Optional[Iterable[int]] = None,
+) -> np.ndarray:
+    """Return sorted row indices that represent ``(x, y)`` in about ``max_points`` rows.
+
+    Rows with non-finite ``y`` are never selected. The global extremes, the
+    endpoints and every index in ``keep`` (e.g. change points) are always
+    included, so the result can exceed ``max_points`` by those few rows.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of {METHODS}.")
+    if max_points < 1:
+        raise ValueError("max_points must be a positive integer")
+
+    finite = np.flatnonzero(np.isfinite(y))
+    if finite.shape[0] == 0:
+        return finite
+    xs = np.asarray(x, dtype=np.float64)[finite]
+    ys = np.asarray(y, dtype=np.float64)[finite]
+
+    if method == "lttb":
+        local = lttb_indices(xs, ys, max_points)
+    else:
+        local = minmax_indices(ys, max_points)
+    anchors = np.array([0, finite.shape[0] - 1, np.argmin(ys), np.argmax(ys)])
+    selected = finite[np.concatenate((local, anchors))]
+
+    if keep is not None:
+        extra = np.asarray(list(keep), dtype=np.int64)
+        extra = extra[(extra >= 0) & (extra < y.shape[0])]
+        selected = np.concatenate((selected, extra))
+    return np.unique(selected)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.event_service import EventCatalogue
+from services.range_stats import RangeStatistics
+
+DEFAULT_IMPACT_WINDOW = 30
+
+
+@dataclass(frozen=True)
+class WindowImpact:
+    """Before/after price means for a batch of events, aligned with the input dates.
+
+    ``*_volatility`` is the sample std of the daily log returns between
+    prices inside each window.
+    """
+
+    before_mean: np.ndarray
+    after_mean: np.ndarray
+    before_count: np.ndarray
+    after_count: np.ndarray
+    before_volatility: np.ndarray
+    after_volatility: np.ndarray
+
+    @property
+    def pct_change(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = (self.after_mean - self.before_mean) / self.before_mean * 100.0
+        return np.where(np.isfinite(pct), pct, np.nan)
+
+
+class EventImpactEngine:
+    """Batched event-window statistics over a sorted price series.
+
+    Window bounds come from ``searchsorted`` on the date array and window means
+    from the prefix sums in :class:`RangeStatistics`, so ``E`` events cost
+    ``O(E log N)``. Missing prices are excluded from both sums and counts.
+    """
+
+    def __init__(self, stats: RangeStatistics) -> None:
+        self.version = stats.version
+        self._dates = stats.dates
+        self._stats = stats
+
+    def _range_means(self, lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        mean, _ = self._stats.mean_std(lo, hi)
+        return mean, self._stats.count(lo, hi)
+
+    def _range_volatility(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # The return on the window's first row reaches back to the price before it.
+        _, std = self._stats.return_mean_std(np.minimum(lo + 1, hi), hi)
+        return std
+
+    def impacts(self, event_dates: np.ndarray, window_days: int | np.ndarray) -> WindowImpact:
+        """Compare ``[event - window, event)`` with ``(event, event + window]``.
+
+        ``event_dates`` and ``window_days`` broadcast against each other, so a
+        column of dates and a row of windows yields an events x windows grid.
+        NaT event dates produce NaN means and zero counts.
+        """
+        events = np.asarray(event_dates, dtype="datetime64[ns]")
+        window = np.asarray(window_days, dtype="int64").astype("timedelta64[D]")
+        events, window = np.broadcast_arrays(events, window)
+        missing = np.isnat(events)
+
+        before_lo = np.searchsorted(self._dates, events - window, "left")
+        before_hi = np.searchsorted(self._dates, events, "left")
+        after_lo = np.searchsorted(self._dates, events, "right")
+        after_hi = np.searchsorted(self._dates, events + window, "right")
+        for bounds in (before_lo, before_hi, after_lo, after_hi):
+            bounds[missing] = 0
+
+        before_mean, before_count = self._range_means(before_lo, before_hi)
+        after_mean, after_count = self._range_means(after_lo, after_hi)
+        return WindowImpact(
+            before_mean=before_mean,
+            after_mean=after_mean,
+            before_count=before_count,
+            after_count=after_count,
+            before_volatility=self._range_volatility(before_lo, before_hi),
+            after_volatility=self._range_volatility(after_lo, after_hi),
+        )
+
+
+def round_price(value: float) -> Optional[float]:
+    """Round to cents; missing or zero values are reported as ``None``."""
+    if not value or np.isnan(value):
+        return None
+    return round(float(value), 2)
+
+
+def ranked_impacts(
+    catalogue: EventCatalogue, engine: EventImpactEngine, window_days: int = DEFAULT_IMPACT_WINDOW
+) -> Dict[str, Any]:
+    """Price change around every dated event over ``window_days``, largest change first."""
+    # Dated events in file order, so ties keep the order the file lists them in.
+    positions = np.argsort(catalogue.source_rows[: catalogue.n_dated], kind="stable")
+    pct = engine.impacts(catalogue.dates[positions], window_days).pct_change
+
+    impacts: List[Dict[str, Any]] = [
+        {
+            "date": catalogue.raw_dates[i],
+            "title": catalogue.titles[i],
+            "category": catalogue.categories[i],
+            "price_change_percent": round_price(change),
+        }
+        for i, change in zip(positions, pct)
+    ]
+    impacts.sort(key=lambda item: abs(item["price_change_percent"] or 0.0), reverse=True)
+    return {"impacts": impacts, "count": len(impacts)}
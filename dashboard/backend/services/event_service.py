@@ -1,8 +1,251 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
-EVENTS_PATH = "../../../data/processed/events2.csv"
+from src.data.ingest import parse_dates
+from utils.config import PROCESSED_DIR
+from utils.fingerprint import file_version
+
+EVENTS_PATH = PROCESSED_DIR / "events2.csv"
+DATE_COLUMNS = ("start_date", "date", "event_date")
+END_DATE_COLUMN = "end_date"
+TITLE_COLUMNS = ("event_name", "title", "event")
+
+
+def event_date_column(columns: Any) -> Optional[str]:
+    """The column holding each event's (start) date, or ``None``."""
+    for column in DATE_COLUMNS:
+        if column in columns:
+            return column
+    return None
+
+
+def _text(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    return df[column].fillna("").astype(str).to_numpy(dtype=object)
+
+
+def _titles(df: pd.DataFrame) -> np.ndarray:
+    titles = np.full(len(df), "", dtype=object)
+    for column in reversed(TITLE_COLUMNS):
+        values = _text(df, column)
+        titles = np.where(values != "", values, titles)
+    return titles
+
+
+def _bound(value: Optional[datetime]) -> Optional[np.datetime64]:
+    return None if value is None else np.datetime64(value, "ns")
+
+
+@dataclass(frozen=True)
+class _IntervalNode:
+    """Intervals containing ``center``, sorted by start and by end, plus the subtrees either side."""
+
+    center: np.int64
+    by_start: np.ndarray
+    starts: np.ndarray
+    by_end: np.ndarray
+    ends: np.ndarray
+    left: Optional["_IntervalNode"]
+    right: Optional["_IntervalNode"]
+
+
+def _interval_tree(ids: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Optional[_IntervalNode]:
+    """Centered interval tree; the center is the median endpoint, so the depth is ``O(log n)``."""
+    if ids.shape[0] == 0:
+        return None
+    endpoints = np.concatenate((starts, ends))
+    middle = endpoints.shape[0] // 2
+    center = np.partition(endpoints, middle)[middle]
+    left = ends < center
+    right = starts > center
+    here = ~(left | right)
+    by_start = np.argsort(starts[here], kind="stable")
+    by_end = np.argsort(ends[here], kind="stable")
+    return _IntervalNode(
+        center=center,
+        by_start=ids[here][by_start],
+        starts=starts[here][by_start],
+        by_end=ids[here][by_end],
+        ends=ends[here][by_end],
+        left=_interval_tree(ids[left], starts[left], ends[left]),
+        right=_interval_tree(ids[right], starts[right], ends[right]),
+    )
+
+
+class EventCatalogue:
+    """Events of one file version, indexed for date-range, category and interval queries.
+
+    Rows are held in date order (undated rows last) as parallel arrays, so
+    a date range is two ``searchsorted`` calls on the sorted date index.
+    Each category keeps a posting list of row positions in the same order,
+    and events with a ``start_date``/``end_date`` span go into a centered
+    interval tree. Range, category and overlap queries cost
+    ``O(log n + k)`` for ``k`` matches, and every row's response JSON is
+    encoded once when the catalogue is built.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: str = "") -> None:
+        self.version = version
+        self.date_column = event_date_column(df.columns)
+        n = len(df)
+        if self.date_column is not None:
+            dates = parse_dates(df[self.date_column]).to_numpy(dtype="datetime64[ns]")
+            raw_dates = df[self.date_column].astype(str).to_numpy(dtype=object)
+        else:
+            dates = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+            raw_dates = np.full(n, None, dtype=object)
+        ends = dates
+        if self.date_column is not None and END_DATE_COLUMN in df.columns:
+            parsed_ends = parse_dates(df[END_DATE_COLUMN]).to_numpy(dtype="datetime64[ns]")
+            ends = np.where(np.isnat(parsed_ends), dates, np.maximum(parsed_ends, dates))
+
+        order = np.argsort(dates, kind="stable")  # NaT sorts last
+        self.source_rows = order
+        self.dates = dates[order]
+        self.end_dates = ends[order]
+        self.n_dated = int(np.count_nonzero(~np.isnat(self.dates)))
+        self.raw_dates = raw_dates[order]
+        self.titles = _titles(df)[order]
+        self.descriptions = _text(df, "description")[order]
+        self.categories = _text(df, "category")[order]
+        self.has_categories = "category" in df.columns
+        for values in (self.source_rows, self.dates, self.end_dates):
+            values.setflags(write=False)
+
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if n:
+            by_category = np.argsort(self.categories, kind="stable")
+            names, firsts = np.unique(self.categories[by_category], return_index=True)
+            for name, positions in zip(names, np.split(by_category, firsts[1:])):
+                dated = positions[positions < self.n_dated]
+                postings[str(name)] = (positions, self.dates[dated])
+        self.postings: Mapping[str, Tuple[np.ndarray, np.ndarray]] = MappingProxyType(postings)
+
+        dated = np.arange(self.n_dated)
+        self._tree = _interval_tree(
+            dated, self.dates[: self.n_dated].view(np.int64), self.end_dates[: self.n_dated].view(np.int64)
+        )
+        self.json_rows: List[str] = [
+            json.dumps(
+                {"category": category, "date": date, "description": description, "title": title},
+                separators=(",", ":"),
+            )
+            for category, date, description, title in zip(
+                self.categories, self.raw_dates, self.descriptions, self.titles
+            )
+        ]
+
+    @classmethod
+    def from_csv(cls, path: Path | str, version: Optional[str] = None) -> "EventCatalogue":
+        return cls(pd.read_csv(path), file_version(path) if version is None else version)
+
+    def __len__(self) -> int:
+        return int(self.dates.shape[0])
+
+    def _date_slice(self, dates: np.ndarray, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+        lo = 0 if start is None else int(np.searchsorted(dates, _bound(start), "left"))
+        hi = dates.shape[0] if end is None else int(np.searchsorted(dates, _bound(end), "right"))
+        return lo, max(lo, hi)
+
+    def select(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None, category: Optional[str] = None
+    ) -> np.ndarray:
+        """Positions of events dated ``start <= date <= end`` in ``category``, in date order.
+
+        Without a date bound undated events are included; without a date
+        column the bounds are ignored, as is ``category`` without a category
+        column.
+        """
+        if self.date_column is None:
+            start = end = None
+        if not self.has_categories:
+            category = None
+        if category is not None:
+            positions, dates = self.postings.get(category, (np.empty(0, dtype=np.int64), self.dates[:0]))
+            if start is None and end is None:
+                return positions
+            lo, hi = self._date_slice(dates, start, end)
+            return positions[lo:hi]
+        if start is None and end is None:
+            return np.arange(len(self))
+        lo, hi = self._date_slice(self.dates[: self.n_dated], start, end)
+        return np.arange(lo, hi)
+
+    def overlapping(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None, category: Optional[str] = None
+    ) -> np.ndarray:
+        """Positions of dated events whose ``[start_date, end_date]`` span overlaps ``[start, end]``.
+
+        Events without an end date are treated as lasting one instant;
+        ``category`` is ignored without a category column.
+        """
+        low = np.iinfo(np.int64).min + 1 if start is None else _bound(start).astype(np.int64)
+        high = np.iinfo(np.int64).max if end is None else _bound(end).astype(np.int64)
+        found: List[np.ndarray] = []
+        stack = [self._tree]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if high < node.center:
+                found.append(node.by_start[: np.searchsorted(node.starts, high, "right")])
+                stack.append(node.left)
+            elif low > node.center:
+                found.append(node.by_end[np.searchsorted(node.ends, low, "left") :])
+                stack.append(node.right)
+            else:
+                found.append(node.by_start)
+                stack.extend((node.left, node.right))
+        positions = np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        if category is not None and self.has_categories:
+            positions = positions[self.categories[positions] == category]
+        return positions
+
+    def find(self, date: datetime) -> Optional[int]:
+        """Position of the first event dated ``date``, or ``None``."""
+        target = _bound(date)
+        position = int(np.searchsorted(self.dates[: self.n_dated], target, "left"))
+        if position < self.n_dated and self.dates[position] == target:
+            return position
+        return None
+
+    def records(self, positions: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Event rows as dicts with a parsed ``date`` (``None`` when undated)."""
+        positions = np.arange(len(self)) if positions is None else positions
+        return [
+            {
+                "date": None if np.isnat(self.dates[i]) else pd.Timestamp(self.dates[i]),
+                "end_date": None if np.isnat(self.end_dates[i]) else pd.Timestamp(self.end_dates[i]),
+                "title": self.titles[i],
+                "description": self.descriptions[i],
+                "category": self.categories[i],
+            }
+            for i in positions
+        ]
+
+
+def cached_event_catalogue(cache: Any, path: Path | str = EVENTS_PATH) -> EventCatalogue:
+    """:class:`EventCatalogue` of ``path``, built once per file version."""
+    version = file_version(path)
+    if version == "missing":
+        raise FileNotFoundError(path)
+    if cache is None:
+        return EventCatalogue.from_csv(path, version)
+    return cache.get_or_load(
+        f"event_catalogue:{path}:{version}", lambda: EventCatalogue.from_csv(path, version), tags=(version,)
+    )
+
 
-def get_events():
-    df = pd.read_csv(EVENTS_PATH)
-    df["Date"] = pd.to_datetime(df["Date"])
-    return df.to_dict(orient="records")
+def get_events(path: Path | str = EVENTS_PATH, cache: Any = None) -> List[Dict[str, Any]]:
+    """All events of ``path`` in date order."""
+    return cached_event_catalogue(cache, path).records()
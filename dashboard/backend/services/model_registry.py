@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from cache import InMemoryCache
+from services.posterior import DEFAULT_HDI_PROB, PosteriorService, PosteriorSummary, open_posterior
+from utils.config import MODEL_CACHE_BYTES, POSTERIOR_FILENAME
+from utils.fingerprint import file_version
+
+CONFIG_FILENAME = "model_config.json"
+_REGIME_VARIABLE = re.compile(r"^(mu|sigma)(?:_(\d+))?$")
+
+
+def config_hash(config: Mapping[str, Any]) -> str:
+    """Digest of a model configuration, independent of key order and formatting."""
+    hasher = hashlib.blake2b(digest_size=8)
+    hasher.update(json.dumps(config, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+@dataclass(frozen=True)
+class ModelEntry:
+    """One model version on disk: its directory, configuration and posterior file."""
+
+    version: str
+    directory: Path
+    config: Mapping[str, Any]
+    config_hash: Optional[str]
+    posterior_path: Path
+    posterior_version: str
+
+    @property
+    def tag(self) -> str:
+        """Changes whenever the configuration or the posterior file does."""
+        return f"{self.version}:{self.config_hash}:{self.posterior_version}"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "config_hash": self.config_hash,
+            "config": dict(self.config),
+            "has_posterior": self.posterior_version != "missing",
+        }
+
+
+def _summary_json(summary: PosteriorSummary) -> Dict[str, Any]:
+    return {
+        "mean": summary.mean,
+        "sd": summary.sd,
+        "hdi_lower": summary.hdi_lower,
+        "hdi_upper": summary.hdi_upper,
+        "hdi_prob": summary.hdi_prob,
+    }
+
+
+def _summarised(name: str) -> bool:
+    return name.startswith("tau") or _REGIME_VARIABLE.match(name) is not None
+
+
+def model_summary(draws: Mapping[str, np.ndarray], hdi_prob: float = DEFAULT_HDI_PROB) -> Dict[str, Any]:
+    """Tau HDIs and per-regime ``mu``/``sigma`` of a change-point posterior.
+
+    Change points are the ``tau*`` variables in order of their posterior
+    mean. Regime ``k`` takes ``mu_k``/``sigma_k``; an unnumbered ``mu`` or
+    ``sigma`` is shared by every regime.
+    """
+    summaries = {name: PosteriorSummary.from_draws(name, values, hdi_prob) for name, values in draws.items()}
+    taus = sorted((s for name, s in summaries.items() if name.startswith("tau")), key=lambda s: s.mean)
+
+    shared: Dict[str, PosteriorSummary] = {}
+    numbered: Dict[int, Dict[str, PosteriorSummary]] = {}
+    for name, summary in summaries.items():
+        match = _REGIME_VARIABLE.match(name)
+        if match is None:
+            continue
+        if match.group(2) is None:
+            shared[match.group(1)] = summary
+        else:
+            numbered.setdefault(int(match.group(2)), {})[match.group(1)] = summary
+    n_regimes = max([len(taus) + 1 if taus else 1] + list(numbered))
+
+    regimes = []
+    for regime in range(1, n_regimes + 1):
+        parameters = {**shared, **numbered.get(regime, {})}
+        regimes.append(
+            {"name": f"regime_{regime}", **{name: _summary_json(parameters[name]) for name in sorted(parameters)}}
+        )
+    return {
+        "n_change_points": len(taus),
+        "change_points": [
+            {"name": f"cp_{i}", "variable": s.name, **_summary_json(s)} for i, s in enumerate(taus, start=1)
+        ],
+        "regimes": regimes,
+    }
+
+
+def _layout(dataset: Any) -> Dict[str, Tuple[str, Optional[int]]]:
+    """Exposed variable names mapped to their NetCDF variable and index along its third dimension."""
+    layout: Dict[str, Tuple[str, Optional[int]]] = {}
+    for name, variable in dataset.data_vars.items():
+        if variable.dims[:2] != ("chain", "draw") or variable.ndim > 3:
+            continue
+        if variable.ndim == 2:
+            layout[str(name)] = (str(name), None)
+        else:
+            for index in range(variable.shape[2]):
+                layout[f"{name}_{index + 1}"] = (str(name), index)
+    return layout
+
+
+def posterior_variables(path: Path) -> Tuple[str, ...]:
+    """Names of the ``(chain, draw)`` variables in the posterior group, from the file's metadata alone."""
+    with open_posterior(path) as dataset:
+        return tuple(_layout(dataset))
+
+
+def read_draws(path: Path, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """``(chain, draw)`` arrays of ``names`` (every variable by default), reading only those from disk.
+
+    A variable with one more dimension is split into ``name_1``, ``name_2``...
+    """
+    with open_posterior(path) as dataset:
+        layout = _layout(dataset)
+        names = list(layout) if names is None else list(names)
+        unknown = [name for name in names if name not in layout]
+        if unknown:
+            raise ValueError(f"Unknown posterior variables {unknown}. Available: {list(layout)}")
+        draws: Dict[str, np.ndarray] = {}
+        for name in names:
+            variable, index = layout[name]
+            values = dataset[variable]
+            if index is not None:
+                values = values.isel({values.dims[2]: index})
+            draws[name] = np.ascontiguousarray(values.values)
+    return draws
+
+
+class ModelRegistry:
+    """Change-point model versions under ``models_dir``, loaded on first use.
+
+    Every subdirectory holding a ``posterior.nc`` or ``model_config.json`` is
+    a version, indexed by name and by the hash of its configuration so runs
+    with identical settings can be matched. Posterior draws are read one
+    variable at a time, the first time that variable is requested, and kept
+    in an LRU cache limited to ``max_bytes``, so switching between versions
+    for A/B comparisons does not reload traces and variables nobody asks for
+    are never read; concurrent first requests share one read. A version's
+    summary is kept in the app ``cache`` (in the LRU without one), where it
+    outlives eviction of the draws.
+    """
+
+    def __init__(
+        self,
+        models_dir: Path | str,
+        cache: Any = None,
+        default_version: Optional[str] = None,
+        max_bytes: int = MODEL_CACHE_BYTES,
+    ) -> None:
+        self.models_dir = Path(models_dir)
+        self.cache = cache
+        self.default_version = default_version
+        self.models = InMemoryCache(max_bytes=max_bytes)
+        self.posterior = PosteriorService(cache)
+        # Variable names per posterior file, read from its metadata once.
+        self._variables: Dict[str, Tuple[str, ...]] = {}
+        self._index: Tuple[Tuple[Any, ...], Mapping[str, ModelEntry]] = ((), MappingProxyType({}))
+        self._lock = threading.Lock()
+
+    def _signature(self) -> Tuple[Any, ...]:
+        if not self.models_dir.is_dir():
+            return ()
+        return tuple(
+            (path.name, file_version(path / CONFIG_FILENAME), file_version(path / POSTERIOR_FILENAME))
+            for path in sorted(self.models_dir.iterdir())
+            if path.is_dir()
+        )
+
+    def index(self) -> Mapping[str, ModelEntry]:
+        """Entries by version, rebuilt when a model directory, config or posterior file changes."""
+        signature = self._signature()
+        with self._lock:
+            if signature == self._index[0]:
+                return self._index[1]
+            entries: Dict[str, ModelEntry] = {}
+            for name, config_version, posterior_version in signature:
+                if config_version == "missing" and posterior_version == "missing":
+                    continue
+                directory = self.models_dir / name
+                config: Dict[str, Any] = {}
+                if config_version != "missing":
+                    config = json.loads((directory / CONFIG_FILENAME).read_text())
+                entries[name] = ModelEntry(
+                    version=name,
+                    directory=directory,
+                    config=MappingProxyType(config),
+                    config_hash=config_hash(config) if config_version != "missing" else None,
+                    posterior_path=directory / POSTERIOR_FILENAME,
+                    posterior_version=posterior_version,
+                )
+            self._index = (signature, MappingProxyType(entries))
+            return self._index[1]
+
+    def entry(self, version: Optional[str] = None) -> ModelEntry:
+        """The entry for ``version`` (the default version when ``None``); ``ValueError`` if unknown."""
+        version = version or self.default_version
+        entries = self.index()
+        if version not in entries:
+            raise ValueError(f"Unknown model version '{version}'. Available: {sorted(entries)}")
+        return entries[version]
+
+    def with_config_hash(self, digest: str) -> List[ModelEntry]:
+        return [entry for entry in self.index().values() if entry.config_hash == digest]
+
+    def variables(self, version: Optional[str] = None) -> Tuple[str, ...]:
+        """Names of ``version``'s posterior variables, without reading any draws."""
+        entry = self.entry(version)
+        names = self._variables.get(entry.tag)
+        if names is None:
+            names = self._variables[entry.tag] = posterior_variables(entry.posterior_path)
+        return names
+
+    def is_loaded(self, entry: ModelEntry) -> bool:
+        """Whether any of ``entry``'s draws are in memory."""
+        names = self._variables.get(entry.tag, ())
+        return any(self.models.peek(f"draws:{entry.tag}:{name}") is not None for name in names)
+
+    def draws(self, version: Optional[str], names: List[str]) -> Dict[str, np.ndarray]:
+        """``(chain, draw)`` arrays of ``names`` in ``version``, each read from disk only when not in memory."""
+        entry = self.entry(version)
+        available = self.variables(entry.version)
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown posterior variables {unknown}. Available: {list(available)}")
+        return {
+            name: self.models.get_or_load(
+                f"draws:{entry.tag}:{name}",
+                lambda name=name: read_draws(entry.posterior_path, [name])[name],
+                tags=(entry.tag,),
+            )
+            for name in names
+        }
+
+    def summary(self, version: Optional[str] = None) -> Mapping[str, Any]:
+        """Tau HDIs and regime ``mu``/``sigma`` of ``version``, computed once per posterior file.
+
+        Only the ``tau*``, ``mu*`` and ``sigma*`` draws are read.
+        """
+        entry = self.entry(version)
+
+        def build() -> Mapping[str, Any]:
+            names = [name for name in self.variables(entry.version) if _summarised(name)]
+            return model_summary(self.draws(entry.version, names))
+
+        cache = self.cache if self.cache is not None else self.models
+        return cache.get_or_load(f"model_summary:{entry.tag}", build, tags=(entry.tag,))
+
+    def summaries(
+        self,
+        version: Optional[str],
+        names: List[str],
+        chains: Optional[List[int]] = None,
+        thin: int = 1,
+        hdi_prob: float = DEFAULT_HDI_PROB,
+    ) -> List[PosteriorSummary]:
+        """Posterior summaries of ``names`` in ``version``, reading only those variables' draws."""
+        entry = self.entry(version)
+        draws = self.draws(entry.version, names)
+        return self.posterior.summaries(
+            entry.version, entry.tag, draws, names, chains=chains, thin=thin, hdi_prob=hdi_prob
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return self.models.stats()
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from services.price_store import PriceSeries
+
+RAW = "raw"
+AUTO = "auto"
+# Each level is aggregated from the finer level named next to it. Weeks do
+# not nest in months, so months are built from days.
+LEVELS = (("minute", RAW), ("hour", "minute"), ("day", "hour"), ("week", "day"), ("month", "day"))
+RESOLUTIONS = (RAW,) + tuple(name for name, _ in LEVELS)
+DEFAULT_TARGET_BARS = 300
+_DAY_NS = 86_400 * 10**9
+_UNIT_NS = {"minute": 60 * 10**9, "hour": 3_600 * 10**9, "day": _DAY_NS}
+# 1970-01-01 was a Thursday; shifting by three days starts weeks on Monday.
+_WEEK_SHIFT_DAYS = 3
+
+
+def _bucket_keys(name: str, starts: np.ndarray) -> np.ndarray:
+    if name == "month":
+        return starts.astype("datetime64[M]").astype(np.int64)
+    ns = starts.view(np.int64)
+    if name == "week":
+        return (ns // _DAY_NS + _WEEK_SHIFT_DAYS) // 7
+    return ns // _UNIT_NS[name]
+
+
+def _bucket_starts(name: str, keys: np.ndarray) -> np.ndarray:
+    if name == "month":
+        return keys.astype("datetime64[M]").astype("datetime64[ns]")
+    if name == "week":
+        return ((keys * 7 - _WEEK_SHIFT_DAYS) * _DAY_NS).view("datetime64[ns]")
+    return (keys * _UNIT_NS[name]).view("datetime64[ns]")
+
+
+def _readonly(values: np.ndarray) -> np.ndarray:
+    values.setflags(write=False)
+    return values
+
+
+@dataclass(frozen=True)
+class OHLCLevel:
+    """Bars of one resolution as parallel arrays, ordered by bucket start.
+
+    ``total``, ``count``, ``log_return`` and ``squares`` are sums over the
+    rows of each bar (prices, rows, log returns, squared log returns), so a
+    coarser bar is the sum of the finer bars it covers.
+    """
+
+    start: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    total: np.ndarray
+    count: np.ndarray
+    log_return: np.ndarray
+    squares: np.ndarray
+
+    @classmethod
+    def from_series(cls, series: PriceSeries) -> "OHLCLevel":
+        """One bar per row with a finite price, sharing the series' arrays where possible."""
+        prices, returns, dates = series.prices, series.log_returns, series.dates
+        valid = np.isfinite(prices)
+        if not valid.all():
+            prices, returns, dates = prices[valid], returns[valid], dates[valid]
+        finite = np.isfinite(returns)
+        clean = _readonly(np.where(finite, returns, 0.0)) if not finite.all() else returns
+        ones = np.broadcast_to(np.int64(1), prices.shape)
+        return cls(dates, prices, prices, prices, prices, prices, ones, clean, _readonly(clean * clean))
+
+    def __len__(self) -> int:
+        return int(self.start.shape[0])
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.total / np.maximum(self.count, 1)
+
+    @property
+    def realized_vol(self) -> np.ndarray:
+        """Square root of the summed squared log returns within each bar."""
+        return np.sqrt(self.squares)
+
+    def slice(self, lo: int, hi: Optional[int] = None) -> "OHLCLevel":
+        return OHLCLevel(*(getattr(self, item.name)[lo:hi] for item in fields(self)))
+
+    def bounds(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+        """``[lo, hi)`` of the bars overlapping ``start <= Date <= end``, including the bar holding ``start``."""
+        lo = 0
+        if start is not None:
+            lo = max(int(np.searchsorted(self.start, np.datetime64(start, "ns"), "right")) - 1, 0)
+        hi = len(self) if end is None else int(np.searchsorted(self.start, np.datetime64(end, "ns"), "right"))
+        return lo, max(lo, hi)
+
+    def aggregate(self, name: str) -> "OHLCLevel":
+        """Roll these bars up into ``name`` buckets; ``self`` when every bar already fills its own bucket."""
+        if len(self) == 0:
+            return self.slice(0, 0)
+        keys = _bucket_keys(name, self.start)
+        edges = np.flatnonzero(np.diff(keys)) + 1
+        if edges.shape[0] == len(self) - 1 and np.array_equal(_bucket_starts(name, keys), self.start):
+            # Finer than the data's spacing (e.g. minutes of daily prices): share the arrays.
+            return self
+        firsts = np.concatenate(([0], edges))
+        lasts = np.append(edges, len(self)) - 1
+        return OHLCLevel(
+            start=_readonly(_bucket_starts(name, keys[firsts])),
+            open=_readonly(self.open[firsts]),
+            high=_readonly(np.maximum.reduceat(self.high, firsts)),
+            low=_readonly(np.minimum.reduceat(self.low, firsts)),
+            close=_readonly(self.close[lasts]),
+            total=_readonly(np.add.reduceat(self.total, firsts)),
+            count=_readonly(np.add.reduceat(self.count, firsts)),
+            log_return=_readonly(np.add.reduceat(self.log_return, firsts)),
+            squares=_readonly(np.add.reduceat(self.squares, firsts)),
+        )
+
+
+class _LevelBuffer:
+    """A level's arrays with spare capacity at the end.
+
+    Levels are read-only views of the first ``n`` bars. Only ``head``, the
+    newest view handed out, may be extended in place: its last bar is
+    overwritten and new bars are written after it, so the view it replaces
+    sees the updated last bar. Any other view is extended by copying.
+    ``__slots__`` keeps the cache from walking into the buffers and marking
+    them read-only.
+    """
+
+    __slots__ = ("arrays", "head", "_lock")
+
+    def __init__(self, level: OHLCLevel, extra: int) -> None:
+        capacity = max(2 * (len(level) + extra), 16)
+        self.arrays: Dict[str, np.ndarray] = {}
+        for item in fields(level):
+            values = getattr(level, item.name)
+            buffer = np.empty(capacity, dtype=values.dtype)
+            buffer[: len(level)] = values
+            self.arrays[item.name] = buffer
+        self.head: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def write(self, at: int, tail: OHLCLevel) -> OHLCLevel:
+        """The first ``at`` bars followed by ``tail``, which must fit in the capacity."""
+        with self._lock:
+            return self._write(at, tail)
+
+    def _write(self, at: int, tail: OHLCLevel) -> OHLCLevel:
+        end = at + len(tail)
+        for name, buffer in self.arrays.items():
+            buffer[at:end] = getattr(tail, name)
+        level = OHLCLevel(**{name: _readonly(buffer[:end]) for name, buffer in self.arrays.items()})
+        self.head = level.start
+        return level
+
+    def replace_last(self, level: OHLCLevel, tail: OHLCLevel) -> Optional[OHLCLevel]:
+        """``level`` with its last bar replaced by ``tail``, or ``None`` if that cannot be done in place."""
+        with self._lock:
+            at = len(level) - 1
+            if level.start is not self.head or at + len(tail) > self.arrays["start"].shape[0]:
+                return None
+            return self._write(at, tail)
+
+
+@dataclass(frozen=True)
+class OHLCPyramid:
+    """OHLC bars of one price series at every resolution in ``RESOLUTIONS``."""
+
+    version: str
+    levels: Mapping[str, OHLCLevel]
+    buffers: Mapping[str, _LevelBuffer] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def build(cls, series: PriceSeries) -> "OHLCPyramid":
+        levels: Dict[str, OHLCLevel] = {RAW: OHLCLevel.from_series(series)}
+        for name, source in LEVELS:
+            levels[name] = levels[source].aggregate(name)
+        return cls(version=series.version, levels=MappingProxyType(levels))
+
+    def extend(self, series: PriceSeries) -> "OHLCPyramid":
+        """Pyramid of ``series``, which must be this pyramid's series with rows appended.
+
+        Only the last bar of each level and the bars after it are
+        re-aggregated. They overwrite the last bar in the level's buffer and
+        the new bars are written after it, so the cost follows the number of
+        appended rows; a level is copied only when its buffer is full or
+        this pyramid was already extended. Extending in place updates the
+        last bar of this pyramid's levels, so it should not be served
+        afterwards.
+        """
+        levels: Dict[str, OHLCLevel] = {RAW: OHLCLevel.from_series(series)}
+        buffers: Dict[str, _LevelBuffer] = {}
+        for name, source in LEVELS:
+            previous, finer = self.levels[name], levels[source]
+            if previous is self.levels[source] and len(previous):
+                # Still aliased if the new bars, and the old last bar, each fill a bucket of their own.
+                tail = finer.slice(len(previous) - 1)
+                levels[name] = finer if tail.aggregate(name) is tail else finer.aggregate(name)
+                continue
+            if len(previous) == 0:
+                levels[name] = finer.aggregate(name)
+                continue
+            # Starts with the bucket of the previous last bar, which it replaces.
+            cut = int(np.searchsorted(finer.start, previous.start[-1], "left"))
+            tail = finer.slice(cut).aggregate(name)
+            buffer = self.buffers.get(name)
+            level = buffer.replace_last(previous, tail) if buffer is not None else None
+            if level is None:
+                buffer = _LevelBuffer(previous.slice(0, len(previous) - 1), len(tail))
+                level = buffer.write(len(previous) - 1, tail)
+            levels[name], buffers[name] = level, buffer
+        return OHLCPyramid(version=series.version, levels=MappingProxyType(levels), buffers=MappingProxyType(buffers))
+
+    def resolve(
+        self,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        target: int = DEFAULT_TARGET_BARS,
+    ) -> str:
+        """Level name for ``resolution``; ``auto`` picks the coarsest level with ``target`` bars in range.
+
+        When no level has that many bars, the level with the most bars wins,
+        preferring the coarser of levels with equal counts (daily data gives
+        ``day`` rather than ``raw``).
+        """
+        if resolution in self.levels:
+            return resolution
+        if resolution != AUTO:
+            raise ValueError(f"resolution must be one of {(AUTO,) + RESOLUTIONS}")
+        best, best_count = RAW, -1
+        for name in reversed(RESOLUTIONS):
+            lo, hi = self.levels[name].bounds(start, end)
+            if hi - lo >= target:
+                return name
+            if hi - lo > best_count:
+                best, best_count = name, hi - lo
+        return best
+
+
+def _key(version: str) -> str:
+    return f"ohlc:{version}"
+
+
+class OHLCService:
+    """OHLC pyramids cached per series version.
+
+    A series produced by ``PriceSeries.append`` extends the cached pyramid of
+    the closest ancestor version instead of aggregating every row again. The
+    ancestor is then evicted, since extending it updates its last bars.
+    """
+
+    def __init__(self, cache: Any) -> None:
+        self.cache = cache
+
+    def _build(self, series: PriceSeries) -> OHLCPyramid:
+        if self.cache is not None:
+            for version, length in reversed(series.lineage):
+                ancestor = self.cache.get(_key(version))
+                if ancestor is not None:
+                    self.cache.delete(_key(version))
+                    return ancestor.extend(series)
+        return OHLCPyramid.build(series)
+
+    def get(self, series: PriceSeries) -> OHLCPyramid:
+        if self.cache is None:
+            return OHLCPyramid.build(series)
+        return self.cache.get_or_load(_key(series.version), lambda: self._build(series), tags=(series.version,))
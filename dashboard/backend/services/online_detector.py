@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.price_store import PriceStore
+from src.models.online_change_point import DEFAULT_ALERT_WINDOW, OnlineChangePointDetector
+from utils.file_lock import file_lock
+
+
+def _warm_start(series: Any) -> OnlineChangePointDetector:
+    returns = series.log_returns
+    finite = np.isfinite(returns)
+    history = returns[finite]
+    alpha0 = 2.0
+    # Prior mean of a new regime's variance is the historical variance.
+    beta0 = float(history.var() * (alpha0 - 1.0)) if history.shape[0] > 1 else 1e-4
+    detector = OnlineChangePointDetector(alpha0=alpha0, beta0=max(beta0, 1e-12))
+    detector.update_many(history)
+    if len(series):
+        detector.last_date = pd.Timestamp(series.dates[-1]).strftime("%Y-%m-%d")
+        detector.last_price = float(series.prices[-1])
+    return detector
+
+
+class OnlineDetectorService:
+    """Keeps a streaming change-point detector in step with appended prices.
+
+    The detector state lives in ``state_path`` and is rewritten after every
+    append, so a restart resumes where the last run stopped. The first use
+    without a saved state replays the stored price history once. Appends
+    are serialised by a lock, and across worker processes by a lock file;
+    a state saved by another process is reloaded before use. Observations
+    dated on or before the last one absorbed are skipped, so resending a day
+    is harmless.
+    """
+
+    def __init__(self, state_path: Path | str, store: PriceStore) -> None:
+        self.state_path = Path(state_path)
+        self.store = store
+        self._detector: Optional[OnlineChangePointDetector] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _state_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.state_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _save(self, detector: OnlineChangePointDetector) -> None:
+        detector.save(self.state_path)
+        self._stamp = self._state_stamp()
+
+    def _load(self) -> OnlineChangePointDetector:
+        stamp = self._state_stamp()
+        if self._detector is None or (stamp is not None and stamp != self._stamp):
+            if stamp is not None:
+                self._detector = OnlineChangePointDetector.load(self.state_path)
+                self._stamp = stamp
+            else:
+                self._detector = _warm_start(self.store.get())
+                self._save(self._detector)
+        return self._detector
+
+    def summary(self, window: int = DEFAULT_ALERT_WINDOW) -> Dict[str, Any]:
+        # The lock file also covers the warm start, which writes the state on first use.
+        with self._lock, file_lock(self.state_path):
+            return self._load().summary(window)
+
+    def append(self, frame: pd.DataFrame, window: int = DEFAULT_ALERT_WINDOW) -> Dict[str, Any]:
+        """Absorb ``Date``/``Price`` rows newer than the state and persist it.
+
+        Rows newer than the loaded price series are appended to the price
+        store, which writes them to its file, so they are not lost when the
+        series is reloaded. Returns the detector summary plus the change
+        probability after each absorbed row.
+        """
+        if "Date" not in frame.columns or "Price" not in frame.columns:
+            raise ValueError("Observations need 'date' and 'price'.")
+        rows = frame.assign(Date=pd.to_datetime(frame["Date"], errors="coerce"))
+        rows["Price"] = pd.to_numeric(rows["Price"], errors="coerce")
+        if rows["Date"].isna().any() or not (rows["Price"] > 0).all():
+            raise ValueError("Observations need valid dates and positive prices.")
+        rows = rows.sort_values("Date", kind="stable").drop_duplicates("Date", keep="last")
+
+        with self._lock, file_lock(self.state_path):
+            detector = self._load()
+            if detector.last_date is not None:
+                fresh = rows["Date"] > pd.Timestamp(detector.last_date)
+            else:
+                fresh = np.ones(len(rows), dtype=bool)
+            new_rows = rows[fresh]
+
+            updates: List[Dict[str, Any]] = []
+            for date, price in zip(new_rows["Date"], new_rows["Price"]):
+                if detector.last_price is not None:
+                    detector.update(np.log(price / detector.last_price))
+                detector.last_date = date.strftime("%Y-%m-%d")
+                detector.last_price = float(price)
+                updates.append({"date": detector.last_date, "change_probability": detector.change_probability(window)})
+            if updates:
+                self._save(detector)
+
+            series = self.store.get()
+            if len(new_rows):
+                tail = new_rows if not len(series) else new_rows[new_rows["Date"].to_numpy() > series.dates[-1]]
+                if len(tail):
+                    self.store.append(tail[["Date", "Price"]])
+
+            result = detector.summary(window)
+        result["updates"] = updates
+        result["skipped"] = int(len(rows) - len(new_rows))
+        return result
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from services.shared_dataset import CURRENT_FILE, MANIFEST_FILE, read_current
+from utils.fingerprint import content_hash
+
+BUNDLE_PREFIX = "bundle-"
+KEEP_BUNDLES = 3
+BUILT = "built"
+REUSED = "reused"
+SKIPPED = "skipped"
+
+
+@dataclass(frozen=True)
+class Output:
+    """Output ``name`` of stage ``stage``, used as another stage's input."""
+
+    stage: str
+    name: str
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the build: ``run(inputs, outputs, **params)`` reads ``inputs`` and writes every ``outputs`` file.
+
+    ``inputs`` maps names to source files or to :class:`Output` references;
+    ``outputs`` are file names inside the stage's directory of the bundle.
+    ``run`` may return a dict of JSON values, kept as the stage's ``meta``
+    in the manifest (e.g. the version of the dataset it read).
+    The fingerprint covers the source of ``run``, ``version``, ``params`` and
+    the content hash of every input, so a stage is rerun only when one of
+    them changed. An ``optional`` stage whose code raises ``ImportError`` or
+    whose source files are missing is recorded as skipped instead of failing
+    the build.
+    """
+
+    name: str
+    run: Callable[..., Optional[Mapping[str, Any]]]
+    inputs: Mapping[str, Union[Path, Output]] = field(default_factory=dict)
+    outputs: Tuple[str, ...] = ()
+    params: Mapping[str, Any] = field(default_factory=dict)
+    version: str = "1"
+    optional: bool = False
+
+    @property
+    def upstream(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(ref.stage for ref in self.inputs.values() if isinstance(ref, Output)))
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    generation: int
+    directory: Path
+    manifest: Mapping[str, Any]
+    published: bool
+
+    def statuses(self) -> Dict[str, str]:
+        return {name: record["status"] for name, record in self.manifest["stages"].items()}
+
+
+def stage_order(stages: Iterable[Stage]) -> List[Stage]:
+    """``stages`` in dependency order; ``ValueError`` on duplicates, unknown outputs or cycles."""
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage '{stage.name}'")
+        by_name[stage.name] = stage
+    for stage in by_name.values():
+        for ref in stage.inputs.values():
+            if isinstance(ref, Output) and (ref.stage not in by_name or ref.name not in by_name[ref.stage].outputs):
+                raise ValueError(f"Stage '{stage.name}' reads unknown output '{ref.stage}/{ref.name}'")
+
+    order: List[Stage] = []
+    state: Dict[str, bool] = {}  # False while visiting, True once ordered
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if state.get(name):
+            return
+        if name in state:
+            raise ValueError("Stage cycle: " + " -> ".join(path + (name,)))
+        state[name] = False
+        for upstream in by_name[name].upstream:
+            visit(upstream, path + (name,))
+        state[name] = True
+        order.append(by_name[name])
+
+    for name in by_name:
+        visit(name, ())
+    return order
+
+
+def stage_fingerprint(stage: Stage, input_hashes: Mapping[str, str]) -> str:
+    """Digest of everything a stage's outputs depend on."""
+    payload = {
+        "name": stage.name,
+        "version": stage.version,
+        "source": inspect.getsource(stage.run),
+        "params": stage.params,
+        "inputs": dict(sorted(input_hashes.items())),
+    }
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _run_stage(
+    run: Callable[..., Any], inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]
+) -> Tuple[float, Dict[str, Any]]:
+    # Module level so it can be sent to a worker process.
+    start = time.perf_counter()
+    meta = run(
+        {name: Path(path) for name, path in inputs.items()},
+        {name: Path(path) for name, path in outputs.items()},
+        **params,
+    )
+    missing = sorted(name for name, path in outputs.items() if not Path(path).is_file())
+    if missing:
+        raise RuntimeError(f"Stage did not write {missing}")
+    return time.perf_counter() - start, dict(meta or {})
+
+
+def _link(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _read_only(directory: Path) -> None:
+    for path in directory.rglob("*"):
+        if path.is_file():
+            path.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+class _Build:
+    """State of one :func:`build_bundle` call."""
+
+    def __init__(self, workdir: Path, previous_dir: Optional[Path], previous: Mapping[str, Any]) -> None:
+        self.workdir = workdir
+        self.previous_dir = previous_dir
+        self.previous = previous
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[Path, str] = {}
+
+    def _hash(self, path: Path) -> str:
+        if path not in self._hashes:
+            self._hashes[path] = content_hash(path)
+        return self._hashes[path]
+
+    def done(self, name: str) -> bool:
+        return "status" in self.records.get(name, {})
+
+    def _skip(self, stage: Stage, reason: str) -> None:
+        if not stage.optional:
+            raise RuntimeError(f"Stage '{stage.name}' cannot run: {reason}")
+        self.records[stage.name] = {"status": SKIPPED, "reason": reason, "params": dict(stage.params)}
+
+    def prepare(self, stage: Stage) -> Optional[Tuple[Dict[str, str], Dict[str, str], Dict[str, Any]]]:
+        """Record ``stage`` as skipped or reused, or return the arguments to run it with."""
+        for upstream in stage.upstream:
+            if self.records[upstream]["status"] == SKIPPED:
+                self._skip(stage, f"needs skipped stage '{upstream}'")
+                return None
+
+        paths: Dict[str, Path] = {}
+        hashes: Dict[str, str] = {}
+        sources: Dict[str, str] = {}
+        for name, ref in stage.inputs.items():
+            if isinstance(ref, Output):
+                paths[name] = self.workdir / ref.stage / ref.name
+                sources.update(self.records[ref.stage]["sources"])
+            else:
+                paths[name] = Path(ref).resolve()
+                if not paths[name].is_file():
+                    self._skip(stage, f"missing input {paths[name]}")
+                    return None
+                sources[str(paths[name])] = self._hash(paths[name])
+            hashes[name] = self._hash(paths[name])
+
+        fingerprint = stage_fingerprint(stage, hashes)
+        outputs = {name: self.workdir / stage.name / name for name in stage.outputs}
+        record: Dict[str, Any] = {
+            "fingerprint": fingerprint,
+            "inputs": hashes,
+            "sources": dict(sorted(sources.items())),
+            "params": dict(stage.params),
+            "outputs": {name: f"{stage.name}/{name}" for name in stage.outputs},
+        }
+        self.records[stage.name] = record
+        (self.workdir / stage.name).mkdir()
+
+        before = self.previous.get("stages", {}).get(stage.name)
+        if (
+            self.previous_dir is not None
+            and before is not None
+            and before.get("fingerprint") == fingerprint
+            and before["status"] != SKIPPED
+            and all((self.previous_dir / path).is_file() for path in record["outputs"].values())
+        ):
+            for path in record["outputs"].values():
+                _link(self.previous_dir / path, self.workdir / path)
+            record.update(status=REUSED, seconds=0.0, meta=before.get("meta", {}))
+            return None
+        return (
+            {name: str(path) for name, path in paths.items()},
+            {name: str(path) for name, path in outputs.items()},
+            dict(stage.params),
+        )
+
+    def finish(self, stage: Stage, future: Future) -> None:
+        try:
+            seconds, meta = future.result()
+        except ImportError as exc:
+            shutil.rmtree(self.workdir / stage.name, ignore_errors=True)
+            if not stage.optional:
+                raise
+            self.records[stage.name] = {"status": SKIPPED, "reason": str(exc), "params": dict(stage.params)}
+            return
+        self.records[stage.name].update(status=BUILT, seconds=round(seconds, 3), meta=meta)
+
+
+def _inline(run: Callable[..., Any], *args: Any) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(run(*args))
+    except BaseException as exc:  # re-raised by ``future.result()``
+        future.set_exception(exc)
+    return future
+
+
+def build_bundle(
+    root: Path | str, stages: Iterable[Stage], jobs: Optional[int] = None, force: bool = False
+) -> BuildResult:
+    """Bring the bundle under ``root`` up to date with ``stages`` and publish it if anything changed.
+
+    Stages whose fingerprint matches the current bundle have their outputs
+    hard-linked from it; the rest run in up to ``jobs`` worker processes as
+    soon as the stages they read from are done (``jobs=1`` runs them in this
+    process). ``force`` reruns every stage. The new bundle is written to a
+    temporary directory, made read-only, renamed to ``bundle-<generation>``
+    and then ``CURRENT`` is replaced atomically, as in
+    :func:`services.shared_dataset.publish_dataset`. A failing required
+    stage aborts the build and leaves the current bundle in place.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    order = stage_order(stages)
+    current = read_current(root)
+    previous_dir = root / current["directory"] if current else None
+    previous: Mapping[str, Any] = {}
+    if previous_dir is not None and (previous_dir / MANIFEST_FILE).is_file() and not force:
+        previous = json.loads((previous_dir / MANIFEST_FILE).read_text())
+    generation = (current["generation"] if current else 0) + 1
+
+    workdir = Path(tempfile.mkdtemp(prefix=f".{BUNDLE_PREFIX}", dir=root))
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs != 1 else None
+    try:
+        build = _Build(workdir, previous_dir, previous)
+        remaining = list(order)
+        running: Dict[Future, Stage] = {}
+        while remaining or running:
+            ready = [stage for stage in remaining if all(build.done(name) for name in stage.upstream)]
+            for stage in ready:
+                remaining.remove(stage)
+                arguments = build.prepare(stage)
+                if arguments is None:
+                    continue
+                if executor is None:
+                    build.finish(stage, _inline(_run_stage, stage.run, *arguments))
+                else:
+                    running[executor.submit(_run_stage, stage.run, *arguments)] = stage
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    build.finish(running.pop(future), future)
+            elif remaining and not ready:  # pragma: no cover - stage_order rules this out
+                raise RuntimeError("Stages left with unmet dependencies")
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    records = {stage.name: build.records[stage.name] for stage in order}
+    hasher = hashlib.blake2b(digest_size=8)
+    fingerprints = {name: record.get("fingerprint") for name, record in records.items()}
+    hasher.update(json.dumps(fingerprints, sort_keys=True).encode("utf-8"))
+    version = hasher.hexdigest()
+    if current is not None and current.get("version") == version and previous:
+        shutil.rmtree(workdir, ignore_errors=True)
+        return BuildResult(current["generation"], previous_dir, {**previous, "stages": records}, published=False)
+
+    name = f"{BUNDLE_PREFIX}{generation:06d}"
+    manifest = {
+        "generation": generation,
+        "version": version,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "stages": records,
+    }
+    try:
+        (workdir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        _read_only(workdir)
+        workdir.chmod(0o755)
+        workdir.rename(root / name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    pointer = root / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(json.dumps({"generation": generation, "directory": name, "version": version}))
+    os.replace(pointer, root / CURRENT_FILE)
+
+    for stale in sorted(root.glob(f"{BUNDLE_PREFIX}*"))[:-KEEP_BUNDLES]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return BuildResult(generation, root / name, manifest, published=True)
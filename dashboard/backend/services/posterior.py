@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:  # Optional: xarray reads the posterior group of ArviZ NetCDF files.
+    import xarray as xr
+except ImportError:  # pragma: no cover - exercised only without xarray
+    xr = None
+
+POSTERIOR_GROUP = "posterior"
+DEFAULT_HDI_PROB = 0.94
+DEFAULT_MAX_SAMPLES = 300
+HISTOGRAM_BINS = 30
+
+
+def hdi(samples: np.ndarray, prob: float = DEFAULT_HDI_PROB) -> Tuple[float, float]:
+    """Narrowest interval containing ``prob`` of the samples (ArviZ's definition)."""
+    ordered = np.sort(samples[np.isfinite(samples)])
+    n = ordered.shape[0]
+    if n == 0:
+        return float("nan"), float("nan")
+    size = max(1, int(np.floor(prob * n)))
+    if size >= n:
+        return float(ordered[0]), float(ordered[-1])
+    widths = ordered[size:] - ordered[: n - size]
+    lo = int(np.argmin(widths))
+    return float(ordered[lo]), float(ordered[lo + size])
+
+
+def evenly_spaced(values: np.ndarray, max_samples: int) -> np.ndarray:
+    """At most ``max_samples`` elements of ``values`` at evenly spaced positions."""
+    if max_samples < 1:
+        raise ValueError("max_samples must be a positive integer")
+    if values.shape[0] <= max_samples:
+        return values
+    return values[np.linspace(0, values.shape[0] - 1, max_samples).round().astype(np.int64)]
+
+
+@dataclass(frozen=True)
+class PosteriorSummary:
+    """Summary of one posterior variable over the selected chains and draws.
+
+    ``draws`` holds the selected draws flattened chain by chain; the summary
+    statistics are computed from all of them once, and responses sample
+    ``draws`` down to the requested size.
+    """
+
+    name: str
+    draws: np.ndarray
+    mean: float
+    sd: float
+    hdi_lower: float
+    hdi_upper: float
+    hdi_prob: float
+    histogram_counts: np.ndarray
+    histogram_edges: np.ndarray
+
+    @classmethod
+    def from_draws(cls, name: str, draws: np.ndarray, hdi_prob: float = DEFAULT_HDI_PROB) -> "PosteriorSummary":
+        flat = np.ascontiguousarray(draws.reshape(-1))
+        finite = flat[np.isfinite(flat)]
+        if finite.shape[0]:
+            counts, edges = np.histogram(finite, bins=HISTOGRAM_BINS)
+        else:
+            counts, edges = np.zeros(0, dtype=np.int64), np.zeros(0)
+        lower, upper = hdi(finite, hdi_prob)
+        return cls(
+            name=name,
+            draws=flat,
+            mean=float(finite.mean()) if finite.shape[0] else float("nan"),
+            sd=float(finite.std(ddof=1)) if finite.shape[0] > 1 else float("nan"),
+            hdi_lower=lower,
+            hdi_upper=upper,
+            hdi_prob=hdi_prob,
+            histogram_counts=counts,
+            histogram_edges=edges,
+        )
+
+
+def open_posterior(path: Path) -> Any:
+    """The ``posterior`` group of an ArviZ NetCDF file, opened lazily.
+
+    Raises ``FileNotFoundError`` when the file is missing or not NetCDF (e.g.
+    the placeholder written when the sampler was not installed).
+    """
+    if xr is None:
+        raise RuntimeError("Reading posterior files requires xarray")
+    if not path.exists():
+        raise FileNotFoundError(path)
+    try:
+        return xr.open_dataset(path, group=POSTERIOR_GROUP)
+    except (OSError, ValueError) as exc:
+        raise FileNotFoundError(f"{path} is not a readable posterior file") from exc
+
+
+class PosteriorService:
+    """Summaries of posterior draws held in memory.
+
+    Draws are ``(chain, draw)`` arrays, e.g. read variable by variable by
+    :meth:`services.model_registry.ModelRegistry.draws`. Summaries are cached per
+    ``(source, version, variable, chains, thin, hdi_prob)``, so a new trace
+    version is picked up on the next request and repeat requests only look
+    the cache up.
+    """
+
+    def __init__(self, cache: Any) -> None:
+        self.cache = cache
+
+    def summaries(
+        self,
+        source: str,
+        version: str,
+        draws: Mapping[str, np.ndarray],
+        names: Sequence[str],
+        chains: Optional[Sequence[int]] = None,
+        thin: int = 1,
+        hdi_prob: float = DEFAULT_HDI_PROB,
+    ) -> List[PosteriorSummary]:
+        """Summaries for ``names`` over the selected chains and draw stride, computing any not cached."""
+        if thin < 1:
+            raise ValueError("thin must be a positive integer")
+        unknown = [name for name in names if name not in draws]
+        if unknown:
+            raise ValueError(f"Unknown posterior variables {unknown}. Available: {list(draws)}")
+        n_chains = int(next(iter(draws.values())).shape[0]) if draws else 0
+        chain_index = sorted(set(chains)) if chains else list(range(n_chains))
+        if any(chain < 0 or chain >= n_chains for chain in chain_index):
+            raise ValueError(f"chains must be between 0 and {n_chains - 1}")
+
+        selection = f"{','.join(map(str, chain_index))}:{thin}:{hdi_prob}"
+
+        def key(name: str) -> str:
+            return f"posterior:{source}:{version}:{name}:{selection}"
+
+        summaries = []
+        for name in names:
+            summary = self.cache.get(key(name)) if self.cache is not None else None
+            if summary is None:
+                summary = PosteriorSummary.from_draws(name, draws[name][chain_index, ::thin], hdi_prob)
+                if self.cache is not None:
+                    self.cache.set(key(name), summary, tags=(version,))
+            summaries.append(summary)
+        return summaries
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import span
+
+DATE_DTYPE = "datetime64[ns]"
+MAX_LINEAGE = 16
+
+T = TypeVar("T")
+
+
+def _readonly(values: np.ndarray) -> np.ndarray:
+    values = np.ascontiguousarray(values)
+    values.setflags(write=False)
+    return values
+
+
+def _digest(dates: np.ndarray, columns: Mapping[str, np.ndarray], parent: str = "") -> str:
+    hasher = hashlib.blake2b(digest_size=8)
+    hasher.update(parent.encode("utf-8"))
+    hasher.update(dates.view("int64").tobytes())
+    for name, values in columns.items():
+        hasher.update(name.encode("utf-8"))
+        hasher.update(values.tobytes())
+    return hasher.hexdigest()
+
+
+def _log_returns(prices: np.ndarray, previous: float = np.nan) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_prices = np.log(np.concatenate(([previous], prices)))
+    return np.diff(log_prices)
+
+
+def _parse_frame(df: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    if "Date" not in df.columns or "Price" not in df.columns:
+        raise ValueError("Required columns missing: Date, Price")
+
+    frame = df.copy()
+    frame["Date"] = pd.to_datetime(frame["Date"], errors="coerce")
+    frame = frame.dropna(subset=["Date"]).sort_values("Date", kind="stable")
+
+    columns: Dict[str, np.ndarray] = {}
+    for name in frame.columns:
+        if name == "Date":
+            continue
+        columns[name] = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype="float64")
+    return frame["Date"].to_numpy(dtype=DATE_DTYPE), columns
+
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """Date-sorted price columns held as read-only NumPy arrays.
+
+    ``columns`` always contains ``Price`` and ``log_return`` (derived from the
+    prices when the source file does not carry it), followed by any other
+    numeric columns in source order. ``version`` is a content digest, so two
+    series with identical data share a version across processes. ``lineage``
+    lists the ``(version, length)`` of the series this one was appended to,
+    which lets derived results be extended instead of recomputed.
+    """
+
+    dates: np.ndarray
+    columns: Mapping[str, np.ndarray]
+    version: str
+    lineage: Tuple[Tuple[str, int], ...] = ()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceSeries":
+        dates, columns = _parse_frame(df)
+        if "log_return" not in columns:
+            columns["log_return"] = _log_returns(columns["Price"])
+
+        dates = _readonly(dates)
+        columns = {name: _readonly(values) for name, values in columns.items()}
+        return cls(dates=dates, columns=MappingProxyType(columns), version=_digest(dates, columns))
+
+    def append(self, df: pd.DataFrame) -> "PriceSeries":
+        """Return a new series with ``df``'s rows added after the current last date.
+
+        Columns missing from ``df`` are filled with NaN, except ``log_price``
+        and ``log_return`` which are derived from the prices; columns unknown
+        to this series are ignored.
+        """
+        dates, columns = _parse_frame(df)
+        if dates.shape[0] == 0:
+            return self
+        if len(self) and dates[0] <= self.dates[-1]:
+            raise ValueError("Appended prices must be dated after the last stored date.")
+
+        tail: Dict[str, np.ndarray] = {}
+        for name in self.columns:
+            if name in columns:
+                tail[name] = columns[name]
+            elif name == "log_return":
+                previous = self.prices[-1] if len(self) else np.nan
+                tail[name] = _log_returns(columns["Price"], previous)
+            elif name == "log_price":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    tail[name] = np.log(columns["Price"])
+            else:
+                tail[name] = np.full(dates.shape[0], np.nan)
+
+        merged = {
+            name: _readonly(np.concatenate((values, tail[name]))) for name, values in self.columns.items()
+        }
+        return PriceSeries(
+            dates=_readonly(np.concatenate((self.dates, dates))),
+            columns=MappingProxyType(merged),
+            version=_digest(dates, tail, parent=self.version),
+            lineage=(self.lineage + ((self.version, len(self)),))[-MAX_LINEAGE:],
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path | str) -> "PriceSeries":
+        return cls.from_frame(pd.read_csv(path))
+
+    def __len__(self) -> int:
+        return int(self.dates.shape[0])
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.columns["Price"]
+
+    @property
+    def log_returns(self) -> np.ndarray:
+        return self.columns["log_return"]
+
+    @property
+    def versions(self) -> Tuple[str, ...]:
+        """This series' version followed by its ancestors', newest first."""
+        return (self.version,) + tuple(version for version, _ in reversed(self.lineage))
+
+    def bounds(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """Return the ``[lo, hi)`` row slice covering ``start <= Date <= end``."""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "ns"), "left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "ns"), "right"))
+        return lo, max(lo, hi)
+
+    def to_frame(self, lo: int = 0, hi: Optional[int] = None) -> pd.DataFrame:
+        """Build a DataFrame view over rows ``[lo, hi)`` without copying the arrays."""
+        data = {"Date": self.dates[lo:hi]}
+        data.update({name: values[lo:hi] for name, values in self.columns.items()})
+        return pd.DataFrame(data, copy=False)
+
+
+def append_rows(path: Path, series: PriceSeries, start: int) -> None:
+    """Write ``series`` rows from ``start`` on to the end of the CSV at ``path``, in the file's column order."""
+    frame = series.to_frame(start)
+    frame["Date"] = pd.to_datetime(frame["Date"]).dt.strftime("%Y-%m-%d")
+    exists = path.exists() and path.stat().st_size > 0
+    if exists:
+        frame = frame.reindex(columns=pd.read_csv(path, nrows=0).columns)
+        with open(path, "rb+") as handle:
+            handle.seek(-1, 2)
+            if handle.read(1) != b"\n":
+                handle.write(b"\n")
+    frame.to_csv(path, mode="a", header=not exists, index=False)
+
+
+class PriceStore:
+    """Loads the processed price file once per process and shares it read-only.
+
+    ``on_load`` receives each series read from the file, e.g. to seed caches
+    with arrays precomputed for it.
+    """
+
+    def __init__(self, path: Path | str, on_load: Optional[Callable[[PriceSeries], None]] = None) -> None:
+        self.path = Path(path)
+        self.on_load = on_load
+        self._series: Optional[PriceSeries] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> PriceSeries:
+        return PriceSeries.from_csv(self.path)
+
+    def get(self) -> PriceSeries:
+        series = self._series
+        if series is not None:
+            return series
+        with self._lock:
+            if self._series is None:
+                with span("load_price_file"):
+                    self._series = self._load()
+                if self.on_load is not None:
+                    self.on_load(self._series)
+            return self._series
+
+    def append(self, df: pd.DataFrame) -> PriceSeries:
+        """Append newer rows to the file and to the loaded series; readers see the new version atomically.
+
+        The rows are written to ``path`` first, so they survive a reload of
+        the file or a restart.
+        """
+        with self._lock:
+            current = self._series if self._series is not None else self._load()
+            series = current.append(df)
+            if len(series) > len(current):
+                append_rows(self.path, series, len(current))
+            self._series = series
+            return series
+
+    def clear(self) -> Optional[PriceSeries]:
+        """Forget the loaded series so the next :meth:`get` re-reads the file; return it."""
+        with self._lock:
+            series, self._series = self._series, None
+            return series
+
+
+def derived(cache: Any, series: PriceSeries, name: str, factory: Callable[[PriceSeries], T]) -> T:
+    """Return ``factory(series)``, memoised in ``cache`` and tagged with the series version."""
+    if cache is None:
+        return factory(series)
+    return cache.get_or_load(f"{name}:{series.version}", lambda: factory(series), tags=(series.version,))
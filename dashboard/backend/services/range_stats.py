@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Sequence
+
+import numpy as np
+
+from services.price_store import PriceSeries
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0.0], np.cumsum(values)))
+
+
+@dataclass(frozen=True)
+class RangeSummary:
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    median: float
+    quantiles: Dict[float, float] = field(default_factory=dict)
+    log_return_mean: float = float("nan")
+    log_return_std: float = float("nan")
+
+
+class _WaveletMatrix:
+    """Wavelet matrix over value ranks for range order statistics.
+
+    Each row is replaced by its global rank (NaN ranks last) and the ranks are
+    stored bit-plane by bit-plane as prefix counts of zero bits. A k-th
+    smallest query over ``[lo, hi)`` walks one level per bit, so it costs
+    ``O(log n)`` array lookups regardless of the range width, and every level
+    is evaluated for all requested ``k`` at once.
+    """
+
+    def __init__(self, values: np.ndarray) -> None:
+        n = values.shape[0]
+        order = np.argsort(values, kind="stable")
+        self.sorted_values = values[order]
+        ranks = np.empty(n, dtype=np.int64)
+        ranks[order] = np.arange(n, dtype=np.int64)
+
+        self.n_bits = max(1, int(n - 1).bit_length())
+        self.zeros = np.empty((self.n_bits, n + 1), dtype=np.int64)
+        self.zero_totals = np.empty(self.n_bits, dtype=np.int64)
+        current = ranks
+        for level in range(self.n_bits):
+            is_zero = ((current >> (self.n_bits - 1 - level)) & 1) == 0
+            self.zeros[level, 0] = 0
+            np.cumsum(is_zero, out=self.zeros[level, 1:])
+            self.zero_totals[level] = self.zeros[level, -1]
+            current = np.concatenate((current[is_zero], current[~is_zero]))
+
+    def kth(self, lo: int, hi: int, ks: np.ndarray) -> np.ndarray:
+        """Return the ``ks``-th smallest values (0-based) of rows ``[lo, hi)``."""
+        ks = ks.astype(np.int64, copy=True)
+        lo_idx = np.full(ks.shape, lo, dtype=np.int64)
+        hi_idx = np.full(ks.shape, hi, dtype=np.int64)
+        rank = np.zeros(ks.shape, dtype=np.int64)
+        for level in range(self.n_bits):
+            zeros = self.zeros[level]
+            zeros_lo = zeros[lo_idx]
+            zeros_hi = zeros[hi_idx]
+            n_zeros = zeros_hi - zeros_lo
+            one = ks >= n_zeros
+            ks = np.where(one, ks - n_zeros, ks)
+            offset = self.zero_totals[level]
+            lo_idx = np.where(one, offset + lo_idx - zeros_lo, zeros_lo)
+            hi_idx = np.where(one, offset + hi_idx - zeros_hi, zeros_hi)
+            rank = (rank << 1) | one
+        return self.sorted_values[rank]
+
+
+class RangeStatistics:
+    """Constant-time range aggregates over a price series.
+
+    Prefix sums of the (globally centred) price, price squared, log return and
+    log return squared answer count, mean and sample std for any ``[lo, hi)``
+    row range in O(1); ``lo``/``hi`` may be arrays for batched queries.
+    Medians, quantiles, min and max use a lazily built wavelet matrix. Missing
+    values are skipped, matching pandas' reductions.
+    """
+
+    def __init__(self, series: PriceSeries) -> None:
+        self.version = series.version
+        self.dates = series.dates
+        prices = series.prices
+        returns = series.log_returns
+
+        price_valid = np.isfinite(prices)
+        self._price_shift = float(np.nanmean(prices)) if price_valid.any() else 0.0
+        centred = np.where(price_valid, prices - self._price_shift, 0.0)
+        self._price_count = np.concatenate(([0], np.cumsum(price_valid, dtype=np.int64)))
+        self._price_sum = _prefix(centred)
+        self._price_sq = _prefix(centred * centred)
+
+        return_valid = np.isfinite(returns)
+        clean_returns = np.where(return_valid, returns, 0.0)
+        self._return_count = np.concatenate(([0], np.cumsum(return_valid, dtype=np.int64)))
+        self._return_sum = _prefix(clean_returns)
+        self._return_sq = _prefix(clean_returns * clean_returns)
+        self._prices = prices
+
+    def __len__(self) -> int:
+        return int(self.dates.shape[0])
+
+    @cached_property
+    def _order(self) -> _WaveletMatrix:
+        return _WaveletMatrix(self._prices)
+
+    @staticmethod
+    def _moments(count, total, squares, shift: float = 0.0):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+            var = np.where(count > 1, (squares - total * mean) / (count - 1), np.nan)
+        return mean + shift, np.sqrt(np.maximum(var, 0.0))
+
+    def count(self, lo, hi):
+        return self._price_count[hi] - self._price_count[lo]
+
+    def return_count(self, lo, hi):
+        """Finite log returns in ``[lo, hi)``: the rows change-point models are fitted on."""
+        return self._return_count[hi] - self._return_count[lo]
+
+    def return_rows(self, count):
+        """Smallest ``hi`` such that ``[0, hi)`` holds ``count`` finite log returns."""
+        return np.searchsorted(self._return_count, count, "left")
+
+    def mean_std(self, lo, hi):
+        """Return ``(mean, std)`` of prices over ``[lo, hi)`` with ``ddof=1``."""
+        count = self.count(lo, hi)
+        total = self._price_sum[hi] - self._price_sum[lo]
+        squares = self._price_sq[hi] - self._price_sq[lo]
+        return self._moments(count, total, squares, self._price_shift)
+
+    def return_mean_std(self, lo, hi):
+        count = self._return_count[hi] - self._return_count[lo]
+        total = self._return_sum[hi] - self._return_sum[lo]
+        squares = self._return_sq[hi] - self._return_sq[lo]
+        return self._moments(count, total, squares)
+
+    def quantiles(self, lo: int, hi: int, qs: Sequence[float]) -> np.ndarray:
+        """Linearly interpolated quantiles of rows ``[lo, hi)`` (NumPy's default)."""
+        count = int(self.count(lo, hi))
+        qs = np.asarray(qs, dtype="float64")
+        if count == 0:
+            return np.full(qs.shape, np.nan)
+        position = qs * (count - 1)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, count - 1)
+        values = self._order.kth(lo, hi, np.concatenate((below, above)))
+        lower, upper = values[: below.size], values[below.size :]
+        return lower + (upper - lower) * (position - below)
+
+    def summary(self, lo: int, hi: int, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> RangeSummary:
+        mean, std = self.mean_std(lo, hi)
+        return_mean, return_std = self.return_mean_std(lo, hi)
+        levels = tuple(quantiles)
+        values = self.quantiles(lo, hi, (0.0, 0.5, 1.0) + levels)
+        return RangeSummary(
+            count=int(self.count(lo, hi)),
+            mean=float(mean),
+            std=float(std),
+            min=float(values[0]),
+            max=float(values[2]),
+            median=float(values[1]),
+            quantiles={q: float(v) for q, v in zip(levels, values[3:])},
+            log_return_mean=float(return_mean),
+            log_return_std=float(return_std),
+        )
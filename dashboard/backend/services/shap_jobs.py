@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+GLOBAL_PNG = "shap_global.png"
+LOCAL_PNG = "shap_local.png"
+MAX_FINISHED_JOBS = 256
+
+ShapTask = Callable[[Path, Path], None]
+
+
+def artifact_key(dataset_version: str, model_version: str, selected_date: Optional[str]) -> str:
+    """Content address of the SHAP plots for one dataset, model and selected date."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in (dataset_version, model_version, selected_date or ""):
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+@dataclass(frozen=True)
+class ShapArtifacts:
+    global_png: bytes
+    local_png: bytes
+    global_path: Path
+    local_path: Path
+
+
+class ShapJobQueue:
+    """Runs SHAP analyses in the background and stores their plots by content address.
+
+    Finished plots live in ``artifacts_dir/<key>/`` and in the app cache, so a
+    hit never re-runs the analysis, even after a restart. Each job writes to a
+    private temporary directory that is renamed into place when complete, so
+    concurrent jobs cannot overwrite each other's output. Submitting a key
+    that is already queued or running returns the existing job.
+    """
+
+    def __init__(self, cache: Any, artifacts_dir: Path, max_workers: int = 1) -> None:
+        self.cache = cache
+        self.artifacts_dir = Path(artifacts_dir)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shap")
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, key: str) -> str:
+        return f"shap:{key}"
+
+    def lookup(self, key: str) -> Optional[ShapArtifacts]:
+        """Return stored artifacts for ``key`` without running anything."""
+        artifacts = self.cache.get(self._cache_key(key)) if self.cache is not None else None
+        if artifacts is not None:
+            return artifacts
+        directory = self.artifacts_dir / key
+        global_path, local_path = directory / GLOBAL_PNG, directory / LOCAL_PNG
+        if not (global_path.is_file() and local_path.is_file()):
+            return None
+        artifacts = ShapArtifacts(global_path.read_bytes(), local_path.read_bytes(), global_path, local_path)
+        if self.cache is not None:
+            self.cache.set(self._cache_key(key), artifacts)
+        return artifacts
+
+    def submit(self, key: str, task: ShapTask) -> str:
+        """Queue ``task(global_path, local_path)`` for ``key`` unless it is already pending."""
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                self._jobs[key] = self._executor.submit(self._run, key, task)
+                self._jobs.move_to_end(key)
+                self._trim()
+        return key
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """``{"status": ...}`` for a job: ``pending``, ``running``, ``done``, ``failed`` or ``unknown``."""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future is None:
+            return {"status": "done" if self.lookup(job_id) is not None else "unknown"}
+        if future.running():
+            return {"status": "running"}
+        if not future.done():
+            return {"status": "pending"}
+        error = future.exception()
+        if error is not None:
+            return {"status": "failed", "error": str(error)}
+        return {"status": "done"}
+
+    def _run(self, key: str, task: ShapTask) -> ShapArtifacts:
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.artifacts_dir))
+        try:
+            task(workdir / GLOBAL_PNG, workdir / LOCAL_PNG)
+            target = self.artifacts_dir / key
+            if not target.exists():
+                workdir.rename(target)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        artifacts = self.lookup(key)
+        if artifacts is None:
+            raise RuntimeError("SHAP analysis did not produce both plots")
+        return artifacts
+
+    def _trim(self) -> None:
+        finished = [key for key, future in self._jobs.items() if future.done()]
+        for key in finished[: max(0, len(self._jobs) - MAX_FINISHED_JOBS)]:
+            del self._jobs[key]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
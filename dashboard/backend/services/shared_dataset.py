@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.price_store import PriceSeries, PriceStore, append_rows
+from services.volatility import PRESET_WINDOWS, rolling_volatility
+from utils.file_lock import file_lock
+from utils.fingerprint import file_version
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+KEEP_GENERATIONS = 3
+
+
+@dataclass(frozen=True)
+class SharedDataset:
+    """One published generation of the dataset, attached as read-only memory maps."""
+
+    generation: int
+    series: PriceSeries
+    volatility: Mapping[int, np.ndarray]
+
+
+def read_current(root: Path | str) -> Optional[Dict[str, Any]]:
+    """The ``CURRENT`` pointer: generation counter, directory and dataset version."""
+    path = Path(root) / CURRENT_FILE
+    return json.loads(path.read_text()) if path.is_file() else None
+
+
+def publish_dataset(
+    root: Path | str,
+    series: PriceSeries,
+    windows: Iterable[int] = PRESET_WINDOWS,
+    source_digest: Optional[str] = None,
+) -> int:
+    """Write ``series`` and its rolling volatility as the next generation and point ``CURRENT`` at it.
+
+    Arrays are stored as ``.npy`` files in a fresh directory that is renamed
+    into place when complete, then ``CURRENT`` is replaced atomically, so an
+    attaching worker sees either the old generation or the new one. Only the
+    newest ``KEEP_GENERATIONS`` directories are kept; workers still mapping
+    a removed one keep their pages until they reattach. Publishers in
+    different processes are serialised by a lock file. ``source_digest``,
+    the content hash of the file ``series`` matches, is recorded in
+    ``CURRENT`` so :func:`publish_source` can tell the file is already live.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with file_lock(root / CURRENT_FILE):
+        return _publish(root, series, windows, source_digest)
+
+
+def publish_source(root: Path | str, path: Path | str, windows: Iterable[int] = PRESET_WINDOWS) -> int:
+    """Publish the price file at ``path`` unless the current generation was written from these bytes.
+
+    Returns the generation that holds the file's contents.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with file_lock(root / CURRENT_FILE):
+        digest = file_version(path, hashed=True)
+        current = read_current(root)
+        if current is not None and current.get("source_digest") == digest:
+            return current["generation"]
+        return _publish(root, PriceSeries.from_csv(path), windows, digest)
+
+
+def _publish(root: Path, series: PriceSeries, windows: Iterable[int], source_digest: Optional[str]) -> int:
+    current = read_current(root)
+    generation = (current["generation"] if current else 0) + 1
+    name = f"gen-{generation:06d}"
+
+    workdir = Path(tempfile.mkdtemp(prefix=f".{name}-", dir=root))
+    try:
+        np.save(workdir / "dates.npy", series.dates)
+        columns = []
+        for index, (column, values) in enumerate(series.columns.items()):
+            filename = f"column-{index}.npy"
+            np.save(workdir / filename, values)
+            columns.append({"name": column, "file": filename})
+
+        windows = sorted({int(window) for window in windows})
+        volatility = {}
+        if windows:
+            rolling = rolling_volatility(series.log_returns, windows)
+            for window, values in zip(windows, rolling):
+                filename = f"volatility-{window}.npy"
+                np.save(workdir / filename, values)
+                volatility[str(window)] = filename
+
+        manifest = {
+            "generation": generation,
+            "version": series.version,
+            "lineage": [list(item) for item in series.lineage],
+            "columns": columns,
+            "volatility": volatility,
+        }
+        (workdir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        workdir.rename(root / name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    pointer = root / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(
+        json.dumps(
+            {"generation": generation, "directory": name, "version": series.version, "source_digest": source_digest}
+        )
+    )
+    os.replace(pointer, root / CURRENT_FILE)
+
+    for stale in sorted(root.glob("gen-*"))[:-KEEP_GENERATIONS]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return generation
+
+
+def attach_dataset(root: Path | str) -> SharedDataset:
+    """Memory-map the current generation without copying any array."""
+    root = Path(root)
+    current = read_current(root)
+    if current is None:
+        raise FileNotFoundError(f"No published dataset in {root}")
+    directory = root / current["directory"]
+    manifest = json.loads((directory / MANIFEST_FILE).read_text())
+
+    def load(filename: str) -> np.ndarray:
+        return np.load(directory / filename, mmap_mode="r")
+
+    series = PriceSeries(
+        dates=load("dates.npy"),
+        columns=MappingProxyType({item["name"]: load(item["file"]) for item in manifest["columns"]}),
+        version=manifest["version"],
+        lineage=tuple((version, int(length)) for version, length in manifest["lineage"]),
+    )
+    volatility = {int(window): load(filename) for window, filename in manifest["volatility"].items()}
+    return SharedDataset(generation=manifest["generation"], series=series, volatility=MappingProxyType(volatility))
+
+
+class SharedPriceStore(PriceStore):
+    """A :class:`PriceStore` backed by the dataset a parent process published.
+
+    ``path`` is the ``CURRENT`` pointer, so the app's file watcher notices a
+    new generation and clears the store; the next :meth:`get` reattaches.
+    Every worker maps the same files, so the OS page cache holds one copy of
+    the data however many workers run. ``on_attach`` receives each attached
+    :class:`SharedDataset`, e.g. to seed caches with its derived arrays.
+
+    Appended rows are written to ``source``, the file the dataset is
+    published from, and the extended series is published as the next
+    generation, so every worker sees them once it reattaches and can extend
+    its derived arrays from the series' lineage.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        on_attach: Optional[Callable[[SharedDataset], None]] = None,
+        source: Optional[Path | str] = None,
+    ) -> None:
+        super().__init__(Path(root) / CURRENT_FILE)
+        self.root = Path(root)
+        self.on_attach = on_attach
+        self.source = Path(source) if source is not None else None
+        self.generation: Optional[int] = None
+
+    def _load(self) -> PriceSeries:
+        try:
+            dataset = attach_dataset(self.root)
+        except FileNotFoundError:
+            # The generation was pruned between reading CURRENT and mapping it.
+            dataset = attach_dataset(self.root)
+        self.generation = dataset.generation
+        if self.on_attach is not None:
+            self.on_attach(dataset)
+        return dataset.series
+
+    def append(self, df: pd.DataFrame) -> PriceSeries:
+        """Write newer rows to ``source`` and publish the extended series as the next generation.
+
+        The publish lock is held from the write on, so the source watcher
+        finds the file already published instead of publishing it again.
+        """
+        if self.source is None:
+            raise ValueError("This dataset has no source file to append prices to.")
+        with self._lock, file_lock(self.path):
+            current = self._series
+            if current is None or (read_current(self.root) or {}).get("generation") != self.generation:
+                # Another worker published since this one attached.
+                current = self._load()
+            series = current.append(df)
+            if len(series) == len(current):
+                self._series = current
+                return current
+            append_rows(self.source, series, len(current))
+            _publish(self.root, series, PRESET_WINDOWS, file_version(self.source, hashed=True))
+            self._series = None
+        return self.get()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from services.price_store import PriceSeries
+
+PRESET_WINDOWS = (7, 14, 21, 30, 60, 90, 180, 365)
+
+
+def _sums_key(version: str) -> str:
+    return f"volatility_sums:{version}"
+
+
+def _values_key(version: str, window: int) -> str:
+    return f"volatility:{version}:{window}"
+
+
+@dataclass(frozen=True)
+class _ReturnSums:
+    """Prefix count, sum and sum of squares of the finite log returns."""
+
+    count: np.ndarray
+    total: np.ndarray
+    squares: np.ndarray
+
+    @classmethod
+    def build(cls, returns: np.ndarray, base: Optional["_ReturnSums"] = None) -> "_ReturnSums":
+        valid = np.isfinite(returns)
+        clean = np.where(valid, returns, 0.0)
+        start = (0, 0.0, 0.0) if base is None else (base.count[-1], base.total[-1], base.squares[-1])
+        count = start[0] + np.cumsum(valid, dtype=np.int64)
+        total = start[1] + np.cumsum(clean)
+        squares = start[2] + np.cumsum(clean * clean)
+        if base is None:
+            return cls(
+                count=np.concatenate(([0], count)),
+                total=np.concatenate(([0.0], total)),
+                squares=np.concatenate(([0.0], squares)),
+            )
+        return cls(
+            count=np.concatenate((base.count, count)),
+            total=np.concatenate((base.total, total)),
+            squares=np.concatenate((base.squares, squares)),
+        )
+
+    def rolling_std(self, windows: np.ndarray, start: int = 0) -> np.ndarray:
+        """Rolling sample std for rows ``start:`` and every window, shape ``(W, n - start)``.
+
+        Matches ``Series.rolling(window).std()``: a window is NaN unless all of
+        its ``window`` returns are present.
+        """
+        ends = np.arange(start + 1, self.count.shape[0], dtype=np.int64)[None, :]
+        windows = windows[:, None]
+        begins = ends - windows
+        complete = begins >= 0
+        begins = np.maximum(begins, 0)
+
+        count = self.count[ends] - self.count[begins]
+        total = self.total[ends] - self.total[begins]
+        squares = self.squares[ends] - self.squares[begins]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (squares - total * total / windows) / (windows - 1)
+        ok = complete & (count == windows) & (windows > 1)
+        return np.where(ok, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def rolling_volatility(returns: np.ndarray, windows: Iterable[int]) -> np.ndarray:
+    """Rolling std of ``returns`` for every window at once, shape ``(len(windows), len(returns))``."""
+    return _ReturnSums.build(returns).rolling_std(np.asarray(list(windows), dtype=np.int64))
+
+
+class VolatilityService:
+    """Rolling log-return volatility cached per ``(series version, window)``.
+
+    All requested windows that miss the cache are computed together from one
+    set of prefix sums. When a series was produced by ``PriceSeries.append``,
+    cached prefix sums and rolling values of an ancestor version are extended
+    over the appended rows only.
+    """
+
+    def __init__(self, cache: Any, preset_windows: Iterable[int] = PRESET_WINDOWS) -> None:
+        self.cache = cache
+        self.preset_windows = tuple(preset_windows)
+
+    def _get(self, key: str) -> Any:
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _set(self, key: str, value: Any, version: str) -> None:
+        if self.cache is not None:
+            self.cache.set(key, value, tags=(version,))
+
+    def _ancestor(self, series: PriceSeries, key: Callable[[str], str]) -> Tuple[Optional[Any], int]:
+        for version, length in reversed(series.lineage):
+            value = self._get(key(version))
+            if value is not None:
+                return value, length
+        return None, 0
+
+    def _sums(self, series: PriceSeries) -> _ReturnSums:
+        sums = self._get(_sums_key(series.version))
+        if sums is None:
+            base, length = self._ancestor(series, _sums_key)
+            sums = _ReturnSums.build(series.log_returns[length:], base)
+            self._set(_sums_key(series.version), sums, series.version)
+        return sums
+
+    def rolling(self, series: PriceSeries, windows: Iterable[int]) -> Dict[int, np.ndarray]:
+        """Return read-only rolling std arrays aligned with ``series.dates``."""
+        windows = [int(window) for window in windows]
+        if any(window < 1 for window in windows):
+            raise ValueError("window must be a positive integer")
+
+        result: Dict[int, np.ndarray] = {}
+        extend: Dict[int, Tuple[np.ndarray, int]] = {}
+        missing = []
+        for window in dict.fromkeys(windows):
+            cached = self._get(_values_key(series.version, window))
+            if cached is not None:
+                result[window] = cached
+                continue
+            base, length = self._ancestor(series, lambda version: _values_key(version, window))
+            if base is not None:
+                extend[window] = (base, length)
+            else:
+                missing.append(window)
+        if not missing and not extend:
+            return result
+
+        sums = self._sums(series)
+        if missing:
+            block = sums.rolling_std(np.asarray(missing, dtype=np.int64))
+            for window, values in zip(missing, block):
+                result[window] = self._store(series, window, values)
+        for window, (base, length) in extend.items():
+            tail = sums.rolling_std(np.asarray([window], dtype=np.int64), start=length)[0]
+            result[window] = self._store(series, window, np.concatenate((base, tail)))
+        return result
+
+    def _store(self, series: PriceSeries, window: int, values: np.ndarray) -> np.ndarray:
+        values = np.ascontiguousarray(values)
+        values.setflags(write=False)
+        self._set(_values_key(series.version, window), values, series.version)
+        return values
+
+    def preload(self, series: PriceSeries, values: Mapping[int, np.ndarray]) -> None:
+        """Seed the cache with rolling std arrays computed elsewhere, e.g. a shared dataset."""
+        for window, rolling in values.items():
+            self._set(_values_key(series.version, int(window)), rolling, series.version)
+
+    def get(self, series: PriceSeries, window: int) -> np.ndarray:
+        """Rolling std for ``window``; the preset slider windows are filled alongside."""
+        return self.rolling(series, (window,) + self.preset_windows)[window]
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+PRICES_PATH = PROCESSED_DIR / "brentoilprices_processed.csv"
+EVENTS_PATH = PROCESSED_DIR / "events.csv"
+SHARED_DATASET_DIR = PROCESSED_DIR / "shared"
+MODELS_DIR = BASE_DIR / "models"
+DEFAULT_MODEL_VERSION = "brent_cp_model_v1"
+POSTERIOR_FILENAME = "posterior.nc"
+MODEL_CACHE_BYTES = 256 * 1024 * 1024
+SHAP_ARTIFACTS_DIR = BASE_DIR / "reports" / "shap"
+PROFILE_DIR = BASE_DIR / "reports" / "profiles"
+ONLINE_STATE_PATH = MODELS_DIR / "online" / "bocpd_state.npz"
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
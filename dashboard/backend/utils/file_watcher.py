@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.fingerprint import file_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 2.0
+
+ChangeCallback = Callable[[str, str], None]
+
+
+class FileWatcher:
+    """Polls file fingerprints and calls back when a watched file changes.
+
+    Callbacks receive ``(old_version, new_version)`` as returned by
+    :func:`utils.fingerprint.file_version`, which is what the routes put into
+    ETags and cache tags, so ``cache.invalidate(old_version)`` drops exactly
+    the entries built from the previous file. Polling keeps this portable and
+    dependency-free; a check costs one ``stat`` per file.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS, hashed: bool = False) -> None:
+        self.interval = interval
+        self.hashed = hashed
+        self._versions: Dict[Path, str] = {}
+        self._callbacks: Dict[Path, List[ChangeCallback]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, path: Path | str, callback: ChangeCallback) -> None:
+        path = Path(path)
+        with self._lock:
+            if path not in self._versions:
+                self._versions[path] = file_version(path, self.hashed)
+            self._callbacks.setdefault(path, []).append(callback)
+
+    def version(self, path: Path | str) -> str:
+        """Last fingerprint seen for a watched ``path``."""
+        return self._versions[Path(path)]
+
+    def check(self) -> List[Path]:
+        """Re-fingerprint every watched file, run callbacks for changes, return changed paths."""
+        with self._lock:
+            changed = []
+            for path, old in self._versions.items():
+                new = file_version(path, self.hashed)
+                if new != old:
+                    self._versions[path] = new
+                    changed.append((path, old, new, list(self._callbacks[path])))
+
+        for path, old, new, callbacks in changed:
+            for callback in callbacks:
+                try:
+                    callback(old, new)
+                except Exception:  # pragma: no cover - a bad callback must not stop the watcher
+                    logger.exception("File change callback failed for %s", path)
+        return [path for path, *_ in changed]
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
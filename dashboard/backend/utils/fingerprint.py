@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def content_hash(path: Path | str) -> str:
+    """BLAKE2b digest of the file contents, read in chunks."""
+    hasher = hashlib.blake2b(digest_size=12)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def file_version(path: Path | str, hashed: bool = False) -> str:
+    """Cheap version tag for a file: ``mtime_ns`` and size, or ``missing``.
+
+    With ``hashed=True`` the tag is the content digest instead, so rewriting a
+    file with identical bytes keeps its version.
+    """
+    try:
+        stat = Path(path).stat()
+        if hashed:
+            return content_hash(path)
+    except FileNotFoundError:
+        return "missing"
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from flask import Response, current_app, make_response, request
+
+from utils.instrumentation import span
+
+try:  # Optional: brotli gives smaller bodies than gzip when the client accepts it.
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+CACHE_CONTROL = "no-cache"
+VERSION_SEPARATOR = ":"
+
+
+@dataclass(frozen=True)
+class EncodedResponse:
+    body: bytes
+    mimetype: str
+    content_encoding: Optional[str]
+
+
+def _compute_etag(versions: list[str]) -> str:
+    hasher = hashlib.blake2b(digest_size=12)
+    hasher.update(request.path.encode("utf-8"))
+    for key, value in sorted(request.args.items(multi=True)):
+        hasher.update(f"\0{key}={value}".encode("utf-8"))
+    for version in versions:
+        hasher.update(f"\0{version}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def version_tags(versions: Iterable[str]) -> Tuple[str, ...]:
+    """Each version and, for composite ones joined with ``:``, each component.
+
+    A source that combines several files' versions (e.g. results file and
+    artifact bundle) is then invalidated by the change of any one of them.
+    """
+    tags = []
+    for version in versions:
+        tags.append(version)
+        tags.extend(part for part in version.split(VERSION_SEPARATOR) if part)
+    return tuple(dict.fromkeys(tags))
+
+
+def _negotiate_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _encode(body: bytes, encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=5), "br"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+def _finalize(response: Response, etag: str) -> Response:
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _from_cache(entry: EncodedResponse, etag: str) -> Response:
+    response = Response(entry.body, mimetype=entry.mimetype)
+    if entry.content_encoding:
+        response.headers["Content-Encoding"] = entry.content_encoding
+    return _finalize(response, etag)
+
+
+def conditional(*sources: Callable[[], str]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Add ETag validation, compression and encoded-body caching to a GET view.
+
+    The weak ETag hashes the request path, the query arguments and the version
+    strings returned by ``sources`` (dataset or results versions). A matching
+    ``If-None-Match`` gets ``304`` before the view runs. Successful bodies are
+    compressed for the negotiated encoding and kept in the app cache under
+    ``(etag, encoding)``, so repeat requests for unchanged data skip the view
+    too. Cached bodies are tagged with the source versions and their
+    ``:``-separated components (:func:`version_tags`), so invalidating any
+    one of them drops them. If a source raises, the view runs unchanged and
+    handles the error.
+    """
+
+    def decorator(view: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                versions = [source() for source in sources]
+                etag = _compute_etag(versions)
+            except Exception:
+                return view(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                return _finalize(Response(status=304), etag)
+
+            encoding = _negotiate_encoding()
+            cache = current_app.config.get("CACHE")
+            cache_key = f"http:{etag}:{encoding}"
+            cached = cache.get(cache_key) if cache is not None else None
+            if cached is not None:
+                return _from_cache(cached, etag)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            with span("compress"):
+                body, content_encoding = _encode(response.get_data(), encoding)
+            entry = EncodedResponse(body=body, mimetype=response.mimetype, content_encoding=content_encoding)
+            if cache is not None:
+                cache.set(cache_key, entry, tags=version_tags(versions))
+            return _from_cache(entry, etag)
+
+        return wrapper
+
+    return decorator
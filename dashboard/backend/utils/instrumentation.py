@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from flask import Flask, Response, current_app, g, has_app_context, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "brent"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(256 * 4**power) for power in range(10))  # 256 B .. 64 MiB
+UNMATCHED_ROUTE = "<unmatched>"
+_CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations", "loads", "invalidations")
+_CACHE_GAUGES = ("entries", "bytes", "max_bytes")
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Prometheus-style histogram keyed by label values; observations are thread-safe."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label_names: Sequence[str]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            # One count per bucket plus +Inf, then sum and count.
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            pairs = list(zip(self.label_names, labels))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', le)])} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {_number(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Request latency, payload size and span duration histograms for one app."""
+
+    def __init__(self, prefix: str = METRIC_PREFIX) -> None:
+        self.prefix = prefix
+        self.request_seconds = Histogram(
+            f"{prefix}_http_request_duration_seconds",
+            "Time from request start to response, by route, method and status.",
+            LATENCY_BUCKETS,
+            ("route", "method", "status"),
+        )
+        self.response_bytes = Histogram(
+            f"{prefix}_http_response_size_bytes",
+            "Response body size as sent, after compression, by route.",
+            SIZE_BUCKETS,
+            ("route",),
+        )
+        self.span_seconds = Histogram(
+            f"{prefix}_span_duration_seconds",
+            "Time spent inside instrumented sections such as loading, encoding or SHAP analysis.",
+            LATENCY_BUCKETS,
+            ("span",),
+        )
+
+    def render(self, cache_stats: Optional[Mapping[str, int]] = None) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for histogram in (self.request_seconds, self.response_bytes, self.span_seconds):
+            lines.extend(histogram.render())
+        if cache_stats is not None:
+            name = f"{self.prefix}_cache"
+            for key in _CACHE_COUNTERS:
+                lines += [f"# TYPE {name}_{key}_total counter", f"{name}_{key}_total {cache_stats.get(key, 0)}"]
+            for key in _CACHE_GAUGES:
+                lines += [f"# TYPE {name}_{key} gauge", f"{name}_{key} {cache_stats.get(key, 0)}"]
+            lookups = cache_stats.get("hits", 0) + cache_stats.get("misses", 0)
+            ratio = cache_stats.get("hits", 0) / lookups if lookups else 0.0
+            lines += [
+                f"# HELP {name}_hit_ratio Share of cache lookups served from memory since start.",
+                f"# TYPE {name}_hit_ratio gauge",
+                f"{name}_hit_ratio {_number(ratio)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+@dataclass
+class RequestTiming:
+    start: float
+    spans: Dict[str, float] = field(default_factory=dict)
+
+
+def _current_timing() -> Optional[RequestTiming]:
+    return g.get("request_timing") if has_request_context() else None
+
+
+@contextmanager
+def span(name: str, metrics: Optional[MetricsRegistry] = None) -> Iterator[None]:
+    """Time a section of work; usable as ``with span("x"):`` or as a ``@span("x")`` decorator.
+
+    Inside a request the duration is added to the response's ``Server-Timing``
+    header (repeated spans with one name are summed). It is also recorded in
+    the span histogram of ``metrics``, which defaults to the current app's
+    registry; pass it explicitly from threads without an app context.
+    """
+    if metrics is None and has_app_context():
+        metrics = current_app.config.get("METRICS")
+    timing = _current_timing()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timing is not None:
+            timing.spans[name] = timing.spans.get(name, 0.0) + elapsed
+        if metrics is not None:
+            metrics.span_seconds.observe(elapsed, name)
+
+
+def server_timing(timing: RequestTiming, total: float) -> str:
+    """``Server-Timing`` header value with every span and the total, in milliseconds."""
+    entries = [f"{_TOKEN_UNSAFE.sub('_', name)};dur={seconds * 1000:.3f}" for name, seconds in timing.spans.items()]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with encoding recorded as the ``serialize`` span."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with span("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def _route_label() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+def init_instrumentation(app: Flask, profiler: Any = None) -> MetricsRegistry:
+    """Time every request of ``app``, add ``Server-Timing`` and keep metrics in ``app.config["METRICS"]``.
+
+    ``profiler`` (a :class:`utils.profiler.SlowRequestProfiler`) samples the
+    stack of each request while it runs and keeps the slow ones.
+    """
+    metrics = app.config["METRICS"] = MetricsRegistry()
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timer() -> None:
+        g.request_timing = RequestTiming(start=time.perf_counter())
+        if profiler is not None:
+            profiler.begin()
+
+    @app.after_request
+    def record_timing(response: Response) -> Response:
+        timing = _current_timing()
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.start
+        route = _route_label()
+        response.headers["Server-Timing"] = server_timing(timing, total)
+        metrics.request_seconds.observe(total, route, request.method, str(response.status_code))
+        if not response.is_streamed:
+            metrics.response_bytes.observe(float(response.calculate_content_length() or 0), route)
+        if profiler is not None:
+            profiler.end(f"{request.method} {request.path}", total)
+        return response
+
+    @app.teardown_request
+    def discard_profile(error: Optional[BaseException]) -> None:
+        # A request that raised never reaches ``after_request``.
+        if profiler is not None:
+            profiler.cancel()
+
+    return metrics
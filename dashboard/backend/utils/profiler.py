@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Optional
+
+DEFAULT_INTERVAL_MS = 5.0
+MAX_STACK_DEPTH = 128
+_FILENAME_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def fold_stack(frame: Optional[FrameType], max_depth: int = MAX_STACK_DEPTH) -> str:
+    """``root;caller;callee`` for ``frame``, one ``module:function`` per level."""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and keeps those of slow ones.
+
+    A daemon thread reads every registered request thread's stack each
+    ``interval_ms`` while any request is running. When a request finishes
+    after ``threshold_ms`` or more, its samples are written to ``output_dir``
+    in the folded format (``frame;frame;frame count`` per line) that
+    ``flamegraph.pl``, speedscope and inferno read directly.
+    """
+
+    def __init__(self, output_dir: Path | str, threshold_ms: float, interval_ms: float = DEFAULT_INTERVAL_MS) -> None:
+        self.output_dir = Path(output_dir)
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000.0
+        self._active: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> None:
+        """Start sampling the calling thread."""
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+            self._busy.set()
+
+    def _stop_sampling(self) -> Optional[Counter]:
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+            if not self._active:
+                self._busy.clear()
+            return samples
+
+    def cancel(self) -> None:
+        """Stop sampling the calling thread and drop its samples."""
+        self._stop_sampling()
+
+    def end(self, label: str, elapsed: float) -> Optional[Path]:
+        """Stop sampling the calling thread; write its stacks if the request was slow."""
+        samples = self._stop_sampling()
+        elapsed_ms = elapsed * 1000.0
+        if not samples or elapsed_ms < self.threshold_ms:
+            return None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        slug = _FILENAME_UNSAFE.sub("_", label).strip("_")[:80]
+        path = self.output_dir / f"{stamp}-{slug}-{elapsed_ms:.0f}ms.folded"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+        return path
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            self._busy.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != own:
+                        samples[fold_stack(frame)] += 1
+            del frames
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Mapping
+
+import numpy as np
+import pandas as pd
+from flask import Response, jsonify, make_response, request
+
+from utils.instrumentation import span
+
+try:  # Optional: orjson encodes NumPy arrays in C and maps NaN to null.
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+RESPONSE_FORMATS = ("records", "columnar", "arrow")
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+
+class RawJSON(str):
+    """A pre-encoded JSON fragment that :func:`dumps` splices in verbatim."""
+
+
+def _json_tokens(values: np.ndarray) -> List[str]:
+    """Encode each element of a 1-D column as a JSON token, NaN/NaT/inf as ``null``."""
+    if values.shape[0] == 0:
+        return []
+    kind = values.dtype.kind
+    if kind == "M":
+        tokens = json.dumps(np.datetime_as_string(values, unit="D").tolist())[1:-1].split(", ")
+        missing = np.isnat(values)
+    elif kind in "fiub":
+        if orjson is not None:
+            encoded = orjson.dumps(np.ascontiguousarray(values), option=orjson.OPT_SERIALIZE_NUMPY)
+            tokens = encoded.decode("utf-8")[1:-1].split(",")
+        else:
+            tokens = json.dumps(values.tolist())[1:-1].split(", ")
+        missing = ~np.isfinite(values) if kind == "f" else None
+    else:
+        items = values.tolist()
+        missing = pd.isna(values)
+        tokens = [json.dumps(item, default=str) for item in items]
+
+    if missing is not None and missing.any():
+        column = np.array(tokens, dtype=object)
+        column[missing] = "null"
+        tokens = column.tolist()
+    return tokens
+
+
+def frame_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Column arrays of ``df`` in order, without copying where pandas allows."""
+    return {str(name): df[name].to_numpy() for name in df.columns}
+
+
+def records_json(columns: Mapping[str, np.ndarray]) -> RawJSON:
+    """``[{"col": value, ...}, ...]`` built from per-column tokens, not per-row dicts."""
+    if not columns:
+        return RawJSON("[]")
+    names = list(columns)
+    fields = (json.dumps(name).replace("{", "{{").replace("}", "}}") + ":{}" for name in names)
+    template = "{{" + ",".join(fields) + "}}"
+    tokens = [_json_tokens(np.asarray(columns[name])) for name in names]
+    return RawJSON("[" + ",".join(map(template.format, *tokens)) + "]")
+
+
+def columnar_json(columns: Mapping[str, np.ndarray]) -> RawJSON:
+    """``{"col": [values, ...], ...}``."""
+    body = ",".join(
+        f"{json.dumps(name)}:[{','.join(_json_tokens(np.asarray(values)))}]" for name, values in columns.items()
+    )
+    return RawJSON("{" + body + "}")
+
+
+def arrow_ipc(columns: Mapping[str, np.ndarray], metadata: Mapping[str, Any] | None = None) -> bytes:
+    """Serialize the columns as an Arrow IPC stream; ``metadata`` goes into the schema."""
+    import pyarrow as pa
+
+    table = pa.table({name: np.asarray(values) for name, values in columns.items()})
+    if metadata:
+        table = table.replace_schema_metadata({"meta": json.dumps(metadata, default=str)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _nested_lists(values: np.ndarray) -> List[Any]:
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        missing = ~np.isfinite(values)
+        if missing.any():
+            values = values.astype(object)
+            values[missing] = None
+    return values.tolist()
+
+
+def _encode_array(values: np.ndarray) -> str:
+    if orjson is not None and values.dtype.kind in "fiub":
+        return orjson.dumps(np.ascontiguousarray(values), option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(_nested_lists(values), separators=(",", ":"))
+
+
+def matrix_rows_json(values: np.ndarray) -> List[RawJSON]:
+    """One ``[v, ...]`` fragment per row of a 2-D array, NaN/inf as ``null``."""
+    return [RawJSON(_encode_array(row)) for row in np.asarray(values)]
+
+
+def matrix_json(values: np.ndarray) -> RawJSON:
+    """``[[v, ...], ...]`` for a 2-D array, encoded in one call."""
+    return RawJSON(_encode_array(np.asarray(values)))
+
+
+def dumps(payload: Any) -> str:
+    """``json.dumps`` that passes :class:`RawJSON` fragments through untouched."""
+    if isinstance(payload, RawJSON):
+        return str(payload)
+    if isinstance(payload, dict):
+        return "{" + ",".join(f"{json.dumps(str(key))}:{dumps(value)}" for key, value in payload.items()) + "}"
+    if isinstance(payload, (list, tuple)):
+        return "[" + ",".join(dumps(item) for item in payload) + "]"
+    return json.dumps(payload, separators=(",", ":"), default=str)
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    with span("serialize"):
+        body = dumps(payload)
+    return Response(body, status=status, mimetype="application/json")
+
+
+def columns_response(
+    columns: Mapping[str, np.ndarray], meta: Dict[str, Any], data_key: str = "data"
+) -> Response:
+    """Respond with ``columns`` under ``data_key`` next to ``meta``.
+
+    ``?format=records`` (default) keeps the row-object shape the dashboard
+    reads today, ``format=columnar`` returns one array per column and
+    ``format=arrow`` returns an Arrow IPC stream with ``meta`` in the schema.
+    """
+    fmt = request.args.get("format", "records")
+    if fmt not in RESPONSE_FORMATS:
+        return make_response(jsonify({"error": f"format must be one of {RESPONSE_FORMATS}"}), 400)
+    if fmt == "arrow":
+        try:
+            with span("serialize"):
+                body = arrow_ipc(columns, meta)
+        except ImportError:
+            return make_response(jsonify({"error": "Arrow output requires pyarrow"}), 406)
+        return Response(body, mimetype=ARROW_MIMETYPE)
+
+    encode = records_json if fmt == "records" else columnar_json
+    payload = dict(meta)
+    with span("serialize"):
+        payload[data_key] = encode(columns)
+    return json_response(payload)
@@ -60,14 +60,23 @@ const Dashboard = () => {
 
   useEffect(() => {
     const selectedDate = selectedEvent?.date || clickedDate;
+    let cancelled = false;
     const fetchShap = async () => {
       const query = selectedDate ? `?selected_date=${encodeURIComponent(selectedDate)}` : "";
-      const shapRes = await API.get(`/change-points/shap${query}`);
-      setShapData(shapRes.data || {});
+      let shapRes = await API.get(`/change-points/shap${query}`);
+      // A 202 means the plots are being computed; poll the job until it finishes.
+      while (shapRes.status === 202 && !cancelled) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        shapRes = await API.get(`/change-points/shap/jobs/${shapRes.data.job_id}`);
+      }
+      if (!cancelled) setShapData(shapRes.data || {});
     };
     fetchShap().catch(() => {
-      setShapData({ global_plot_b64: null, local_plot_b64: null });
+      if (!cancelled) setShapData({ global_plot_b64: null, local_plot_b64: null });
     });
+    return () => {
+      cancelled = true;
+    };
   }, [selectedEvent, clickedDate]);
 
   const handleFilterChange = async (filters) => {
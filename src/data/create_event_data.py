@@ -5,7 +5,7 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 OUTPUT_PATH = PROJECT_ROOT / "data" / "processed" / "events2.csv"
 
-def create_events_dataset():
+def create_events_dataset(output_path=OUTPUT_PATH):
     events = [
         ("1990-08-02", "Gulf War invasion of Kuwait", "Geopolitical Conflict"),
         ("1997-07-02", "Asian Financial Crisis", "Economic Shock"),
@@ -30,12 +30,12 @@ def create_events_dataset():
     if len(df) < 10:
         raise ValueError("Event dataset must contain at least 10 events.")
 
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(OUTPUT_PATH, index=False)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output_path, index=False)
 
     return df
 
 if __name__ == "__main__":
     create_events_dataset()
-
-print("events2.csv saved successfully.")
+    print("events2.csv saved successfully.")
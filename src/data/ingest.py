@@ -0,0 +1,238 @@
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+RAW_PRICES_PATH = PROJECT_ROOT / "data" / "raw" / "BrentOilPrices.csv"
+PRICE_STORE_DIR = PROJECT_ROOT / "data" / "processed" / "brent_prices"
+
+# Formats seen in the raw file, most common first; anything else falls back to pandas' inference.
+DATE_FORMATS = ("%d-%b-%y", "%b %d, %Y", "%Y-%m-%d")
+COLUMNS = {"Date": "int64", "Price": "float64", "log_price": "float64", "log_return": "float64"}
+META_FILE = "meta.json"
+_DIGEST_CHUNK = 1 << 20
+
+
+def parse_dates(values):
+    """
+    Parse date strings that mix several formats.
+
+    The format of the first value not parsed yet is detected from
+    ``DATE_FORMATS`` and applied in one vectorized pass over every remaining
+    value, so a file in a handful of formats costs a handful of passes
+    instead of per-value inference. Values no listed format matches fall
+    back to pandas' inference.
+
+    Returns
+    -------
+    pd.Series
+        ``datetime64[ns]`` values; ``NaT`` where nothing matched.
+    """
+    values = pd.Series(values).astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    remaining = values.notna()
+    formats = list(DATE_FORMATS)
+    while remaining.any() and formats:
+        probe = values[remaining].iloc[:1]
+        fmt = next((f for f in formats if pd.to_datetime(probe, format=f, errors="coerce").notna().all()), None)
+        if fmt is None:
+            break
+        formats.remove(fmt)
+        parsed[remaining] = pd.to_datetime(values[remaining], format=fmt, errors="coerce")
+        remaining &= parsed.isna()
+    if remaining.any():
+        parsed[remaining] = pd.to_datetime(values[remaining], format="mixed", errors="coerce")
+    return parsed
+
+
+def _column_path(store_dir, name):
+    return Path(store_dir) / f"{name}.bin"
+
+
+def read_meta(store_dir):
+    path = Path(store_dir) / META_FILE
+    return json.loads(path.read_text()) if path.is_file() else None
+
+
+def _write_meta(store_dir, meta):
+    path = Path(store_dir) / META_FILE
+    tmp = path.with_name(f".{META_FILE}.tmp")
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, path)
+
+
+def _prefix_digest(raw, offset):
+    """Digest of the first ``offset`` source bytes, to check the source was only appended to."""
+    hasher = hashlib.blake2b(digest_size=16)
+    raw.seek(0)
+    remaining = offset
+    while remaining > 0:
+        block = raw.read(min(_DIGEST_CHUNK, remaining))
+        if not block:
+            break
+        hasher.update(block)
+        remaining -= len(block)
+    return hasher.hexdigest()
+
+
+def _parse_rows(header, chunk):
+    frame = pd.read_csv(io.BytesIO(header + chunk), dtype={"Date": "string"})
+    if "Date" not in frame.columns or "Price" not in frame.columns:
+        raise ValueError("Required columns missing: Date, Price")
+    dates = parse_dates(frame["Date"])
+    if dates.isna().any():
+        bad = frame.loc[dates.isna(), "Date"].head(3).tolist()
+        raise ValueError(f"Unparseable dates in price file: {bad}")
+    prices = pd.to_numeric(frame["Price"], errors="coerce").to_numpy(dtype="float64")
+    return dates.to_numpy(dtype="datetime64[ns]"), prices
+
+
+def _columns(dates, prices, previous_price=np.nan):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_price = np.log(prices)
+        log_return = np.diff(np.concatenate(([np.log(previous_price)], log_price)))
+    return {
+        "Date": dates.view("int64"),
+        "Price": prices,
+        "log_price": log_price,
+        "log_return": log_return,
+    }
+
+
+def _append_columns(store_dir, rows, columns):
+    for name, dtype in COLUMNS.items():
+        path = _column_path(store_dir, name)
+        with open(path, "ab") as handle:
+            # Drop bytes left by an append that stopped before updating the metadata.
+            handle.truncate(rows * np.dtype(dtype).itemsize)
+            handle.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+
+def ingest_prices(raw_path=RAW_PRICES_PATH, store_dir=PRICE_STORE_DIR):
+    """
+    Bring the columnar price store up to date with the raw CSV.
+
+    Only complete lines added to ``raw_path`` since the last run are parsed
+    and appended to one binary file per column (``Date`` as int64 nanoseconds,
+    ``Price``, ``log_price`` and ``log_return`` as float64). The metadata,
+    written last and atomically, records how many rows and source bytes are
+    complete, so an interrupted run is simply redone. If the source was
+    edited rather than appended to, or new rows are not newer than the
+    stored ones, the store is rebuilt from scratch.
+
+    Returns
+    -------
+    int
+        Number of rows added (all rows after a rebuild).
+    """
+    raw_path, store_dir = Path(raw_path), Path(store_dir)
+    if not raw_path.exists():
+        raise FileNotFoundError(f"Price data not found at {raw_path}")
+    store_dir.mkdir(parents=True, exist_ok=True)
+    meta = read_meta(store_dir)
+    size = raw_path.stat().st_size
+
+    with open(raw_path, "rb") as raw:
+        header = raw.readline()
+        if (
+            meta is not None
+            and meta["source"] == str(raw_path)
+            and meta["header"] == header.decode("utf-8")
+            and meta["source_offset"] <= size
+            and _prefix_digest(raw, meta["source_offset"]) == meta["source_digest"]
+        ):
+            if meta["source_offset"] == size:
+                return 0
+            offset = meta["source_offset"]
+            raw.seek(offset)
+            chunk = raw.read()
+            chunk = chunk[: chunk.rfind(b"\n") + 1]
+            if not chunk.strip():
+                return 0
+            rows = meta["rows"]
+            stored = load_price_columns(store_dir)
+            last_date = stored["Date"][-1] if rows else None
+            last_price = float(stored["Price"][-1]) if rows else np.nan
+            del stored
+            dates, prices = _parse_rows(header, chunk)
+            ordered = np.all(dates[1:] >= dates[:-1]) and (last_date is None or dates[0] > last_date)
+            if ordered:
+                _append_columns(store_dir, rows, _columns(dates, prices, last_price))
+                offset += len(chunk)
+                _write_meta(
+                    store_dir,
+                    {
+                        **meta,
+                        "rows": rows + len(dates),
+                        "source_offset": offset,
+                        "source_digest": _prefix_digest(raw, offset),
+                        "version": hashlib.blake2b(meta["version"].encode("utf-8") + chunk, digest_size=8).hexdigest(),
+                    },
+                )
+                return len(dates)
+
+        raw.seek(0)
+        content = raw.read()
+        content = content[: content.rfind(b"\n") + 1]
+        body = content[len(header):]
+        dates, prices = _parse_rows(header, body)
+        order = np.argsort(dates, kind="stable")
+        dates, prices = dates[order], prices[order]
+        # Readers see no store rather than a half-written one while it is rebuilt.
+        (store_dir / META_FILE).unlink(missing_ok=True)
+        for name in COLUMNS:
+            _column_path(store_dir, name).unlink(missing_ok=True)
+        _append_columns(store_dir, 0, _columns(dates, prices))
+        _write_meta(
+            store_dir,
+            {
+                "source": str(raw_path),
+                "header": header.decode("utf-8"),
+                "rows": int(len(dates)),
+                "columns": COLUMNS,
+                "source_offset": len(content),
+                "source_digest": _prefix_digest(raw, len(content)),
+                "version": hashlib.blake2b(content, digest_size=8).hexdigest(),
+            },
+        )
+        return len(dates)
+
+
+def load_price_columns(store_dir=PRICE_STORE_DIR):
+    """
+    Memory-map the columnar price store read-only.
+
+    Returns
+    -------
+    dict
+        ``Date`` (``datetime64[ns]``), ``Price``, ``log_price`` and
+        ``log_return`` arrays backed by the files, so pages are only read
+        when touched and are shared between processes.
+    """
+    meta = read_meta(store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No ingested price data in {store_dir}")
+    rows = meta["rows"]
+    columns = {}
+    for name, dtype in COLUMNS.items():
+        if rows == 0:
+            values = np.empty(0, dtype=dtype)
+        else:
+            values = np.memmap(_column_path(store_dir, name), dtype=dtype, mode="r", shape=(rows,))
+        columns[name] = values.view("datetime64[ns]") if name == "Date" else values
+    return columns
+
+
+def price_frame(store_dir=PRICE_STORE_DIR):
+    """The columnar store as a DataFrame with ``Date``, ``Price``, ``log_price`` and ``log_return``."""
+    return pd.DataFrame(load_price_columns(store_dir), copy=False)
+
+
+if __name__ == "__main__":
+    added = ingest_prices()
+    print(f"Ingested {added} new rows into {PRICE_STORE_DIR}")
@@ -1,15 +1,45 @@
 # src/data_loader.py
+from pathlib import Path
+
 import pandas as pd
 
+from src.data.ingest import PRICE_STORE_DIR, RAW_PRICES_PATH, ingest_prices, parse_dates, price_frame
+
+
 def load_price_data(path):
     try:
         df = pd.read_csv(path)
         if "Date" not in df.columns or "Price" not in df.columns:
             raise ValueError("Required columns missing: Date, Price")
 
-        df["Date"] = pd.to_datetime(df["Date"])
+        df["Date"] = parse_dates(df["Date"])
         df = df.sort_values("Date")
         return df
 
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {path}")
+
+
+def load_prices(path=RAW_PRICES_PATH, store_dir=None):
+    """
+    Prices with ``log_price`` and ``log_return``, read from the columnar store.
+
+    The store (``<csv stem>.columns`` next to the CSV, or
+    ``data/processed/brent_prices`` for the raw Brent file) is brought up to
+    date first, which only parses rows added since the last load; the
+    columns are then memory-mapped rather than re-read.
+    """
+    path = Path(path)
+    if store_dir is None:
+        store_dir = PRICE_STORE_DIR if path == RAW_PRICES_PATH else path.with_name(f"{path.stem}.columns")
+    ingest_prices(path, store_dir)
+    return price_frame(store_dir)
+
+
+def load_events(path):
+    """Events CSV with every ``date`` / ``*_date`` column parsed to datetimes."""
+    events = pd.read_csv(path)
+    for column in events.columns:
+        if column == "date" or column.endswith("_date"):
+            events[column] = parse_dates(events[column])
+    return events
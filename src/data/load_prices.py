@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
+from src.data.ingest import parse_dates
+
 def load_price_data(filepath: str) -> pd.DataFrame:
     path = Path(filepath)
 
@@ -13,7 +15,7 @@ def load_price_data(filepath: str) -> pd.DataFrame:
     if not required_cols.issubset(df.columns):
         raise ValueError(f"Dataset must contain columns: {required_cols}")
 
-    df["Date"] = pd.to_datetime(df["Date"], format="%d-%b-%y", errors="coerce")
+    df["Date"] = parse_dates(df["Date"])
 
     if df["Date"].isnull().any():
         raise ValueError("Date parsing failed for some rows.")
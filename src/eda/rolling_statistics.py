@@ -1,14 +1,17 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(script_dir))
 data_path = os.path.join(project_root, "data", "raw", "BrentOilPrices.csv")
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
-df = pd.read_csv(data_path)
-df["Date"] = pd.to_datetime(df["Date"], format="mixed")
-df = df.sort_values("Date")
+from src.data.load_data import load_prices
+
+df = load_prices(data_path)
 
 df["rolling_mean"] = df["Price"].rolling(window=365).mean()
 df["rolling_std"] = df["Price"].rolling(window=365).std()
@@ -0,0 +1,308 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.models.exact_change_point import exact_change_point_posterior, posterior_results
+from src.models.segmentation import detect_change_points, segmentation_results
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_PRICES_PATH = PROJECT_ROOT / "data" / "processed" / "brentoilprices_processed.csv"
+DEFAULT_EVENTS_PATH = PROJECT_ROOT / "data" / "processed" / "events2.csv"
+DEFAULT_STORE_DIR = PROJECT_ROOT / "reports" / "batch"
+METHODS = ("mcmc", "exact", "pelt", "binseg")
+# Fits a worker runs before it is replaced, which returns any memory it held.
+MAX_TASKS_PER_WORKER = 8
+
+_WORKER_DATA = {}
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """A named ``[start, end]`` date range (inclusive, ``YYYY-MM-DD``) to fit."""
+
+    name: str
+    start: str
+    end: str
+
+
+def rolling_windows(dates, length, step):
+    """Windows of ``length`` rows whose origin moves forward ``step`` rows at a time."""
+    dates = pd.to_datetime(pd.Series(dates)).dt.strftime("%Y-%m-%d").tolist()
+    return [
+        WindowSpec(f"rolling_{dates[lo]}", dates[lo], dates[lo + length - 1])
+        for lo in range(0, len(dates) - length + 1, step)
+    ]
+
+
+def calendar_windows(dates, years=10):
+    """Consecutive windows of ``years`` calendar years (per decade by default)."""
+    dates = pd.to_datetime(pd.Series(dates))
+    first = dates.min().year // years * years
+    windows = []
+    for start in range(first, dates.max().year + 1, years):
+        last = start + years - 1
+        name = f"{start}s" if years == 10 else f"{start}-{last}"
+        windows.append(WindowSpec(name, f"{start}-01-01", f"{last}-12-31"))
+    return windows
+
+
+def event_windows(events, days_before=180, days_after=180):
+    """One window around each event; ``events`` has ``date`` and ``event`` columns."""
+    windows = []
+    for date, name in zip(pd.to_datetime(events["date"]), events["event"]):
+        windows.append(
+            WindowSpec(
+                f"event_{date:%Y-%m-%d}_{name}",
+                (date - pd.Timedelta(days=days_before)).strftime("%Y-%m-%d"),
+                (date + pd.Timedelta(days=days_after)).strftime("%Y-%m-%d"),
+            )
+        )
+    return windows
+
+
+def allocate_cores(n_windows, n_cores, chains):
+    """
+    Split ``n_cores`` between concurrent fits and the chains inside each fit.
+
+    With more windows than cores every core runs its own fit and samples its
+    chains one after another; with fewer, the spare cores go to sampling
+    chains in parallel.
+
+    Returns
+    -------
+    (int, int)
+        Pool size and ``cores`` passed to each MCMC fit.
+    """
+    workers = max(1, min(n_windows, n_cores))
+    return workers, max(1, min(chains, n_cores // workers))
+
+
+def _window_slice(values, dates, spec):
+    lo = int(np.searchsorted(dates, np.datetime64(spec.start, "ns"), "left"))
+    hi = int(np.searchsorted(dates, np.datetime64(spec.end, "ns"), "right"))
+    return values[lo:hi], dates[lo:hi]
+
+
+def result_key(values, dates, config):
+    """Hash of the window's data and the fit config, used as the result's file name."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(np.ascontiguousarray(dates).view("int64").tobytes())
+    hasher.update(np.ascontiguousarray(values).tobytes())
+    hasher.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _mcmc_summary(values, dates, config, cores):
+    from src.models.change_point import fit_mean_change_point_model, tau_posterior
+
+    _, trace = fit_mean_change_point_model(
+        values,
+        draws=config.get("draws", 1000),
+        tune=config.get("tune", 1000),
+        random_seed=config.get("random_seed"),
+        chains=config.get("chains", 4),
+        cores=cores,
+        marginalize=True,
+    )
+    probabilities = tau_posterior(values, trace)
+    tau = int(np.argmax(probabilities))
+    posterior = trace.posterior
+    return {
+        "tau_index": tau,
+        "tau_date": str(np.datetime_as_string(dates[tau], unit="D")),
+        "tau_probability": float(probabilities[tau]),
+        **{
+            f"{name}_{stat}": float(getattr(posterior[name], stat)())
+            for name in ("mu_1", "mu_2", "sigma")
+            for stat in ("mean", "std")
+        },
+    }
+
+
+def fit_window(values, dates, config, cores=1):
+    """
+    Fit one window with ``config["method"]`` and return a JSON-ready summary.
+
+    ``exact``, ``pelt`` and ``binseg`` respond in the
+    ``change_point_results.json`` schema; ``mcmc`` fits the mean-shift model
+    and summarises its posterior.
+    """
+    method = config.get("method", "exact")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Use one of {METHODS}.")
+    if method == "mcmc":
+        return _mcmc_summary(values, dates, config, cores)
+    if method == "exact":
+        posterior = exact_change_point_posterior(
+            values, max_change_points=config.get("max_change_points", 5), min_size=config.get("min_size", 5)
+        )
+        return posterior_results(values, dates, posterior)
+    breaks = detect_change_points(
+        values,
+        method=method,
+        cost=config.get("cost", "meanvar"),
+        penalty=config.get("penalty", "bic"),
+        min_size=config.get("min_size", 5),
+        max_change_points=config.get("max_change_points"),
+    )
+    return segmentation_results(values, dates, breaks)
+
+
+def _init_worker(values, dates):
+    # Each worker receives the series once instead of once per window.
+    _WORKER_DATA["values"], _WORKER_DATA["dates"] = values, dates
+
+
+def _run_window(spec, config, cores, key, store_dir):
+    values, dates = _window_slice(_WORKER_DATA["values"], _WORKER_DATA["dates"], spec)
+    started = time.perf_counter()
+    result = fit_window(values, dates, config, cores)
+    record = {
+        "key": key,
+        "window": asdict(spec),
+        "config": config,
+        "n_observations": int(len(values)),
+        "elapsed_seconds": time.perf_counter() - started,
+        "result": result,
+    }
+    _write_json(Path(store_dir) / f"{key}.json", record)
+    return key
+
+
+def _write_json(path, record):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(record, indent=2))
+    os.replace(tmp, path)
+
+
+def load_results(store_dir=DEFAULT_STORE_DIR):
+    """Every stored result, keyed by its data + config hash."""
+    return {path.stem: json.loads(path.read_text()) for path in sorted(Path(store_dir).glob("*.json"))}
+
+
+def run_batch(values, dates, windows, config, store_dir=DEFAULT_STORE_DIR, n_cores=None, on_result=None):
+    """
+    Fit every window across a process pool and store each result as it finishes.
+
+    Results are written atomically to ``store_dir/<key>.json``, where ``key``
+    hashes the window's data and ``config``, so windows already computed are
+    skipped and an interrupted sweep resumes where it stopped. At most two
+    fits per worker are queued at once and workers are recycled after
+    ``MAX_TASKS_PER_WORKER`` fits, which keeps memory bounded on long sweeps.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Series to fit (e.g. log returns); rows that are not finite are dropped.
+    dates : np.ndarray
+        Date of each value.
+    windows : list of WindowSpec
+    config : dict
+        ``method`` (one of ``METHODS``) plus its options, e.g. ``draws``,
+        ``tune`` and ``chains`` for ``mcmc`` or ``penalty`` for ``pelt``.
+    store_dir : str or Path
+    n_cores : int, optional
+        Cores to use; all of them by default.
+    on_result : callable, optional
+        Called with ``(spec, key, skipped)`` as each window completes.
+
+    Returns
+    -------
+    dict
+        ``{window name: result key}`` for every window with enough data.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+    finite = np.isfinite(values)
+    values, dates = values[finite], dates[finite]
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    keys, pending = {}, []
+    for spec in windows:
+        window_values, window_dates = _window_slice(values, dates, spec)
+        if len(window_values) < 2 * config.get("min_size", 5):
+            continue
+        key = keys[spec.name] = result_key(window_values, window_dates, config)
+        if (store_dir / f"{key}.json").exists():
+            if on_result is not None:
+                on_result(spec, key, True)
+        else:
+            pending.append((spec, key))
+    if not pending:
+        return keys
+
+    workers, cores = allocate_cores(len(pending), n_cores or os.cpu_count() or 1, config.get("chains", 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(values, dates),
+        max_tasks_per_child=MAX_TASKS_PER_WORKER,
+    ) as pool:
+        queue = iter(pending)
+        running = {}
+
+        def top_up():
+            for spec, key in queue:
+                running[pool.submit(_run_window, spec, config, cores, key, str(store_dir))] = spec
+                if len(running) >= 2 * workers:
+                    break
+
+        top_up()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                spec = running.pop(future)
+                key = future.result()
+                if on_result is not None:
+                    on_result(spec, key, False)
+            top_up()
+    return keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit change-point models over many windows in parallel.")
+    parser.add_argument("--windows", choices=("rolling", "decade", "events"), default="decade")
+    parser.add_argument("--length", type=int, default=1000, help="Rolling window length in rows.")
+    parser.add_argument("--step", type=int, default=250, help="Rolling origin step in rows.")
+    parser.add_argument("--days", type=int, default=180, help="Days on each side of an event.")
+    parser.add_argument("--method", choices=METHODS, default="exact")
+    parser.add_argument("--draws", type=int, default=1000)
+    parser.add_argument("--tune", type=int, default=1000)
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--cores", type=int, default=None)
+    parser.add_argument("--prices", default=str(DEFAULT_PRICES_PATH))
+    parser.add_argument("--events", default=str(DEFAULT_EVENTS_PATH))
+    parser.add_argument("--store", default=str(DEFAULT_STORE_DIR))
+    args = parser.parse_args(argv)
+
+    prices = pd.read_csv(args.prices, parse_dates=["Date"]).sort_values("Date")
+    if "log_return" not in prices.columns:
+        prices["log_return"] = np.log(prices["Price"]).diff()
+    if args.windows == "rolling":
+        windows = rolling_windows(prices["Date"], args.length, args.step)
+    elif args.windows == "decade":
+        windows = calendar_windows(prices["Date"])
+    else:
+        windows = event_windows(pd.read_csv(args.events), args.days, args.days)
+
+    config = {"method": args.method}
+    if args.method == "mcmc":
+        config.update(draws=args.draws, tune=args.tune, chains=args.chains)
+
+    def report(spec, key, skipped):
+        print(f"{'skipped' if skipped else 'done':>7}  {spec.name}  {key}")
+
+    run_batch(prices["log_return"], prices["Date"], windows, config, args.store, args.cores, report)
+
+
+if __name__ == "__main__":
+    main()
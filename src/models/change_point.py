@@ -3,8 +3,97 @@ import pymc as pm
 import pytensor
 pytensor.config.cxx = ""
 
+TAU_DRAW_CHUNK = 256
 
-def fit_mean_change_point_model(returns, draws=10, tune=10):
+
+def _prefix_sums(returns):
+    """Counts and running sums of y and y**2 up to and including each position."""
+    counts = np.arange(1, len(returns) + 1, dtype=np.float64)
+    return counts, np.cumsum(returns), np.cumsum(returns ** 2)
+
+
+def _tau_log_likelihood(prefix, mu_1, mu_2, sigma, math=np):
+    """
+    Log-likelihood of the series for every tau, from prefix sums.
+
+    Observations ``t <= tau`` follow ``Normal(mu_1, sigma)`` and the rest
+    ``Normal(mu_2, sigma)``, so each segment's sum of squared residuals is
+    ``S2 - 2 mu S1 + k mu**2`` and all n values come from a few vector
+    operations. ``math`` is ``numpy`` for posterior draws (parameters shaped
+    ``(m, 1)`` give an ``(m, n)`` result) or ``pm.math`` inside a model.
+    """
+    counts, s1, s2 = prefix
+    n = counts[-1]
+    before = s2 - 2.0 * mu_1 * s1 + counts * mu_1 ** 2
+    after = (s2[-1] - s2) - 2.0 * mu_2 * (s1[-1] - s1) + (n - counts) * mu_2 ** 2
+    return -0.5 * n * math.log(2.0 * np.pi * sigma ** 2) - (before + after) / (2.0 * sigma ** 2)
+
+
+def _tau_conditionals(prefix, mu_1, mu_2, sigma, tau_bounds=None):
+    """p(tau | mu_1, mu_2, sigma, y) for each posterior draw, shape (m, n)."""
+    log_lik = _tau_log_likelihood(prefix, mu_1[:, None], mu_2[:, None], sigma[:, None])
+    if tau_bounds is not None:
+        lower, upper = tau_bounds
+        log_lik[:, :lower] = -np.inf
+        log_lik[:, upper + 1 :] = -np.inf
+    log_lik -= log_lik.max(axis=1, keepdims=True)
+    weights = np.exp(log_lik)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def tau_posterior(returns, trace):
+    """
+    Exact marginal posterior of tau from a marginalized fit.
+
+    With tau summed out, ``p(tau | y)`` is the average over posterior draws of
+    ``p(tau | mu_1, mu_2, sigma, y)``, which is computed exactly for every
+    position rather than estimated from sampled tau values.
+
+    Returns
+    -------
+    np.ndarray
+        Probability of each tau position; sums to 1.
+    """
+    prefix = _prefix_sums(np.asarray(returns, dtype=np.float64))
+    posterior = trace.posterior
+    mu_1 = posterior["mu_1"].values.reshape(-1)
+    mu_2 = posterior["mu_2"].values.reshape(-1)
+    sigma = posterior["sigma"].values.reshape(-1)
+    tau_bounds = posterior.attrs.get("tau_bounds")
+
+    total = np.zeros(len(prefix[0]))
+    for start in range(0, len(mu_1), TAU_DRAW_CHUNK):
+        stop = start + TAU_DRAW_CHUNK
+        conditionals = _tau_conditionals(prefix, mu_1[start:stop], mu_2[start:stop], sigma[start:stop], tau_bounds)
+        total += conditionals.sum(axis=0)
+    return total / len(mu_1)
+
+
+def _add_tau_draws(trace, prefix, tau_bounds=None, random_seed=None):
+    """Draw tau from its exact conditional for each posterior draw and store it in the trace."""
+    rng = np.random.default_rng(random_seed)
+    posterior = trace.posterior
+    shape = posterior["mu_1"].shape
+    mu_1 = posterior["mu_1"].values.reshape(-1)
+    mu_2 = posterior["mu_2"].values.reshape(-1)
+    sigma = posterior["sigma"].values.reshape(-1)
+
+    tau = np.empty(len(mu_1), dtype=np.int64)
+    for start in range(0, len(mu_1), TAU_DRAW_CHUNK):
+        stop = start + TAU_DRAW_CHUNK
+        conditionals = _tau_conditionals(prefix, mu_1[start:stop], mu_2[start:stop], sigma[start:stop], tau_bounds)
+        cdf = np.cumsum(conditionals, axis=1)
+        u = rng.random((cdf.shape[0], 1)) * cdf[:, -1:]
+        tau[start:stop] = np.minimum((cdf < u).sum(axis=1), cdf.shape[1] - 1)
+    posterior["tau"] = (("chain", "draw"), tau.reshape(shape))
+    if tau_bounds is not None:
+        posterior.attrs["tau_bounds"] = [int(tau_bounds[0]), int(tau_bounds[1])]
+    return trace
+
+
+def fit_mean_change_point_model(
+    returns, draws=10, tune=10, marginalize=False, random_seed=None, tau_bounds=None, chains=None, cores=None
+):
     """
     Fits a Bayesian change point model with a mean shift.
 
@@ -16,22 +105,69 @@ def fit_mean_change_point_model(returns, draws=10, tune=10):
         Number of posterior samples
     tune : int
         Number of tuning steps
+    marginalize : bool
+        Sum the discrete tau out of the likelihood (log-sum-exp over every
+        position) so NUTS samples a fully continuous model, then draw tau
+        from its exact conditional for each posterior draw. ``False``
+        (default) samples tau directly with a compound Metropolis + NUTS
+        step, as the fits behind the saved results did.
+    random_seed : int, optional
+        Seed for the sampler and the tau draws.
+    tau_bounds : tuple of int, optional
+        Inclusive ``(lower, upper)`` range for tau's uniform prior, e.g. from
+        ``src.models.segmentation.tau_prior_bounds``. Defaults to the whole
+        series.
+    chains, cores : int, optional
+        Number of chains and of processes sampling them; PyMC's defaults when
+        omitted. Batch runs pass ``cores=1`` so each pool worker samples its
+        chains in-process.
 
     Returns
     -------
     model : pm.Model
     trace : arviz.InferenceData
+        ``trace.posterior`` holds ``tau``, ``mu_1``, ``mu_2`` and ``sigma``
+        either way; use ``tau_posterior`` for the exact tau probabilities of
+        a marginalized fit.
     """
 
     if len(returns) < 30:
         raise ValueError("Time series too short for change point modeling.")
 
-    returns = np.asarray(returns)
+    returns = np.asarray(returns, dtype=np.float64)
     n = len(returns)
     time_idx = np.arange(n)
+    lower, upper = (0, n - 1) if tau_bounds is None else (int(tau_bounds[0]), int(tau_bounds[1]))
+    if not 0 <= lower <= upper <= n - 1:
+        raise ValueError("tau_bounds must satisfy 0 <= lower <= upper < len(returns).")
+
+    if marginalize:
+        prefix = _prefix_sums(returns)
+        with pm.Model() as model:
+            mu_1 = pm.Normal("mu_1", mu=0, sigma=1)
+            mu_2 = pm.Normal("mu_2", mu=0, sigma=1)
+
+            sigma = pm.HalfNormal("sigma", sigma=1)
+
+            # Uniform prior over tau: log p(y) = logsumexp_tau log p(y | tau) - log(#taus).
+            log_lik = _tau_log_likelihood(prefix, mu_1, mu_2, sigma, math=pm.math)[lower : upper + 1]
+            pm.Potential("obs", pm.math.logsumexp(log_lik, keepdims=False) - np.log(upper - lower + 1))
+
+            trace = pm.sample(
+                draws=draws,
+                tune=tune,
+                target_accept=0.9,
+                return_inferencedata=True,
+                progressbar=True,
+                random_seed=random_seed,
+                chains=chains,
+                cores=cores,
+            )
+
+        return model, _add_tau_draws(trace, prefix, tau_bounds, random_seed)
 
     with pm.Model() as model:
-        tau = pm.DiscreteUniform("tau", lower=0, upper=n - 1)
+        tau = pm.DiscreteUniform("tau", lower=lower, upper=upper)
 
         mu_1 = pm.Normal("mu_1", mu=0, sigma=1)
         mu_2 = pm.Normal("mu_2", mu=0, sigma=1)
@@ -47,7 +183,10 @@ def fit_mean_change_point_model(returns, draws=10, tune=10):
             tune=tune,
             target_accept=0.9,
             return_inferencedata=True,
-            progressbar=True
+            progressbar=True,
+            random_seed=random_seed,
+            chains=chains,
+            cores=cores,
         )
 
     return model, trace
@@ -0,0 +1,294 @@
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.special import gammaln
+
+from src.models.segmentation import segmentation_results
+
+
+class NormalInverseGammaSegments:
+    """
+    Log marginal likelihood of a segment under a Normal-Inverse-Gamma prior.
+
+    Each segment has its own mean and variance with
+    ``mu | sigma**2 ~ Normal(mu0, sigma**2 / kappa0)`` and
+    ``sigma**2 ~ InverseGamma(alpha0, beta0)``; both are integrated out
+    analytically. ``log_marginal(s, e)`` scores ``values[s:e]`` in O(1) from
+    prefix sums and broadcasts over arrays of ``s`` and ``e``.
+    """
+
+    def __init__(self, values, mu0=None, kappa0=1.0, alpha0=2.0, beta0=None):
+        values = np.asarray(values, dtype=np.float64)
+        self.n = len(values)
+        self.mu0 = float(values.mean()) if mu0 is None else float(mu0)
+        self.kappa0 = float(kappa0)
+        self.alpha0 = float(alpha0)
+        # By default the prior mean of sigma**2 is the overall variance.
+        self.beta0 = float(values.var() * (alpha0 - 1.0)) if beta0 is None else float(beta0)
+        if self.beta0 <= 0:
+            self.beta0 = 1e-12
+
+        centred = values - self.mu0
+        self.s1 = np.concatenate(([0.0], np.cumsum(centred)))
+        self.s2 = np.concatenate(([0.0], np.cumsum(centred ** 2)))
+        const = self.alpha0 * np.log(self.beta0) - gammaln(self.alpha0) + 0.5 * np.log(self.kappa0)
+        # Every term that depends on the segment length only, tabulated once.
+        counts = np.arange(self.n + 1, dtype=np.float64)
+        self._by_count = (
+            const
+            - 0.5 * counts * np.log(2.0 * np.pi)
+            - 0.5 * np.log(self.kappa0 + counts)
+            + gammaln(self.alpha0 + 0.5 * counts)
+        )
+
+    def _posterior(self, starts, ends):
+        count = ends - starts
+        total = self.s1[ends] - self.s1[starts]
+        kappa_n = self.kappa0 + count
+        alpha_n = self.alpha0 + 0.5 * count
+        # Sum of squares about the prior mean, shrunk toward it by kappa0.
+        beta_n = self.beta0 + 0.5 * (self.s2[ends] - self.s2[starts] - total ** 2 / kappa_n)
+        return count, total, kappa_n, alpha_n, beta_n
+
+    def log_marginal(self, starts, ends):
+        count, _, _, alpha_n, beta_n = self._posterior(starts, ends)
+        return self._by_count[count] - alpha_n * np.log(beta_n)
+
+    def posterior_moments(self, start, end):
+        """Posterior means of the segment's mu and sigma."""
+        _, total, kappa_n, alpha_n, beta_n = self._posterior(start, end)
+        mu = self.mu0 + total / kappa_n
+        variance = beta_n / (alpha_n - 1.0) if alpha_n > 1.0 else np.nan
+        return float(mu), float(np.sqrt(variance))
+
+
+# Small enough that the dropped weight never moves the MAP breaks on daily returns.
+DEFAULT_PRUNE_THRESHOLD = 1e-60
+
+
+def _logsumexp(values, axis):
+    peak = np.max(values, axis=axis, keepdims=True)
+    safe = np.where(np.isfinite(peak), peak, 0.0)
+    with np.errstate(divide="ignore"):
+        out = np.log(np.sum(np.exp(values - safe), axis=axis, keepdims=True)) + safe
+    return np.squeeze(out, axis=axis)
+
+
+def _log_compositions(n, segments, min_size):
+    """log of the number of ways to cut n points into ``segments`` pieces of at least ``min_size``."""
+    free = n - segments * min_size
+    if free < 0:
+        return -np.inf
+    return gammaln(free + segments) - gammaln(segments) - gammaln(free + 1)
+
+
+def _forward(segments, max_segments, min_size, prune_threshold, viterbi=False):
+    """
+    Fearnhead-style recursion over the position of the last change.
+
+    ``log_f[k, t]`` is the log marginal likelihood of ``values[:t]`` split into
+    ``k`` segments, summed over all placements. With ``viterbi=True`` the
+    arg-max start of the last segment under the max-product recursion is
+    recorded as well, in ``back``.
+    With ``prune_threshold > 0``, a candidate start point is dropped for good
+    once ``p(last change at s | k segments)``, averaged over ``k``, falls below
+    that threshold (Fearnhead's approximation); ``0`` keeps the recursion
+    exact. Each ``k`` is normalised on its own because the number of changes
+    is capped: the unnormalised sum is dominated by the largest ``k`` and
+    would drop starts that fewer segments still need.
+    """
+    n = segments.n
+    log_f = np.full((max_segments + 1, n + 1), -np.inf)
+    log_f[0, 0] = 0.0
+    log_m = np.full((max_segments + 1, n + 1), -np.inf) if viterbi else None
+    back = np.zeros((max_segments + 1, n + 1), dtype=np.int64) if viterbi else None
+    if viterbi:
+        log_m[0, 0] = 0.0
+    pruning = prune_threshold > 0
+    # Surviving candidates and their columns of log_f / log_m are kept packed
+    # at the front of preallocated buffers, so each row reads contiguous slices.
+    candidates = np.arange(n + 1)
+    packed_f = np.empty((max_segments, n + 1)) if pruning else log_f[:-1]
+    packed_m = np.empty((max_segments, n + 1)) if pruning and viterbi else log_m[:-1] if viterbi else None
+    size = 0
+
+    for end in range(min_size, n + 1):
+        admitted = end - min_size
+        if not pruning:
+            # Starts in (0, min_size) are unreachable and contribute exp(-inf) = 0.
+            size = admitted + 1
+        elif admitted == 0 or admitted >= min_size:
+            candidates[size] = admitted
+            packed_f[:, size] = log_f[:-1, admitted]
+            if viterbi:
+                packed_m[:, size] = log_m[:-1, admitted]
+            size += 1
+        starts = candidates[:size]
+        segment = segments.log_marginal(starts, end)[None, :]
+        terms = packed_f[:, :size] + segment
+        peak = terms.max(axis=1, keepdims=True)
+        peak[~np.isfinite(peak)] = 0.0
+        weights = np.exp(terms - peak)
+        totals = weights.sum(axis=1)
+        with np.errstate(divide="ignore"):
+            log_f[1:, end] = np.log(totals) + peak[:, 0]
+        if viterbi:
+            paths = packed_m[:, :size] + segment
+            pick = np.argmax(paths, axis=1)
+            log_m[1:, end] = paths[np.arange(max_segments), pick]
+            back[1:, end] = starts[pick]
+
+        if pruning and size > 1:
+            reachable = totals > 0
+            share = weights[reachable].T @ (1.0 / totals[reachable])
+            keep = share >= prune_threshold * reachable.sum()
+            if not keep.all():
+                kept = np.flatnonzero(keep)
+                size = kept.shape[0]
+                candidates[:size] = candidates[kept]
+                packed_f[:, :size] = packed_f[:, kept]
+                if viterbi:
+                    packed_m[:, :size] = packed_m[:, kept]
+    return log_f, back
+
+
+@dataclass(frozen=True)
+class ExactChangePointPosterior:
+    """
+    Exact posterior of a multiple change-point model.
+
+    ``n_change_points[k]`` is ``p(k changes | y)``, ``location[s]`` the
+    probability that a new regime starts at row ``s`` (averaged over the
+    number of changes), ``break_locations[j]`` the distribution of the
+    ``j``-th break under the most probable number of changes, and
+    ``map_breaks`` the single most probable segmentation for that number.
+    """
+
+    n_change_points: np.ndarray
+    log_evidence: np.ndarray
+    location: np.ndarray
+    break_locations: tuple
+    map_breaks: list
+    segment_moments: list
+
+
+def exact_change_point_posterior(
+    values,
+    max_change_points=5,
+    min_size=5,
+    prior=None,
+    mu0=None,
+    kappa0=1.0,
+    alpha0=2.0,
+    beta0=None,
+    prune_threshold=0.0,
+):
+    """
+    Exact Bayesian posterior over the number and location of change points.
+
+    Each regime has its own mean and variance (Normal-Inverse-Gamma prior);
+    given ``k`` changes every placement with segments of at least
+    ``min_size`` rows is equally likely a priori. Forward and backward
+    recursions sum over all placements, so no sampling or convergence checks
+    are involved and the result is deterministic.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Series to segment (e.g. log returns); must be finite.
+    max_change_points : int
+        Largest number of changes considered.
+    min_size : int
+        Minimum number of observations per regime.
+    prior : np.ndarray, optional
+        Prior probabilities for 0..max_change_points changes (uniform by
+        default).
+    mu0, kappa0, alpha0, beta0 : float, optional
+        Normal-Inverse-Gamma hyperparameters; ``mu0`` defaults to the series
+        mean and ``beta0`` so that the prior mean variance is the series
+        variance.
+    prune_threshold : float
+        Posterior weight of the last change position below which a candidate
+        is dropped for the rest of the recursion. ``0`` (default) keeps the
+        result exact at O(k n**2) cost; ``DEFAULT_PRUNE_THRESHOLD`` leaves the
+        MAP segmentation of the Brent returns unchanged and roughly halves
+        the work. Heavy-tailed data needs very small thresholds, since a
+        candidate's weight can recover after looking negligible.
+
+    Returns
+    -------
+    ExactChangePointPosterior
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isfinite(values).all():
+        raise ValueError("values must be finite")
+    n = len(values)
+    min_size = max(int(min_size), 1)
+    max_change_points = int(min(max_change_points, n // min_size - 1))
+    if max_change_points < 0:
+        raise ValueError("Time series too short for the requested min_size.")
+    if prior is None:
+        prior = np.full(max_change_points + 1, 1.0 / (max_change_points + 1))
+    prior = np.asarray(prior, dtype=np.float64)[: max_change_points + 1]
+    max_segments = max_change_points + 1
+
+    forward_segments = NormalInverseGammaSegments(values, mu0, kappa0, alpha0, beta0)
+    backward_segments = NormalInverseGammaSegments(
+        values[::-1], forward_segments.mu0, kappa0, alpha0, forward_segments.beta0
+    )
+    log_f, back = _forward(forward_segments, max_segments, min_size, prune_threshold, viterbi=True)
+    log_b, _ = _forward(backward_segments, max_segments, min_size, prune_threshold)
+    # log_r[k, s]: values[s:] split into k segments.
+    log_r = log_b[:, ::-1]
+
+    counts = np.array([_log_compositions(n, k + 1, min_size) for k in range(max_segments)])
+    log_evidence = log_f[1:, n] - counts
+    with np.errstate(divide="ignore"):
+        log_post = log_evidence + np.log(prior)
+    n_change_points = np.exp(log_post - _logsumexp(log_post, axis=0))
+
+    location = np.zeros(n + 1)
+    for k in range(1, max_segments):
+        # The j-th of k changes sits at s: j segments before s, k + 1 - j after.
+        per_break = np.exp(log_f[1 : k + 1, :] + log_r[k:0:-1, :] - log_f[k + 1, n])
+        location += n_change_points[k] * per_break.sum(axis=0)
+
+    best_k = int(np.argmax(n_change_points))
+    break_locations = tuple(
+        np.exp(log_f[j, :] + log_r[best_k + 1 - j, :] - log_f[best_k + 1, n]) for j in range(1, best_k + 1)
+    )
+
+    map_breaks = []
+    end = n
+    for k in range(best_k + 1, 1, -1):
+        end = int(back[k, end])
+        map_breaks.append(end)
+    map_breaks = map_breaks[::-1]
+    bounds = [0] + map_breaks + [n]
+    segment_moments = [forward_segments.posterior_moments(s, e) for s, e in zip(bounds[:-1], bounds[1:])]
+
+    return ExactChangePointPosterior(
+        n_change_points=n_change_points,
+        log_evidence=log_evidence,
+        location=location,
+        break_locations=break_locations,
+        map_breaks=map_breaks,
+        segment_moments=segment_moments,
+    )
+
+
+def posterior_results(values, dates, posterior):
+    """
+    The most probable segmentation in the ``change_point_results.json`` schema.
+
+    Regimes also carry the posterior means of their ``mu`` and ``sigma``, each
+    change point the posterior probability of its exact position, and the
+    payload the posterior over the number of changes.
+    """
+    results = segmentation_results(values, dates, posterior.map_breaks)
+    for cp, start, probabilities in zip(results["change_points"], posterior.map_breaks, posterior.break_locations):
+        cp["probability"] = float(probabilities[start])
+    for regime, (mu, sigma) in zip(results["regimes"], posterior.segment_moments):
+        regime["posterior_mu"], regime["posterior_sigma"] = mu, sigma
+    results["n_change_points_posterior"] = {str(k): float(p) for k, p in enumerate(posterior.n_change_points)}
+    return results
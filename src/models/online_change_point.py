@@ -0,0 +1,200 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from scipy.special import gammaln
+
+DEFAULT_HAZARD_LAMBDA = 250.0
+DEFAULT_MAX_RUN_LENGTH = 2000
+DEFAULT_PRUNE_THRESHOLD = 1e-10
+DEFAULT_ALERT_WINDOW = 5
+
+_STATE_ARRAYS = ("run_lengths", "log_probs", "mu", "kappa", "alpha", "beta")
+
+
+class OnlineChangePointDetector:
+    """
+    Bayesian online change-point detection (Adams & MacKay, 2007).
+
+    The state is the posterior over the current run length (days since the
+    last change) plus Normal-Inverse-Gamma sufficient statistics for each
+    run length, all held in parallel NumPy arrays. Run lengths whose
+    probability falls below ``prune_threshold`` are dropped and the array is
+    capped at ``max_run_length`` entries, so every update costs bounded time
+    and memory however long the stream runs.
+
+    Parameters
+    ----------
+    hazard_lambda : float
+        Expected run length between changes (constant hazard ``1 / lambda``).
+    mu0, kappa0, alpha0, beta0 : float
+        Normal-Inverse-Gamma prior for the mean and variance of a new regime.
+    max_run_length : int
+        Most run-length hypotheses kept; the oldest ones are merged into the
+        longest kept run.
+    prune_threshold : float
+        Probability below which a run-length hypothesis is dropped.
+    """
+
+    def __init__(
+        self,
+        hazard_lambda=DEFAULT_HAZARD_LAMBDA,
+        mu0=0.0,
+        kappa0=1.0,
+        alpha0=2.0,
+        beta0=1e-4,
+        max_run_length=DEFAULT_MAX_RUN_LENGTH,
+        prune_threshold=DEFAULT_PRUNE_THRESHOLD,
+    ):
+        self.hazard_lambda = float(hazard_lambda)
+        self.mu0 = float(mu0)
+        self.kappa0 = float(kappa0)
+        self.alpha0 = float(alpha0)
+        self.beta0 = float(beta0)
+        self.max_run_length = int(max_run_length)
+        self.prune_threshold = float(prune_threshold)
+        self.n_observations = 0
+        self.last_date = None
+        self.last_price = None
+
+        self.run_lengths = np.zeros(1, dtype=np.int64)
+        self.log_probs = np.zeros(1)
+        self.mu = np.array([self.mu0])
+        self.kappa = np.array([self.kappa0])
+        self.alpha = np.array([self.alpha0])
+        self.beta = np.array([self.beta0])
+
+    def _log_predictive(self, x):
+        """Student-t log density of ``x`` under every run length's posterior."""
+        nu = 2.0 * self.alpha
+        scale_sq = self.beta * (self.kappa + 1.0) / (self.alpha * self.kappa)
+        return (
+            gammaln(0.5 * (nu + 1.0))
+            - gammaln(0.5 * nu)
+            - 0.5 * np.log(nu * np.pi * scale_sq)
+            - 0.5 * (nu + 1.0) * np.log1p((x - self.mu) ** 2 / (nu * scale_sq))
+        )
+
+    def update(self, x):
+        """
+        Absorb one observation and return the probability of a recent change.
+
+        Returns
+        -------
+        float
+            ``change_probability()`` after the update.
+        """
+        x = float(x)
+        if not np.isfinite(x):
+            raise ValueError("Observations must be finite.")
+        log_hazard = -np.log(self.hazard_lambda)
+        log_survive = np.log1p(-1.0 / self.hazard_lambda)
+
+        joint = self.log_probs + self._log_predictive(x)
+        peak = joint.max()
+        log_change = peak + np.log(np.exp(joint - peak).sum()) + log_hazard
+
+        log_probs = np.concatenate(([log_change], joint + log_survive))
+        log_probs -= log_probs.max()
+        log_probs -= np.log(np.exp(log_probs).sum())
+
+        kappa = self.kappa + 1.0
+        self.run_lengths = np.concatenate(([0], self.run_lengths + 1))
+        self.log_probs = log_probs
+        self.beta = np.concatenate(([self.beta0], self.beta + self.kappa * (x - self.mu) ** 2 / (2.0 * kappa)))
+        self.mu = np.concatenate(([self.mu0], (self.kappa * self.mu + x) / kappa))
+        self.kappa = np.concatenate(([self.kappa0], kappa))
+        self.alpha = np.concatenate(([self.alpha0], self.alpha + 0.5))
+        self.n_observations += 1
+        self._prune()
+        return self.change_probability()
+
+    def update_many(self, values):
+        """Absorb observations in order; return the change probability after each."""
+        return np.array([self.update(x) for x in values])
+
+    def _prune(self):
+        keep = np.exp(self.log_probs) >= self.prune_threshold
+        keep[0] = True
+        if keep.sum() > self.max_run_length:
+            # Fold the oldest hypotheses into the oldest one that is kept.
+            kept = np.flatnonzero(keep)
+            cutoff = kept[self.max_run_length - 1]
+            tail = self.log_probs[cutoff:][keep[cutoff:]]
+            peak = tail.max()
+            self.log_probs[cutoff] = peak + np.log(np.exp(tail - peak).sum())
+            keep[cutoff + 1 :] = False
+        if keep.all():
+            return
+        for name in _STATE_ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+        self.log_probs -= np.log(np.exp(self.log_probs).sum())
+
+    def change_probability(self, window=DEFAULT_ALERT_WINDOW):
+        """
+        Probability that the current regime began within the last ``window`` steps.
+
+        With a constant hazard ``p(run length = 0)`` always equals the hazard,
+        so the recent-change mass over a short window is the useful alert
+        signal.
+        """
+        return float(np.exp(self.log_probs[self.run_lengths < window]).sum())
+
+    def map_run_length(self):
+        return int(self.run_lengths[np.argmax(self.log_probs)])
+
+    def expected_run_length(self):
+        return float((np.exp(self.log_probs) * self.run_lengths).sum())
+
+    def summary(self, window=DEFAULT_ALERT_WINDOW):
+        return {
+            "n_observations": self.n_observations,
+            "last_date": self.last_date,
+            "change_probability": self.change_probability(window),
+            "alert_window": window,
+            "map_run_length": self.map_run_length(),
+            "expected_run_length": self.expected_run_length(),
+            "n_hypotheses": int(self.run_lengths.shape[0]),
+        }
+
+    def save(self, path):
+        """Write the state to ``path`` (``.npz``) atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "hazard_lambda": self.hazard_lambda,
+            "mu0": self.mu0,
+            "kappa0": self.kappa0,
+            "alpha0": self.alpha0,
+            "beta0": self.beta0,
+            "max_run_length": self.max_run_length,
+            "prune_threshold": self.prune_threshold,
+            "n_observations": self.n_observations,
+            "last_date": self.last_date,
+            "last_price": self.last_price,
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as handle:
+            np.savez(handle, meta=np.array(json.dumps(meta)), **{name: getattr(self, name) for name in _STATE_ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            detector = cls(
+                hazard_lambda=meta["hazard_lambda"],
+                mu0=meta["mu0"],
+                kappa0=meta["kappa0"],
+                alpha0=meta["alpha0"],
+                beta0=meta["beta0"],
+                max_run_length=meta["max_run_length"],
+                prune_threshold=meta["prune_threshold"],
+            )
+            for name in _STATE_ARRAYS:
+                setattr(detector, name, data[name].copy())
+        detector.n_observations = meta["n_observations"]
+        detector.last_date = meta["last_date"]
+        detector.last_price = meta["last_price"]
+        return detector
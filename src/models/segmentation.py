@@ -0,0 +1,254 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+COSTS = ("mean", "var", "meanvar")
+METHODS = ("pelt", "binseg")
+PENALTIES = ("bic", "aic")
+
+# Free parameters per segment for each cost, used by the information criteria.
+_SEGMENT_PARAMS = {"mean": 1, "var": 1, "meanvar": 2}
+
+
+class SegmentCost:
+    """
+    Gaussian segment costs evaluated in O(1) from prefix sums.
+
+    ``cost(s, e)`` is minus twice the maximised log-likelihood of
+    ``values[s:e]`` (up to constants that cancel across segmentations) and
+    broadcasts over arrays of ``s`` and ``e``.
+
+    - ``mean``: mean changes, noise scale fixed to a robust estimate from
+      first differences, so the cost is the scaled sum of squared residuals.
+    - ``var``: variance changes around the global mean.
+    - ``meanvar``: mean and variance change together.
+    """
+
+    def __init__(self, values, cost="meanvar"):
+        if cost not in COSTS:
+            raise ValueError(f"Unknown cost '{cost}'. Use one of {COSTS}.")
+        values = np.asarray(values, dtype=np.float64)
+        centred = values - values.mean()
+        self.cost_name = cost
+        self.n = len(values)
+        self.s1 = np.concatenate(([0.0], np.cumsum(centred)))
+        self.s2 = np.concatenate(([0.0], np.cumsum(centred ** 2)))
+
+        diff_scale = np.median(np.abs(np.diff(values))) / (0.6745 * np.sqrt(2.0)) if self.n > 1 else 0.0
+        variance = centred.var() if self.n else 0.0
+        self.noise_var = diff_scale ** 2 if diff_scale > 0 else max(variance, 1e-12)
+        self.floor = max(variance, 1e-300) * 1e-12
+
+    def __call__(self, starts, ends):
+        count = ends - starts
+        sum_sq = self.s2[ends] - self.s2[starts]
+        if self.cost_name == "var":
+            return count * np.log(np.maximum(sum_sq / count, self.floor))
+        sse = sum_sq - (self.s1[ends] - self.s1[starts]) ** 2 / count
+        if self.cost_name == "mean":
+            return sse / self.noise_var
+        return count * np.log(np.maximum(sse / count, self.floor))
+
+
+def select_penalty(n, cost="meanvar", penalty="bic"):
+    """
+    Penalty per change point.
+
+    ``penalty`` may be a number or the name of an information criterion:
+    ``bic`` (``(p + 1) log n``) or ``aic`` (``2 (p + 1)``), where ``p`` is the
+    number of free parameters per segment plus one for the break location.
+    """
+    if not isinstance(penalty, str):
+        return float(penalty)
+    if penalty not in PENALTIES:
+        raise ValueError(f"Unknown penalty '{penalty}'. Use a number or one of {PENALTIES}.")
+    params = _SEGMENT_PARAMS[cost] + 1
+    return params * np.log(max(n, 2)) if penalty == "bic" else 2.0 * params
+
+
+def pelt(cost, penalty, min_size=2):
+    """
+    Optimal partition by Pruned Exact Linear Time search.
+
+    Minimises the total segment cost plus ``penalty`` per change point.
+    Candidates that can never start the last segment again are pruned, which
+    gives O(n) expected work when the number of changes grows with n.
+
+    Returns
+    -------
+    list of int
+        Start index of every segment after the first.
+    """
+    n = cost.n
+    if n < 2 * min_size:
+        return []
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    previous = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+
+    for end in range(min_size, n + 1):
+        admitted = end - min_size
+        if admitted >= min_size:
+            candidates = np.append(candidates, admitted)
+        totals = best[candidates] + cost(candidates, end)
+        pick = int(np.argmin(totals))
+        best[end] = totals[pick] + penalty
+        previous[end] = candidates[pick]
+        candidates = candidates[totals <= best[end]]
+
+    breaks = []
+    end = previous[n]
+    while end > 0:
+        breaks.append(int(end))
+        end = previous[end]
+    return breaks[::-1]
+
+
+def binary_segmentation(cost, penalty, min_size=2, max_change_points=None):
+    """
+    Greedy binary segmentation.
+
+    Repeatedly splits the segment whose best split lowers the cost the most,
+    while that gain exceeds ``penalty``. Each split scan is vectorized, so the
+    whole search is O(n log n).
+    """
+
+    def best_split(start, end):
+        splits = np.arange(start + min_size, end - min_size + 1)
+        if splits.size == 0:
+            return None
+        gains = cost(start, end) - cost(start, splits) - cost(splits, end)
+        pick = int(np.argmax(gains))
+        return float(gains[pick]), int(splits[pick])
+
+    heap = []
+
+    def push(start, end):
+        split = best_split(start, end)
+        if split is not None and split[0] > penalty:
+            heapq.heappush(heap, (-split[0], split[1], start, end))
+
+    push(0, cost.n)
+    breaks = []
+    while heap and (max_change_points is None or len(breaks) < max_change_points):
+        _, split, start, end = heapq.heappop(heap)
+        breaks.append(split)
+        push(start, split)
+        push(split, end)
+    return sorted(breaks)
+
+
+def detect_change_points(
+    values, method="pelt", cost="meanvar", penalty="bic", min_size=5, max_change_points=None
+):
+    """
+    Detect change points in a series with PELT or binary segmentation.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Series to segment (e.g. log returns); must be finite.
+    method : str
+        ``pelt`` (exact) or ``binseg`` (greedy, faster on long series).
+    cost : str
+        ``mean``, ``var`` or ``meanvar`` changes.
+    penalty : str or float
+        ``bic``, ``aic`` or a penalty value per change point.
+    min_size : int
+        Minimum number of observations per segment.
+    max_change_points : int, optional
+        Upper bound on the number of changes. PELT results beyond it keep the
+        changes binary segmentation would pick first.
+
+    Returns
+    -------
+    list of int
+        Start index of every segment after the first.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Use one of {METHODS}.")
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isfinite(values).all():
+        raise ValueError("values must be finite")
+    min_size = max(int(min_size), 2)
+    segment_cost = SegmentCost(values, cost)
+    pen = select_penalty(len(values), cost, penalty)
+
+    if method == "binseg":
+        return binary_segmentation(segment_cost, pen, min_size, max_change_points)
+    breaks = pelt(segment_cost, pen, min_size)
+    if max_change_points is not None and len(breaks) > max_change_points:
+        breaks = binary_segmentation(segment_cost, pen, min_size, max_change_points)
+    return breaks
+
+
+def segmentation_results(values, dates, breaks):
+    """
+    Describe a segmentation in the ``reports/change_point_results.json`` schema.
+
+    As in the Bayesian model, ``tau_index`` is the last row of the regime
+    before the change. Regimes run between consecutive change-point dates
+    (from the first date and to the last date at the ends), and ``duration``
+    counts the rows assigned to each regime.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    dates = pd.to_datetime(pd.Series(dates)).dt.strftime("%Y-%m-%d").tolist()
+    n = len(values)
+    bounds = [0] + [int(b) for b in breaks] + [n]
+
+    change_points = [
+        {"name": f"cp_{i}", "tau_index": b - 1, "tau_date": dates[b - 1]}
+        for i, b in enumerate(bounds[1:-1], start=1)
+    ]
+    edges = [dates[0]] + [cp["tau_date"] for cp in change_points] + [dates[-1]]
+    regimes = []
+    for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]), start=1):
+        segment = values[start:end]
+        regimes.append(
+            {
+                "name": f"regime_{i}",
+                "start_date": edges[i - 1],
+                "end_date": edges[i],
+                "duration": end - start,
+                "mu": float(segment.mean()),
+                "sigma": float(segment.std(ddof=1)) if len(segment) > 1 else 0.0,
+            }
+        )
+    business_impact = []
+    for before, after in zip(regimes[:-1], regimes[1:]):
+        shift = after["mu"] - before["mu"]
+        business_impact.append(
+            {
+                "transition": f"{before['name']} -> {after['name']}",
+                "mean_shift": shift,
+                "mean_shift_percent": shift / abs(before["mu"]) * 100.0 if before["mu"] else None,
+                "volatility_shift": after["sigma"] - before["sigma"],
+                "duration_before": before["duration"],
+                "duration_after": after["duration"],
+            }
+        )
+    return {
+        "n_change_points": len(change_points),
+        "change_points": change_points,
+        "regimes": regimes,
+        "business_impact": business_impact,
+    }
+
+
+def tau_prior_bounds(breaks, n, width=None, which=0):
+    """
+    Window around a detected change point for narrowing the Bayesian tau prior.
+
+    Returns ``(lower, upper)`` covering ``width`` observations on each side of
+    ``breaks[which]`` (default: a twentieth of the series), clipped to the
+    series, or ``None`` when nothing was detected. Pass it as ``tau_bounds``
+    to ``fit_mean_change_point_model``.
+    """
+    if len(breaks) <= which:
+        return None
+    width = max(1, n // 20) if width is None else int(width)
+    # Break b starts the new regime; the model's tau is the last row of the old one.
+    tau = int(breaks[which]) - 1
+    return max(0, tau - width), min(n - 1, tau + width)
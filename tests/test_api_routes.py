@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import json
 import sys
 from pathlib import Path
 
+import pytest
+
 repo_root = Path(__file__).resolve().parents[1]
 backend_path = repo_root / "dashboard" / "backend"
 if str(backend_path) not in sys.path:
@@ -33,3 +36,108 @@ def test_change_points_endpoint() -> None:
     assert resp.status_code == 200
     payload = resp.get_json()
     assert "change_points" in payload or "tau_date" in payload
+
+    assert client.get("/api/change-points/?model_version=no_such_model").status_code == 400
+    assert client.get("/api/change-points/shap?model_version=no_such_model").status_code == 400
+    models = client.get("/api/change-points/models").get_json()
+    assert models["default_version"] in {model["version"] for model in models["models"]}
+
+
+def test_model_version_change_points_end_at_the_posterior_tau() -> None:
+    client = create_app().test_client()
+    summary = client.get("/api/change-points/models/brent_cp_model_v1")
+    if summary.status_code != 200:
+        pytest.skip("brent_cp_model_v1 posterior is not readable here")
+    payload = client.get("/api/change-points/?model_version=brent_cp_model_v1").get_json()
+    (cp,) = payload["change_points"]
+    (tau,) = summary.get_json()["change_points"]
+    assert cp["tau_index"] == round(tau["mean"])
+    assert cp["tau_date"] == tau["tau_date"]
+
+
+def test_details_durations_match_the_model_regimes() -> None:
+    client = create_app().test_client()
+    query = "?model_version=brent_cp_model_v1"
+    resp = client.get(f"/api/change-points/details{query}")
+    if resp.status_code != 200:
+        pytest.skip("brent_cp_model_v1 posterior is not readable here")
+    details = resp.get_json()
+    regimes = client.get(f"/api/change-points/{query}").get_json()["regimes"]
+    analysis, impact = details["regime_analysis"], details["business_impact"]
+    assert analysis and len(analysis) == len(impact)
+    total = sum(regime["duration"] for regime in regimes)
+    for i, entry in enumerate(analysis):
+        assert entry["duration_before"] == sum(regime["duration"] for regime in regimes[: i + 1])
+        assert entry["duration_before"] + entry["duration_after"] == total
+    assert analysis[0]["duration_before"] == impact[0]["duration_before"]
+    assert analysis[-1]["duration_after"] == impact[-1]["duration_after"]
+
+
+def test_prices_resolution_returns_ohlc_bars() -> None:
+    client = create_app().test_client()
+
+    resp = client.get("/api/prices/?resolution=auto&max_points=50")
+    assert resp.status_code == 200
+    payload = resp.get_json()
+    assert payload["resolution"] in ("week", "month")
+    assert payload["count"] >= 50
+    assert {"Open", "High", "Low", "Close", "Count"} <= set(payload["data"][0])
+
+    assert client.get("/api/prices/?resolution=fortnight").status_code == 400
+
+
+def test_event_sweep_matrix_and_stream() -> None:
+    client = create_app().test_client()
+
+    resp = client.get("/api/events/sweep?windows=5,30&event_dates=2020-03-11,2008-09-15")
+    assert resp.status_code == 200
+    payload = resp.get_json()
+    assert payload["windows"] == [5, 30] and payload["count"] == 2
+    assert len(payload["price_change_percent"]) == 2 and len(payload["before_volatility"][0]) == 2
+
+    stream = client.get("/api/events/sweep?windows=5,30&event_dates=2020-03-11,2008-09-15&stream=true")
+    lines = [json.loads(line) for line in stream.data.decode().splitlines()]
+    assert stream.mimetype == "application/x-ndjson"
+    assert lines[0] == {"windows": [5, 30], "count": 2}
+    assert [line["price_change_percent"] for line in lines[1:]] == payload["price_change_percent"]
+
+    assert client.get("/api/events/sweep?windows=0").status_code == 400
+
+
+def test_detect_lists_every_method_and_accepts_prune_threshold() -> None:
+    client = create_app().test_client()
+    resp = client.get("/api/change-points/detect?method=nope")
+    assert resp.status_code == 400
+    assert "exact" in resp.get_json()["error"]
+
+    resp = client.get("/api/change-points/detect?method=exact&start_date=2020-01-01&end_date=2020-12-31")
+    if resp.status_code == 404:
+        pytest.skip("price data not available")
+    assert resp.status_code == 200
+    assert resp.get_json()["prune_threshold"] == 1e-60
+    exact = client.get(
+        "/api/change-points/detect?method=exact&prune_threshold=0&start_date=2020-01-01&end_date=2020-12-31"
+    ).get_json()
+    assert exact["prune_threshold"] == 0
+    pruned = resp.get_json()
+    assert [cp["tau_date"] for cp in exact["change_points"]] == [cp["tau_date"] for cp in pruned["change_points"]]
+    assert client.get("/api/change-points/detect?method=exact&prune_threshold=2").status_code == 400
+
+
+def test_statistics_rejects_bad_dates_and_emits_null_for_single_rows() -> None:
+    client = create_app().test_client()
+    assert client.get("/api/prices/statistics?start_date=2020-13-01").status_code == 400
+
+    resp = client.get("/api/prices/statistics?start_date=2020-03-02&end_date=2020-03-02")
+    if resp.status_code == 404:
+        pytest.skip("price data not available")
+    stats = json.loads(resp.data, parse_constant=lambda token: pytest.fail(f"invalid JSON constant {token}"))
+    assert stats["count"] == 1
+    assert stats["std_price"] is None
+    assert stats["min_price"] == stats["max_price"] == stats["median_price"]
+
+
+def test_volatility_rejects_invalid_parameters() -> None:
+    client = create_app().test_client()
+    for query in ("window=abc", "window=0", "max_points=0"):
+        assert client.get(f"/api/prices/volatility?{query}").status_code == 400
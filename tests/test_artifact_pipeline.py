@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from services.artifacts import ArtifactStore, bundled_volatility  # noqa: E402
+from services.pipeline import (  # noqa: E402
+    BUILT,
+    KEEP_BUNDLES,
+    REUSED,
+    SKIPPED,
+    Output,
+    Stage,
+    build_bundle,
+    stage_order,
+)
+from services.price_store import PriceSeries  # noqa: E402
+from services.shared_dataset import read_current  # noqa: E402
+from services.volatility import rolling_volatility  # noqa: E402
+
+
+def _double(inputs: Dict[str, Path], outputs: Dict[str, Path], factor: int = 2) -> Dict[str, Any]:
+    value = int(inputs["number"].read_text())
+    outputs["double.txt"].write_text(str(value * factor))
+    return {"value": value}
+
+
+def _increment(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    outputs["result.txt"].write_text(str(int(inputs["double"].read_text()) + 1))
+
+
+def _copy(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    outputs["copy.txt"].write_text(inputs["other"].read_text())
+
+
+def _needs_missing_module(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    import brent_module_that_does_not_exist  # noqa: F401
+
+
+def _broken(inputs: Dict[str, Path], outputs: Dict[str, Path]) -> None:
+    raise RuntimeError("boom")
+
+
+def _stages(number: Path, other: Path) -> list[Stage]:
+    return [
+        Stage("double", _double, {"number": number}, ("double.txt",)),
+        Stage("increment", _increment, {"double": Output("double", "double.txt")}, ("result.txt",)),
+        Stage("copy", _copy, {"other": other}, ("copy.txt",)),
+    ]
+
+
+def _sources(tmp_path: Path) -> tuple[Path, Path]:
+    number, other = tmp_path / "number.txt", tmp_path / "other.txt"
+    number.write_text("20")
+    other.write_text("hello")
+    return number, other
+
+
+def test_stage_order_rejects_cycles_and_unknown_outputs(tmp_path) -> None:
+    a = Stage("a", _copy, {"other": Output("b", "copy.txt")}, ("copy.txt",))
+    b = Stage("b", _copy, {"other": Output("a", "copy.txt")}, ("copy.txt",))
+    with pytest.raises(ValueError, match="cycle"):
+        stage_order([a, b])
+    with pytest.raises(ValueError, match="unknown output"):
+        stage_order([Stage("a", _copy, {"other": Output("missing", "x")}, ("copy.txt",))])
+
+    number, other = _sources(tmp_path)
+    names = [stage.name for stage in stage_order(list(reversed(_stages(number, other))))]
+    assert names.index("double") < names.index("increment")
+
+
+def test_build_publishes_read_only_bundle_and_reuses_fresh_stages(tmp_path) -> None:
+    number, other = _sources(tmp_path)
+    root = tmp_path / "artifacts"
+
+    first = build_bundle(root, _stages(number, other), jobs=1)
+    assert first.published and first.generation == 1
+    assert first.statuses() == {"double": BUILT, "increment": BUILT, "copy": BUILT}
+    assert (first.directory / "increment" / "result.txt").read_text() == "41"
+    assert first.manifest["stages"]["double"]["meta"] == {"value": 20}
+    assert (first.directory / "double" / "double.txt").stat().st_mode & 0o222 == 0
+    assert read_current(root)["directory"] == first.directory.name
+
+    again = build_bundle(root, _stages(number, other), jobs=1)
+    assert not again.published and again.directory == first.directory
+    assert set(again.statuses().values()) == {REUSED}
+
+    number.write_text("5")
+    changed = build_bundle(root, _stages(number, other), jobs=1)
+    assert changed.published and changed.generation == 2
+    assert changed.statuses() == {"double": BUILT, "increment": BUILT, "copy": REUSED}
+    assert (changed.directory / "increment" / "result.txt").read_text() == "11"
+    assert (changed.directory / "copy" / "copy.txt").read_text() == "hello"
+
+    stages = _stages(number, other)
+    stages[0] = Stage("double", _double, {"number": number}, ("double.txt",), params={"factor": 3})
+    rerun = build_bundle(root, stages, jobs=1)
+    assert rerun.statuses()["double"] == BUILT
+    assert (rerun.directory / "increment" / "result.txt").read_text() == "16"
+
+
+def test_build_runs_independent_stages_in_worker_processes(tmp_path) -> None:
+    number, other = _sources(tmp_path)
+    result = build_bundle(tmp_path / "artifacts", _stages(number, other), jobs=2)
+    assert set(result.statuses().values()) == {BUILT}
+    assert (result.directory / "increment" / "result.txt").read_text() == "41"
+
+
+def test_optional_stages_are_skipped_and_failures_keep_the_current_bundle(tmp_path) -> None:
+    number, other = _sources(tmp_path)
+    root = tmp_path / "artifacts"
+    stages = _stages(number, other) + [
+        Stage("needs_module", _needs_missing_module, {}, ("x.txt",), optional=True),
+        Stage("after", _copy, {"other": Output("needs_module", "x.txt")}, ("copy.txt",), optional=True),
+        Stage("needs_file", _copy, {"other": tmp_path / "absent.txt"}, ("copy.txt",), optional=True),
+    ]
+    result = build_bundle(root, stages, jobs=1)
+    statuses = result.statuses()
+    assert statuses["needs_module"] == statuses["after"] == statuses["needs_file"] == SKIPPED
+    assert "brent_module_that_does_not_exist" in result.manifest["stages"]["needs_module"]["reason"]
+    assert not (result.directory / "needs_module").exists()
+
+    number.write_text("7")
+    with pytest.raises(RuntimeError, match="boom"):
+        build_bundle(root, _stages(number, other) + [Stage("broken", _broken, {}, ("x.txt",))], jobs=1)
+    assert read_current(root)["generation"] == 1
+    assert [path.name for path in root.iterdir() if path.name.startswith(".bundle-")] == []
+
+
+def test_old_bundles_are_pruned(tmp_path) -> None:
+    number, other = _sources(tmp_path)
+    root = tmp_path / "artifacts"
+    for value in range(KEEP_BUNDLES + 2):
+        number.write_text(str(value))
+        build_bundle(root, _stages(number, other), jobs=1)
+    assert len(list(root.glob("bundle-*"))) == KEEP_BUNDLES
+
+
+def test_artifact_store_serves_only_fresh_artifacts(tmp_path) -> None:
+    number, other = _sources(tmp_path)
+    root = tmp_path / "artifacts"
+    build_bundle(root, _stages(number, other), jobs=1)
+    store = ArtifactStore(root)
+
+    path = store.lookup("increment", "result.txt", (number,))
+    assert path is not None and path.read_text() == "41"
+    assert store.tag("increment") == store.get().version
+    assert store.lookup("increment", "result.txt", (tmp_path / "unrelated.txt",)) is None
+    assert store.lookup("double", "double.txt", value=20) is not None
+    assert store.lookup("double", "double.txt", value=21) is None
+
+    # ``increment`` reads ``number.txt`` through ``double``.
+    number.write_text("3")
+    assert store.lookup("increment", "result.txt") is None
+    assert store.lookup("copy", "copy.txt") is not None
+    assert store.tag("increment") == "none"
+
+    build_bundle(root, _stages(number, other), jobs=1)
+    assert store.get().manifest["generation"] == 1  # until the watcher clears it
+    assert store.clear() is not None
+    assert json.loads(store.lookup("increment", "result.txt").read_text()) == 7
+
+
+def test_bundled_volatility_matches_the_series(tmp_path) -> None:
+    rng = np.random.default_rng(2)
+    frame = pd.DataFrame(
+        {"Date": pd.bdate_range("2020-01-01", periods=90), "Price": 60 * np.exp(rng.normal(0, 0.02, 90).cumsum())}
+    )
+    prices = tmp_path / "prices.csv"
+    frame.to_csv(prices, index=False)
+
+    def volatility(inputs: Dict[str, Path], outputs: Dict[str, Path], windows: list) -> Dict[str, Any]:
+        series = PriceSeries.from_csv(inputs["prices"])
+        np.save(outputs["volatility.npy"], rolling_volatility(series.log_returns, windows))
+        return {"prices_version": series.version}
+
+    stage = Stage("volatility", volatility, {"prices": prices}, ("volatility.npy",), params={"windows": [5, 20]})
+    build_bundle(tmp_path / "artifacts", [stage], jobs=1)
+    store = ArtifactStore(tmp_path / "artifacts")
+    series = PriceSeries.from_csv(prices)
+
+    bundled = bundled_volatility(store, series)
+    assert sorted(bundled) == [5, 20]
+    np.testing.assert_allclose(bundled[20], rolling_volatility(series.log_returns, [20])[0], equal_nan=True)
+    assert bundled_volatility(store, series.append(pd.DataFrame({"Date": ["2021-01-01"], "Price": [70.0]}))) == {}
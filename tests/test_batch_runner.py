@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.models.batch_runner import (
+    WindowSpec,
+    allocate_cores,
+    calendar_windows,
+    load_results,
+    rolling_windows,
+    run_batch,
+)
+
+
+def _series() -> tuple[np.ndarray, pd.DatetimeIndex]:
+    rng = np.random.default_rng(0)
+    values = np.concatenate((rng.normal(0, 0.01, 200), rng.normal(0.02, 0.01, 200)))
+    return values, pd.date_range("2000-01-01", periods=len(values), freq="D")
+
+
+def test_allocate_cores_gives_spare_cores_to_chains() -> None:
+    assert allocate_cores(n_windows=20, n_cores=8, chains=4) == (8, 1)
+    assert allocate_cores(n_windows=2, n_cores=8, chains=4) == (2, 4)
+    assert allocate_cores(n_windows=3, n_cores=8, chains=4) == (3, 2)
+
+
+def test_window_generators_cover_the_series() -> None:
+    _, dates = _series()
+    rolling = rolling_windows(dates, length=100, step=50)
+    assert [spec.start for spec in rolling[:2]] == ["2000-01-01", "2000-02-20"]
+    assert len(rolling) == 7
+    assert calendar_windows(dates, years=1)[0] == WindowSpec("2000-2000", "2000-01-01", "2000-12-31")
+
+
+def test_run_batch_stores_results_and_skips_them_on_rerun(tmp_path) -> None:
+    values, dates = _series()
+    windows = [WindowSpec("all", "2000-01-01", "2001-12-31"), WindowSpec("late", "2000-05-01", "2001-12-31")]
+    config = {"method": "pelt"}
+    seen = []
+
+    keys = run_batch(values, dates, windows, config, tmp_path, n_cores=2, on_result=lambda *args: seen.append(args))
+    stored = load_results(tmp_path)
+
+    assert set(stored) == set(keys.values())
+    assert stored[keys["all"]]["result"]["change_points"][0]["tau_date"] == "2000-07-18"
+    assert not any(skipped for _, _, skipped in seen)
+
+    seen.clear()
+    assert run_batch(values, dates, windows, config, tmp_path, n_cores=2, on_result=lambda *args: seen.append(args)) == keys
+    assert all(skipped for _, _, skipped in seen) and len(seen) == 2
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run import compare, scaling_exponents
+from benchmarks.synthetic import frequency_for, synthetic_events, synthetic_prices
+
+
+def test_synthetic_prices_match_processed_layout() -> None:
+    prices = synthetic_prices(500, seed=1)
+
+    assert list(prices.columns) == ["Date", "Price", "log_price", "log_return"]
+    assert len(prices) == 500 and prices["Date"].is_monotonic_increasing
+    assert np.isnan(prices["log_return"].iloc[0])
+    assert np.allclose(np.diff(prices["log_price"]), prices["log_return"].iloc[1:])
+
+
+def test_frequency_for_switches_to_finer_bars_when_days_run_out() -> None:
+    assert frequency_for(9011) == "D"
+    assert frequency_for(900_000) == "h"
+    prices = synthetic_prices(100_000, seed=0)
+    assert prices["Date"].iloc[-1] < pd.Timestamp("2200-01-01")
+
+
+def test_synthetic_events_have_unique_dates_in_range() -> None:
+    events = synthetic_events(50, pd.Timestamp("2000-01-01"), pd.Timestamp("2000-12-31"))
+
+    assert len(events) == 50 and events["date"].is_unique
+    assert events["date"].min() >= "2000-01-01" and events["date"].max() <= "2000-12-31"
+
+
+def test_scaling_exponents_and_compare_flag_slow_results() -> None:
+    results = [
+        {"name": "linear", "scale": scale, "rows": rows, "status": "ok", "cold_ms": rows / 10}
+        for scale, rows in ((1, 1000), (10, 10_000))
+    ] + [
+        {"name": "quadratic", "scale": scale, "rows": rows, "status": 200, "cold_ms": rows**2 / 1e5}
+        for scale, rows in ((1, 1000), (10, 10_000))
+    ]
+    scaling = scaling_exponents(results)
+    assert not scaling["linear"]["superlinear"]
+    assert scaling["quadratic"]["superlinear"] and np.isclose(scaling["quadratic"]["exponent"], 2.0)
+
+    baseline = {"results": results}
+    slower = {"results": [{**item, "cold_ms": item["cold_ms"] * 2} for item in results]}
+    flagged = {(row["name"], row["scale"]) for row in compare(slower, baseline) if row["regression"]}
+    assert flagged == {("linear", 1), ("linear", 10), ("quadratic", 1), ("quadratic", 10)}
+    assert not any(row["regression"] for row in compare(baseline, baseline))
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+import cache as cache_module  # noqa: E402
+from cache import InMemoryCache  # noqa: E402
+
+
+def test_lru_eviction_respects_memory_budget() -> None:
+    cache = InMemoryCache(ttl_seconds=None, max_bytes=3 * 8000)
+    for key in "abc":
+        cache.set(key, np.zeros(1000))
+    assert cache.get("a") is not None
+    cache.set("d", np.zeros(1000))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_values_are_frozen_and_shared_without_copy() -> None:
+    cache = InMemoryCache()
+    values = np.arange(5.0)
+    cache.set("prices", {"Price": values})
+
+    hit = cache.get("prices")
+    assert hit["Price"] is values
+    with pytest.raises(ValueError):
+        hit["Price"][0] = 1.0
+
+
+def test_ttl_uses_monotonic_clock(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = InMemoryCache(ttl_seconds=10)
+    cache.set("k", 1)
+    now[0] = 109.0
+    assert cache.get("k") == 1
+    now[0] = 111.0
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_get_or_load_is_single_flight() -> None:
+    cache = InMemoryCache()
+    calls = []
+    start = threading.Barrier(8)
+
+    def loader() -> str:
+        calls.append(1)
+        time.sleep(0.05)
+        return "loaded"
+
+    results = []
+
+    def worker() -> None:
+        start.wait()
+        results.append(cache.get_or_load("prices", loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["loaded"] * 8
+    assert len(calls) == 1
+    assert cache.stats()["loads"] == 1
+
+
+def test_get_or_load_propagates_errors_and_retries() -> None:
+    cache = InMemoryCache()
+
+    def failing() -> None:
+        raise FileNotFoundError("missing")
+
+    with pytest.raises(FileNotFoundError):
+        cache.get_or_load("prices", failing)
+    assert cache.get_or_load("prices", lambda: 3) == 3
+
+
+def test_invalidate_drops_every_entry_with_tag() -> None:
+    cache = InMemoryCache()
+    cache.set("range_stats:v1", 1, tags=("v1",))
+    cache.set("http:abc:gzip", b"body", tags=("v1", "results-v7"))
+    cache.set("range_stats:v2", 2, tags=("v2",))
+
+    assert cache.invalidate("v1") == 2
+    assert cache.get("range_stats:v1") is None and cache.get("http:abc:gzip") is None
+    assert cache.get("range_stats:v2") == 2
+    assert cache.invalidate("results-v7") == 0
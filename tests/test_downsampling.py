@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from services.downsampling import downsample_indices  # noqa: E402
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_keeps_extremes_endpoints_and_change_points(method: str) -> None:
+    rng = np.random.default_rng(11)
+    y = rng.normal(0, 1, 5000).cumsum()
+    y[1234] = np.nan
+    x = np.arange(y.shape[0], dtype=np.float64)
+    keep = [777, 4321]
+
+    rows = downsample_indices(x, y, 300, method=method, keep=keep)
+
+    assert np.all(np.diff(rows) > 0)
+    assert rows.shape[0] <= 300 + 4 + len(keep)
+    assert {0, 4999, int(np.nanargmin(y)), int(np.nanargmax(y)), *keep} <= set(rows.tolist())
+    assert 1234 not in rows
+
+
+def test_downsample_returns_everything_when_small() -> None:
+    y = np.array([3.0, 1.0, 2.0])
+    assert downsample_indices(np.arange(3.0), y, 10).tolist() == [0, 1, 2]
+    with pytest.raises(ValueError):
+        downsample_indices(np.arange(3.0), y, 2, method="spline")
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services.event_service import EventCatalogue, cached_event_catalogue, get_events  # noqa: E402
+
+
+def _events(count: int, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    starts = pd.Timestamp("2000-01-01") + pd.to_timedelta(rng.integers(0, 8000, count), unit="D")
+    spans = pd.to_timedelta(rng.integers(0, 200, count), unit="D")
+    ends = pd.Series(starts + spans).where(rng.random(count) < 0.7)
+    return pd.DataFrame(
+        {
+            "start_date": starts.strftime("%Y-%m-%d"),
+            "end_date": ends.dt.strftime("%Y-%m-%d"),
+            "title": [f"event {i}" for i in range(count)],
+            "category": rng.choice(["OPEC", "War", "Sanctions"], count),
+        }
+    )
+
+
+def test_select_matches_full_scan() -> None:
+    df = _events(2000)
+    catalogue = EventCatalogue(df)
+    dates = pd.to_datetime(df["start_date"])
+    start, end = pd.Timestamp("2005-03-01"), pd.Timestamp("2009-07-31")
+
+    positions = catalogue.select(start, end, "War")
+    expected = df[(dates >= start) & (dates <= end) & (df["category"] == "War")]
+
+    assert sorted(catalogue.titles[positions]) == sorted(expected["title"])
+    assert np.all(np.diff(catalogue.dates[positions]) >= np.timedelta64(0))
+    assert len(catalogue.select(category="OPEC")) == int((df["category"] == "OPEC").sum())
+    assert len(catalogue.select(category="Unknown")) == 0
+
+
+def test_overlapping_matches_brute_force() -> None:
+    df = _events(3000, seed=4)
+    catalogue = EventCatalogue(df)
+    starts = pd.to_datetime(df["start_date"])
+    ends = pd.to_datetime(df["end_date"]).fillna(starts)
+
+    for lo, hi in (("2003-01-01", "2003-01-01"), ("2010-05-01", "2011-02-28"), ("1990-01-01", "1999-12-31")):
+        lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+        expected = df.loc[(starts <= hi) & (ends >= lo), "title"]
+        assert sorted(catalogue.titles[catalogue.overlapping(lo, hi)]) == sorted(expected)
+    assert len(catalogue.overlapping()) == len(df)
+
+
+def test_find_undated_rows_and_service_loader(tmp_path: Path) -> None:
+    path = tmp_path / "events.csv"
+    pd.DataFrame(
+        {
+            "date": ["2020-03-11", "not a date", "2008-09-15", "2020-03-11"],
+            "event": ["Pandemic", "Unknown", "Crisis", "Second"],
+            "category": ["Health", "", "Economic", "Health"],
+        }
+    ).to_csv(path, index=False)
+
+    cache = InMemoryCache()
+    catalogue = cached_event_catalogue(cache, path)
+    assert cached_event_catalogue(cache, path) is catalogue
+    assert catalogue.n_dated == 3 and len(catalogue) == 4
+    assert catalogue.titles[catalogue.find(pd.Timestamp("2020-03-11"))] == "Pandemic"
+    assert catalogue.find(pd.Timestamp("2020-03-12")) is None
+    assert len(catalogue.select()) == 4
+    assert len(catalogue.select(start=pd.Timestamp("2000-01-01"))) == 3
+
+    records = get_events(path)
+    assert [record["title"] for record in records] == ["Crisis", "Pandemic", "Second", "Unknown"]
+    assert records[-1]["date"] is None
+
+
+def test_category_filter_is_ignored_without_a_category_column() -> None:
+    catalogue = EventCatalogue(pd.DataFrame({"date": ["2020-01-01", "2020-06-01"], "event": ["a", "b"]}), "v1")
+
+    assert catalogue.select(category="Geopolitical").tolist() == [0, 1]
+    assert catalogue.overlapping(category="Geopolitical").tolist() == [0, 1]
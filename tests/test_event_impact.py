@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from services.event_impact import EventImpactEngine  # noqa: E402
+from services.price_store import PriceSeries  # noqa: E402
+from services.range_stats import RangeStatistics  # noqa: E402
+
+
+def test_batched_impacts_match_masked_means() -> None:
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2020-01-01", periods=200)
+    prices = pd.DataFrame({"Date": dates, "Price": 50 + rng.normal(0, 1, len(dates)).cumsum()})
+    engine = EventImpactEngine(RangeStatistics(PriceSeries.from_frame(prices)))
+
+    events = pd.to_datetime(["2020-02-15", "2020-05-04", "2019-06-01", None]).to_numpy()
+    result = engine.impacts(events, 30)
+
+    for idx, event in enumerate(events[:3]):
+        window = pd.Timedelta(days=30)
+        before = prices[(prices["Date"] >= event - window) & (prices["Date"] < event)]["Price"]
+        after = prices[(prices["Date"] > event) & (prices["Date"] <= event + window)]["Price"]
+        assert np.isclose(result.before_mean[idx], before.mean(), equal_nan=True)
+        assert np.isclose(result.after_mean[idx], after.mean(), equal_nan=True)
+        returns = np.log(after).diff()
+        assert np.isclose(result.after_volatility[idx], returns.std(), equal_nan=True)
+    assert result.before_count[3] == 0 and np.isnan(result.pct_change[3])
+
+
+def test_impacts_broadcast_events_by_windows() -> None:
+    dates = pd.date_range("2021-01-01", periods=60)
+    series = PriceSeries.from_frame(pd.DataFrame({"Date": dates, "Price": np.arange(1.0, 61.0)}))
+    engine = EventImpactEngine(RangeStatistics(series))
+    events = pd.to_datetime(["2021-01-20", "2021-02-10"]).to_numpy()
+
+    grid = engine.impacts(events[:, None], np.array([5, 10, 20]))
+    assert grid.before_mean.shape == (2, 3)
+    assert grid.before_count[0].tolist() == [5, 10, 19]
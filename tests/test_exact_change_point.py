@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.exact_change_point import (
+    NormalInverseGammaSegments,
+    _forward,
+    exact_change_point_posterior,
+    posterior_results,
+)
+
+
+def _series() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return np.concatenate((rng.normal(0, 1, 8), rng.normal(3, 1, 7), rng.normal(0, 0.3, 9)))
+
+
+def _enumerate(values: np.ndarray, max_changes: int, min_size: int):
+    """Brute-force posterior over every admissible segmentation."""
+    segments = NormalInverseGammaSegments(values)
+    n = len(values)
+    log_evidence, location_terms = [], []
+    for k in range(max_changes + 1):
+        scored = []
+        for breaks in itertools.combinations(range(1, n), k):
+            bounds = (0, *breaks, n)
+            if min(np.diff(bounds)) < min_size:
+                continue
+            scored.append((breaks, sum(segments.log_marginal(s, e) for s, e in zip(bounds[:-1], bounds[1:]))))
+        log_liks = np.array([score for _, score in scored])
+        peak = log_liks.max()
+        log_evidence.append(peak + np.log(np.exp(log_liks - peak).mean()))
+        location_terms.append([(breaks, np.exp(score - peak) / np.exp(log_liks - peak).sum()) for breaks, score in scored])
+    log_evidence = np.array(log_evidence)
+    n_changes = np.exp(log_evidence - log_evidence.max())
+    n_changes /= n_changes.sum()
+    location = np.zeros(n + 1)
+    for k, terms in enumerate(location_terms):
+        for breaks, weight in terms:
+            location[list(breaks)] += n_changes[k] * weight
+    return n_changes, location
+
+
+def test_matches_brute_force_enumeration() -> None:
+    values = _series()
+    posterior = exact_change_point_posterior(values, max_change_points=3, min_size=2)
+    n_changes, location = _enumerate(values, 3, 2)
+
+    np.testing.assert_allclose(posterior.n_change_points, n_changes, atol=1e-10)
+    np.testing.assert_allclose(posterior.location, location, atol=1e-10)
+    assert posterior.map_breaks == [6, 8, 15]
+
+
+def test_results_schema_and_pruned_approximation() -> None:
+    rng = np.random.default_rng(1)
+    values = np.concatenate((rng.normal(0, 1, 150), rng.normal(2, 1, 150), rng.normal(0, 3, 150)))
+    exact = exact_change_point_posterior(values, max_change_points=4)
+    pruned = exact_change_point_posterior(values, max_change_points=4, prune_threshold=1e-60)
+    assert exact.map_breaks == pruned.map_breaks
+    np.testing.assert_allclose(exact.location, pruned.location, atol=1e-8)
+
+    dates = pd.date_range("2020-01-01", periods=len(values), freq="D")
+    results = posterior_results(values, dates, exact)
+    assert results["n_change_points"] == len(exact.map_breaks) == 2
+    assert 0 < results["change_points"][0]["probability"] <= 1
+    assert sum(results["n_change_points_posterior"].values()) == pytest.approx(1.0)
+    assert {"mu", "sigma", "posterior_mu", "posterior_sigma"} <= set(results["regimes"][0])
+
+
+class _CountingSegments(NormalInverseGammaSegments):
+    def __init__(self, values) -> None:
+        super().__init__(values)
+        self.scored = 0
+
+    def log_marginal(self, starts, ends):
+        self.scored += np.size(starts)
+        return super().log_marginal(starts, ends)
+
+
+def test_pruning_shrinks_candidates_and_runtime_but_keeps_map_breaks() -> None:
+    rng = np.random.default_rng(2)
+    values = np.concatenate([rng.normal(mu, 1, 1000) for mu in (0, 2, -1, 1)])
+    exact_segments, pruned_segments = _CountingSegments(values), _CountingSegments(values)
+    _forward(exact_segments, 5, 5, 0.0)
+    _forward(pruned_segments, 5, 5, 1e-60)
+    assert pruned_segments.scored < exact_segments.scored / 2
+
+    def best_of_three(threshold):
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            posterior = exact_change_point_posterior(values, max_change_points=4, prune_threshold=threshold)
+            timings.append(time.perf_counter() - started)
+        return min(timings), posterior
+
+    exact_time, exact = best_of_three(0.0)
+    pruned_time, pruned = best_of_three(1e-60)
+    assert pruned.map_breaks == exact.map_breaks
+    assert len(exact.map_breaks) == 3
+    assert pruned_time < exact_time
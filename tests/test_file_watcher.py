@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from utils.file_watcher import FileWatcher  # noqa: E402
+from utils.fingerprint import file_version  # noqa: E402
+
+
+def _bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_check_reports_changes_with_old_and_new_versions(tmp_path) -> None:
+    source = tmp_path / "results.json"
+    source.write_text("{}")
+    watcher = FileWatcher()
+    seen = []
+    watcher.watch(source, lambda old, new: seen.append((old, new)))
+
+    assert watcher.check() == []
+    before = file_version(source)
+    source.write_text('{"n_change_points": 2}')
+    _bump_mtime(source)
+
+    assert watcher.check() == [source]
+    assert seen == [(before, file_version(source))]
+    source.unlink()
+    watcher.check()
+    assert seen[-1][1] == "missing"
+
+
+def test_hashed_versions_ignore_rewrites_with_same_content(tmp_path) -> None:
+    source = tmp_path / "prices.csv"
+    source.write_text("Date,Price\n2020-01-01,10.0\n")
+    watcher = FileWatcher(hashed=True)
+    seen = []
+    watcher.watch(source, lambda old, new: seen.append(new))
+
+    _bump_mtime(source)
+    assert watcher.check() == []
+    source.write_text("Date,Price\n2020-01-01,11.0\n")
+    assert watcher.check() == [source]
+    assert seen == [file_version(source, hashed=True)]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import gzip
+import sys
+from pathlib import Path
+
+from flask import Flask, jsonify
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from utils.http_cache import conditional  # noqa: E402
+
+
+def _make_app(state: dict) -> Flask:
+    app = Flask(__name__)
+    app.config["CACHE"] = InMemoryCache()
+
+    @app.route("/data")
+    @conditional(lambda: state["version"])
+    def data():
+        state["calls"] += 1
+        return jsonify({"values": list(range(500)), "version": state["version"]})
+
+    return app
+
+
+def test_conditional_get_skips_view_until_version_changes() -> None:
+    state = {"version": "v1", "calls": 0}
+    client = _make_app(state).test_client()
+
+    first = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert b'"version":"v1"' in gzip.decompress(first.data)
+    etag = first.headers["ETag"]
+
+    assert client.get("/data", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/data", headers={"Accept-Encoding": "gzip"}).status_code == 200
+    assert state["calls"] == 1
+
+    state["version"] = "v2"
+    refreshed = client.get("/data", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert state["calls"] == 2
+
+
+def test_query_arguments_are_part_of_the_etag() -> None:
+    client = _make_app({"version": "v1", "calls": 0}).test_client()
+    assert client.get("/data?window=5").headers["ETag"] != client.get("/data?window=6").headers["ETag"]
+
+
+def test_composite_versions_are_invalidated_by_any_component() -> None:
+    state = {"version": "results-1:bundle-1", "calls": 0}
+    app = _make_app(state)
+    client = app.test_client()
+
+    client.get("/data")
+    client.get("/data")
+    assert state["calls"] == 1
+    assert app.config["CACHE"].invalidate("results-1") == 1
+    client.get("/data")
+    assert state["calls"] == 2
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.data.ingest import ingest_prices, load_price_columns, parse_dates, price_frame, read_meta
+
+RAW = 'Date,Price\n20-May-87,18.63\n21-May-87,18.45\n"Apr 22, 2020",20.0\n'
+
+
+def test_parse_dates_detects_each_format() -> None:
+    parsed = parse_dates(["20-May-87", "Apr 22, 2020", "2021-01-05", "garbage"])
+
+    assert list(parsed[:3]) == [pd.Timestamp("1987-05-20"), pd.Timestamp("2020-04-22"), pd.Timestamp("2021-01-05")]
+    assert pd.isna(parsed[3])
+
+
+def test_ingest_builds_memory_mapped_columns(tmp_path) -> None:
+    raw = tmp_path / "prices.csv"
+    raw.write_text(RAW)
+
+    assert ingest_prices(raw, tmp_path / "store") == 3
+    columns = load_price_columns(tmp_path / "store")
+
+    assert isinstance(columns["Price"], np.memmap)
+    assert not columns["Price"].flags.writeable
+    assert columns["Date"].dtype == np.dtype("datetime64[ns]")
+    assert np.isnan(columns["log_return"][0])
+    np.testing.assert_allclose(columns["log_return"][1:], np.diff(np.log([18.63, 18.45, 20.0])))
+
+
+def test_ingest_appends_only_new_rows(tmp_path) -> None:
+    raw = tmp_path / "prices.csv"
+    raw.write_text(RAW)
+    store = tmp_path / "store"
+    ingest_prices(raw, store)
+    version = read_meta(store)["version"]
+
+    assert ingest_prices(raw, store) == 0
+    with open(raw, "a") as handle:
+        handle.write('"Apr 23, 2020",22.0\n24-Apr-20,21.0\n')
+    assert ingest_prices(raw, store) == 2
+
+    frame = price_frame(store)
+    assert len(frame) == 5
+    assert np.isclose(frame["log_return"].iloc[3], np.log(22.0 / 20.0))
+    assert read_meta(store)["version"] != version
+
+
+def test_ingest_rebuilds_when_history_changes(tmp_path) -> None:
+    raw = tmp_path / "prices.csv"
+    raw.write_text(RAW)
+    store = tmp_path / "store"
+    ingest_prices(raw, store)
+
+    raw.write_text(RAW.replace("18.45", "19.00") + "2020-04-23,21.0\n")
+
+    assert ingest_prices(raw, store) == 4
+    assert price_frame(store)["Price"].tolist() == [18.63, 19.0, 20.0, 21.0]
+
+
+def test_ingest_rebuilds_when_early_history_changes_and_rows_are_appended(tmp_path) -> None:
+    days = pd.date_range("2000-01-01", periods=1000).strftime("%Y-%m-%d")
+    raw = tmp_path / "prices.csv"
+    raw.write_text("Date,Price\n" + "".join(f"{day},{50 + i % 7}.5\n" for i, day in enumerate(days)))
+    store = tmp_path / "store"
+    ingest_prices(raw, store)
+
+    raw.write_text(raw.read_text().replace("2000-01-01,50.5", "2000-01-01,18.63") + "2010-01-01,70.0\n")
+
+    assert ingest_prices(raw, store) == 1001
+    assert price_frame(store)["Price"].iloc[0] == 18.63
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+from flask import Flask, jsonify
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from utils.instrumentation import Histogram, init_instrumentation, span  # noqa: E402
+from utils.profiler import SlowRequestProfiler  # noqa: E402
+
+
+def _make_app(profiler: SlowRequestProfiler | None = None) -> Flask:
+    app = Flask(__name__)
+    init_instrumentation(app, profiler)
+
+    @app.route("/work/<int:ms>")
+    def work(ms: int):
+        with span("load"):
+            time.sleep(ms / 1000)
+        return jsonify({"slept": ms})
+
+    return app
+
+
+def test_server_timing_lists_spans_and_total() -> None:
+    client = _make_app().test_client()
+
+    header = client.get("/work/5").headers["Server-Timing"]
+    entries = dict(item.split(";dur=") for item in header.split(", "))
+
+    assert set(entries) == {"load", "serialize", "total"}
+    assert float(entries["load"]) >= 5.0
+    assert float(entries["total"]) >= float(entries["load"])
+
+
+def test_metrics_render_histograms_by_route_and_cache_ratio() -> None:
+    app = _make_app()
+    client = app.test_client()
+    client.get("/work/1")
+    client.get("/work/2")
+    client.get("/missing")
+    cache = InMemoryCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    text = app.config["METRICS"].render(cache.stats())
+
+    route = 'route="/work/<int:ms>",method="GET",status="200"'
+    assert f"brent_http_request_duration_seconds_count{{{route}}} 2" in text
+    assert f'brent_http_request_duration_seconds_bucket{{{route},le="+Inf"}} 2' in text
+    assert 'route="<unmatched>",method="GET",status="404"' in text
+    assert 'brent_http_response_size_bytes_count{route="/work/<int:ms>"} 2' in text
+    assert 'brent_span_duration_seconds_count{span="load"} 2' in text
+    assert "brent_cache_hits_total 1" in text
+    assert "brent_cache_hit_ratio 0.5" in text
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    histogram = Histogram("h", "help", (1.0, 2.0), ("k",))
+    for value in (0.5, 1.0, 1.5, 3.0):
+        histogram.observe(value, "x")
+
+    lines = histogram.render()
+
+    assert 'h_bucket{k="x",le="1"} 2' in lines
+    assert 'h_bucket{k="x",le="2"} 3' in lines
+    assert 'h_bucket{k="x",le="+Inf"} 4' in lines
+    assert 'h_sum{k="x"} 6' in lines
+
+
+def test_profiler_dumps_folded_stacks_for_slow_requests_only(tmp_path: Path) -> None:
+    profiler = SlowRequestProfiler(tmp_path, threshold_ms=40, interval_ms=1)
+    client = _make_app(profiler).test_client()
+
+    client.get("/work/1")
+    assert list(tmp_path.iterdir()) == []
+
+    client.get("/work/60")
+    (dump,) = tmp_path.iterdir()
+    lines = dump.read_text().splitlines()
+    assert dump.suffix == ".folded"
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("test_instrumentation:_make_app.<locals>.work" in line for line in lines)
+
+
+def test_span_outside_requests_records_into_given_registry() -> None:
+    app = _make_app()
+    metrics = app.config["METRICS"]
+
+    def background() -> None:
+        with span("background", metrics):
+            pass
+
+    thread = threading.Thread(target=background)
+    thread.start()
+    thread.join()
+
+    assert 'brent_span_duration_seconds_count{span="background"} 1' in metrics.render()
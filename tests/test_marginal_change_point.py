@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pymc")
+xr = pytest.importorskip("xarray")
+from src.models.change_point import _prefix_sums, _tau_log_likelihood, tau_posterior  # noqa: E402
+
+
+def _normal_logpdf(y: np.ndarray, mu: float, sigma: float) -> np.ndarray:
+    return -0.5 * np.log(2 * np.pi * sigma**2) - (y - mu) ** 2 / (2 * sigma**2)
+
+
+def test_prefix_sum_likelihood_matches_direct_sum() -> None:
+    y = np.random.default_rng(0).normal(0, 1, 60)
+    log_lik = _tau_log_likelihood(_prefix_sums(y), 0.2, -0.3, 0.9)
+    direct = [
+        _normal_logpdf(y[: tau + 1], 0.2, 0.9).sum() + _normal_logpdf(y[tau + 1 :], -0.3, 0.9).sum()
+        for tau in range(60)
+    ]
+    np.testing.assert_allclose(log_lik, direct)
+
+
+def test_tau_posterior_concentrates_on_break() -> None:
+    rng = np.random.default_rng(1)
+    y = np.concatenate((rng.normal(0, 0.5, 50), rng.normal(3, 0.5, 50)))
+
+    class _Trace:
+        posterior = xr.Dataset(
+            {
+                "mu_1": (("chain", "draw"), np.zeros((2, 20))),
+                "mu_2": (("chain", "draw"), np.full((2, 20), 3.0)),
+                "sigma": (("chain", "draw"), np.full((2, 20), 0.5)),
+            }
+        )
+
+    probabilities = tau_posterior(y, _Trace())
+    assert probabilities.sum() == pytest.approx(1.0)
+    assert abs(int(np.argmax(probabilities)) - 49) <= 2
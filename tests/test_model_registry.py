@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+xr = pytest.importorskip("xarray")
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services import model_registry  # noqa: E402
+from services.model_registry import ModelRegistry, config_hash, model_summary  # noqa: E402
+
+
+def _write_model(models_dir: Path, version: str, config: dict, shift: float = 0.0) -> None:
+    directory = models_dir / version
+    directory.mkdir(parents=True)
+    (directory / "model_config.json").write_text(json.dumps(config))
+    rng = np.random.default_rng(0)
+    posterior = xr.Dataset(
+        {
+            "tau": (("chain", "draw"), np.full((2, 100), 40)),
+            "mu_1": (("chain", "draw"), rng.normal(shift, 0.1, (2, 100))),
+            "mu_2": (("chain", "draw"), rng.normal(shift + 1, 0.1, (2, 100))),
+            "sigma": (("chain", "draw"), np.full((2, 100), 0.5)),
+        },
+        coords={"chain": [0, 1], "draw": np.arange(100)},
+    )
+    posterior.to_netcdf(directory / "posterior.nc", group="posterior")
+
+
+def test_index_by_version_and_config_hash(tmp_path) -> None:
+    _write_model(tmp_path, "v1", {"draws": 100, "chains": 2})
+    _write_model(tmp_path, "v2", {"chains": 2, "draws": 100}, shift=1.0)
+    (tmp_path / "online").mkdir()
+    registry = ModelRegistry(tmp_path, default_version="v1")
+
+    assert sorted(registry.index()) == ["v1", "v2"]
+    assert registry.entry().version == "v1"
+    assert registry.entry("v1").config_hash == config_hash({"chains": 2, "draws": 100})
+    assert [entry.version for entry in registry.with_config_hash(registry.entry("v1").config_hash)] == ["v1", "v2"]
+    with pytest.raises(ValueError, match="Unknown model version"):
+        registry.entry("v3")
+
+    (tmp_path / "v2" / "model_config.json").write_text(json.dumps({"chains": 4}))
+    assert registry.entry("v2").config_hash == config_hash({"chains": 4})
+
+
+def test_variables_load_lazily_once_and_are_evicted_under_the_memory_budget(tmp_path, monkeypatch) -> None:
+    _write_model(tmp_path, "v1", {"seed": 1})
+    _write_model(tmp_path, "v2", {"seed": 2}, shift=1.0)
+    # Room for four 2x100 float64/int64 arrays: one model's variables, not two.
+    registry = ModelRegistry(tmp_path, InMemoryCache(), default_version="v1", max_bytes=6_400)
+    reads = []
+    read_draws = model_registry.read_draws
+
+    def recording_read(path, names):
+        reads.append(list(names))
+        return read_draws(path, names)
+
+    monkeypatch.setattr(model_registry, "read_draws", recording_read)
+
+    assert registry.variables("v1") == ("tau", "mu_1", "mu_2", "sigma")
+    assert not registry.is_loaded(registry.entry("v1")) and reads == []
+    (first,) = registry.summaries("v1", ["mu_2"], chains=[1], thin=2)
+    assert reads == [["mu_2"]] and registry.is_loaded(registry.entry("v1"))
+    assert registry.draws("v1", ["mu_2"])["mu_2"] is registry.draws("v1", ["mu_2"])["mu_2"]
+    assert reads == [["mu_2"]]
+    assert first.draws.shape == (50,)
+    assert first.mean == pytest.approx(registry.draws("v1", ["mu_2"])["mu_2"][1, ::2].mean())
+    with pytest.raises(ValueError, match="Unknown posterior variables"):
+        registry.draws("v1", ["mu_3"])
+
+    registry.summary("v1")
+    assert sorted(map(tuple, reads)) == [("mu_1",), ("mu_2",), ("sigma",), ("tau",)]
+    registry.summary("v2")
+    assert registry.is_loaded(registry.entry("v2")) and not registry.is_loaded(registry.entry("v1"))
+    assert registry.stats()["evictions"] == 4
+    # Evicted variables are read again; summaries outlive eviction of the draws.
+    del reads[:]
+    registry.draws("v1", ["tau", "mu_1", "mu_2", "sigma"])
+    assert len(reads) == 4
+    assert registry.summary("v2") is registry.summary("v2")
+
+
+def test_model_summary_has_tau_hdi_and_regime_parameters() -> None:
+    draws = {
+        "tau": np.full((2, 10), 40),
+        "mu_1": np.zeros((2, 10)),
+        "mu_2": np.ones((2, 10)),
+        "sigma": np.full((2, 10), 0.5),
+    }
+    summary = model_summary(draws)
+    assert summary["n_change_points"] == 1
+    (cp,) = summary["change_points"]
+    assert (cp["name"], cp["mean"], cp["hdi_lower"], cp["hdi_upper"]) == ("cp_1", 40.0, 40.0, 40.0)
+    assert [regime["name"] for regime in summary["regimes"]] == ["regime_1", "regime_2"]
+    assert [regime["mu"]["mean"] for regime in summary["regimes"]] == [0.0, 1.0]
+    assert [regime["sigma"]["mean"] for regime in summary["regimes"]] == [0.5, 0.5]
+
+
+def test_placeholder_posterior_is_not_found(tmp_path) -> None:
+    directory = tmp_path / "v2"
+    directory.mkdir()
+    (directory / "model_config.json").write_text("{}")
+    (directory / "posterior.nc").write_text("placeholder")
+    registry = ModelRegistry(tmp_path)
+
+    assert registry.entry("v2").describe()["has_posterior"]
+    with pytest.raises(FileNotFoundError):
+        registry.summary("v2")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import fields
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services.ohlc import OHLCPyramid, OHLCService  # noqa: E402
+from services.price_store import PriceSeries  # noqa: E402
+
+
+def _frame(periods: int, freq: str = "h", seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prices = 70 * np.exp(rng.normal(0, 0.01, periods).cumsum())
+    return pd.DataFrame({"Date": pd.date_range("2021-12-27 09:30", periods=periods, freq=freq), "Price": prices})
+
+
+def test_levels_match_pandas_resample() -> None:
+    frame = _frame(24 * 90)
+    pyramid = OHLCPyramid.build(PriceSeries.from_frame(frame))
+    prices = frame.set_index("Date")["Price"]
+
+    for name, rule in (("day", "D"), ("week", "W-MON"), ("month", "MS")):
+        level = pyramid.levels[name]
+        expected = prices.resample(rule, label="left", closed="left").ohlc().dropna()
+        assert np.array_equal(level.start, expected.index.to_numpy())
+        for column in ("open", "high", "low", "close"):
+            assert np.allclose(getattr(level, column), expected[column])
+        assert level.count.sum() == len(frame)
+    assert pd.Timestamp(pyramid.levels["week"].start[0]).day_name() == "Monday"
+
+
+def test_extend_matches_full_rebuild() -> None:
+    frame = _frame(24 * 70)
+    base = PriceSeries.from_frame(frame.iloc[:1000])
+    series = base.append(frame.iloc[1000:])
+
+    extended = OHLCPyramid.build(base).extend(series)
+    rebuilt = OHLCPyramid.build(series)
+
+    for name, level in rebuilt.levels.items():
+        for item in fields(level):
+            assert np.allclose(
+                getattr(extended.levels[name], item.name).astype("float64"), getattr(level, item.name).astype("float64")
+            ), (name, item.name)
+
+
+def test_service_extends_ancestor_and_auto_picks_coarsest_filled_level() -> None:
+    frame = _frame(24 * 400)
+    cache = InMemoryCache()
+    service = OHLCService(cache)
+    base = PriceSeries.from_frame(frame.iloc[:5000])
+    service.get(base)
+    series = base.append(frame.iloc[5000:])
+    pyramid = service.get(series)
+
+    assert cache.stats()["loads"] == 2
+    assert pyramid.levels["day"].count.sum() == len(frame)
+    assert pyramid.resolve("auto", target=300) == "day"
+    assert pyramid.resolve("auto", target=10) == "month"
+    january = (pd.Timestamp("2022-01-01"), pd.Timestamp("2022-01-31"))
+    assert pyramid.resolve("auto", *january, target=300) == "hour"
+    assert pyramid.resolve("week") == "week"
+    with pytest.raises(ValueError):
+        pyramid.resolve("fortnight")
+
+
+def test_daily_levels_share_arrays_and_appends_reuse_capacity() -> None:
+    frame = _frame(400, freq="D")
+    frame["Date"] = frame["Date"].dt.normalize()
+    service = OHLCService(InMemoryCache())
+    series = PriceSeries.from_frame(frame.iloc[:300])
+    pyramid = service.get(series)
+    assert pyramid.levels["minute"] is pyramid.levels["raw"]
+    assert pyramid.levels["day"] is pyramid.levels["raw"]
+
+    copies = 0
+    for stop in range(301, 401):
+        previous = pyramid
+        closed = previous.levels["week"].close[:-1].copy()
+        series = series.append(frame.iloc[stop - 1 : stop])
+        pyramid = service.get(series)
+        assert pyramid.levels["day"] is pyramid.levels["raw"]
+        # Only the last bar is rewritten, in place unless the buffer is full.
+        assert np.array_equal(previous.levels["week"].close[:-1], closed)
+        for name in ("week", "month"):
+            copies += not np.shares_memory(pyramid.levels[name].close, previous.levels[name].close)
+    assert copies <= 4
+
+    rebuilt = OHLCPyramid.build(PriceSeries.from_frame(frame))
+    for name, level in rebuilt.levels.items():
+        for item in fields(level):
+            assert np.array_equal(getattr(pyramid.levels[name], item.name), getattr(level, item.name)), (name, item.name)
+
+    # Hourly rows starting a new day leave the day level's last bar alone, so it grows in place.
+    hourly = _frame(24 * 10)
+    first = PriceSeries.from_frame(hourly.iloc[:135])
+    second = first.append(hourly.iloc[135:159])
+    third = second.append(hourly.iloc[159:183])
+    grown = OHLCPyramid.build(first).extend(second)
+    extended = grown.extend(third)
+    assert np.shares_memory(grown.levels["day"].close, extended.levels["day"].close)
+    # A pyramid that was already extended is extended again by copying, leaving the first extension intact.
+    served = extended.levels["day"].close.copy()
+    branch = grown.extend(second.append(hourly.iloc[159:170]))
+    assert not np.shares_memory(extended.levels["day"].close, branch.levels["day"].close)
+    assert branch.levels["day"].count.sum() == 170
+    assert np.array_equal(extended.levels["day"].close, served)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.models.online_change_point import OnlineChangePointDetector
+
+
+def _series() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return np.concatenate((rng.normal(0, 0.01, 300), rng.normal(0, 0.04, 300)))
+
+
+def test_flags_variance_change_shortly_after_it_happens() -> None:
+    detector = OnlineChangePointDetector(beta0=1e-4)
+    probabilities = detector.update_many(_series())
+
+    assert probabilities[250:295].max() < 0.5
+    assert probabilities[300:310].max() > 0.5
+    assert abs(detector.map_run_length() - 300) <= 5
+
+
+def test_state_stays_bounded() -> None:
+    rng = np.random.default_rng(1)
+    detector = OnlineChangePointDetector(beta0=1e-4, max_run_length=50)
+    detector.update_many(rng.normal(0, 0.01, 500))
+
+    assert detector.run_lengths.shape[0] <= 50
+    assert detector.n_observations == 500
+    assert np.isclose(np.exp(detector.log_probs).sum(), 1.0)
+
+
+def test_save_and_load_resume_the_stream(tmp_path) -> None:
+    values = _series()
+    reference = OnlineChangePointDetector(beta0=1e-4)
+    expected = reference.update_many(values)
+
+    first = OnlineChangePointDetector(beta0=1e-4)
+    first.update_many(values[:280])
+    first.last_date = "2020-01-01"
+    first.save(tmp_path / "state.npz")
+    resumed = OnlineChangePointDetector.load(tmp_path / "state.npz")
+
+    assert resumed.last_date == "2020-01-01"
+    np.testing.assert_allclose(resumed.update_many(values[280:]), expected[280:])
+    assert resumed.summary() == reference.summary() | {"last_date": "2020-01-01"}
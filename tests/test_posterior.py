@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+xr = pytest.importorskip("xarray")
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services.posterior import PosteriorService, evenly_spaced, hdi, open_posterior  # noqa: E402
+
+
+def _write_trace(path: Path) -> np.ndarray:
+    tau = np.arange(2 * 50).reshape(2, 50)
+    posterior = xr.Dataset(
+        {"tau": (("chain", "draw"), tau), "sigma": (("chain", "draw"), np.full((2, 50), 0.5))},
+        coords={"chain": [0, 1], "draw": np.arange(50)},
+    )
+    posterior.to_netcdf(path, group="posterior")
+    return tau
+
+
+def test_hdi_is_narrowest_interval() -> None:
+    samples = np.concatenate((np.zeros(90), np.linspace(100, 200, 10)))
+    assert hdi(samples, 0.85) == (0.0, 0.0)
+    assert hdi(np.arange(101.0), 0.5) == (0.0, 50.0)
+
+
+def test_summaries_select_chains_and_stride() -> None:
+    tau = np.arange(2 * 50).reshape(2, 50)
+    draws = {"tau": tau, "sigma": np.full((2, 50), 0.5)}
+    service = PosteriorService(InMemoryCache())
+
+    (summary,) = service.summaries("model", "v1", draws, ["tau"], chains=[1], thin=5)
+    expected = tau[1, ::5]
+    assert summary.draws.tolist() == expected.tolist()
+    assert summary.mean == pytest.approx(expected.mean())
+    assert summary.histogram_counts.sum() == expected.shape[0]
+    assert evenly_spaced(summary.draws, 3).tolist() == [50, 70, 95]
+
+    again = service.summaries("model", "v1", draws, ["tau"], chains=[1], thin=5)
+    assert again[0] is summary
+    with pytest.raises(ValueError):
+        service.summaries("model", "v1", draws, ["mu_3"])
+    with pytest.raises(ValueError):
+        service.summaries("model", "v1", draws, ["tau"], chains=[2])
+
+
+def test_posterior_group_is_opened_and_placeholder_is_not_found(tmp_path) -> None:
+    path = tmp_path / "posterior.nc"
+    tau = _write_trace(path)
+    with open_posterior(path) as dataset:
+        assert list(dataset.data_vars) == ["tau", "sigma"]
+        np.testing.assert_array_equal(dataset["tau"].values, tau)
+
+    placeholder = tmp_path / "placeholder.nc"
+    placeholder.write_text("placeholder posterior artifact")
+    with pytest.raises(FileNotFoundError):
+        open_posterior(placeholder)
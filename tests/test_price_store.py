@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from services.price_store import PriceSeries, PriceStore  # noqa: E402
+
+
+def _write_prices(path: Path) -> None:
+    path.write_text(
+        "Date,Price\n2020-01-03,12.0\n2020-01-01,10.0\n2020-01-02,11.0\nnot-a-date,99.0\n"
+    )
+
+
+def test_price_series_sorted_readonly_with_log_returns(tmp_path) -> None:
+    csv = tmp_path / "prices.csv"
+    _write_prices(csv)
+    series = PriceSeries.from_csv(csv)
+
+    assert len(series) == 3
+    assert series.prices.tolist() == [10.0, 11.0, 12.0]
+    assert np.isnan(series.log_returns[0])
+    assert series.log_returns[1] == pytest.approx(np.log(11.0 / 10.0))
+    with pytest.raises(ValueError):
+        series.prices[0] = 0.0
+
+    assert series.bounds(datetime(2020, 1, 2), datetime(2020, 1, 3)) == (1, 3)
+    frame = series.to_frame(*series.bounds(end=datetime(2020, 1, 1)))
+    assert frame["Price"].tolist() == [10.0]
+
+
+def test_price_store_loads_once(tmp_path) -> None:
+    csv = tmp_path / "prices.csv"
+    _write_prices(csv)
+    store = PriceStore(csv)
+
+    first = store.get()
+    csv.unlink()
+    assert store.get() is first
+
+    store.clear()
+    with pytest.raises(FileNotFoundError):
+        store.get()
+
+
+def test_append_extends_series_and_rejects_older_rows(tmp_path) -> None:
+    csv = tmp_path / "prices.csv"
+    _write_prices(csv)
+    series = PriceSeries.from_csv(csv)
+
+    appended = series.append(pd.DataFrame({"Date": ["2020-01-06"], "Price": [13.2]}))
+    assert len(appended) == 4
+    assert appended.log_returns[-1] == pytest.approx(np.log(13.2 / 12.0))
+    assert appended.version != series.version
+    with pytest.raises(ValueError):
+        appended.append(pd.DataFrame({"Date": ["2020-01-02"], "Price": [1.0]}))
+
+
+def test_store_append_writes_rows_to_the_file(tmp_path) -> None:
+    csv = tmp_path / "prices.csv"
+    csv.write_text("Date,Price,log_price\n2020-01-01,10.0,2.302585\n2020-01-02,11.0,2.397895")
+    store = PriceStore(csv)
+    store.get()
+
+    appended = store.append(pd.DataFrame({"Date": ["2020-01-03"], "Price": [12.0]}))
+    assert appended.columns["log_price"][-1] == pytest.approx(np.log(12.0))
+
+    store.clear()
+    reloaded = store.get()
+    assert reloaded.prices.tolist() == [10.0, 11.0, 12.0]
+    assert reloaded.columns["log_price"][-1] == pytest.approx(np.log(12.0))
+    assert store.append(pd.DataFrame({"Date": [], "Price": []})) is reloaded
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from services.price_store import PriceSeries  # noqa: E402
+from services.range_stats import RangeStatistics  # noqa: E402
+
+
+def test_range_summary_matches_pandas_on_random_windows() -> None:
+    rng = np.random.default_rng(7)
+    prices = 60 + rng.normal(0, 2, 500).cumsum()
+    prices[[10, 250, 251]] = np.nan
+    frame = pd.DataFrame({"Date": pd.date_range("2000-01-01", periods=500), "Price": prices})
+    stats = RangeStatistics(PriceSeries.from_frame(frame))
+    series = frame["Price"]
+
+    for lo, hi in [(0, 500), (3, 4), (5, 17), (240, 260), (100, 499)]:
+        window = series.iloc[lo:hi]
+        summary = stats.summary(lo, hi)
+        assert summary.count == window.count()
+        assert np.isclose(summary.mean, window.mean())
+        assert np.isclose(summary.std, window.std(), equal_nan=True)
+        assert np.isclose(summary.median, window.median())
+        assert summary.min == window.min() and summary.max == window.max()
+        assert np.isclose(summary.quantiles[0.75], window.quantile(0.75))
+
+
+def test_batched_means_and_empty_range() -> None:
+    frame = pd.DataFrame({"Date": pd.date_range("2000-01-01", periods=10), "Price": np.arange(10.0)})
+    stats = RangeStatistics(PriceSeries.from_frame(frame))
+
+    mean, _ = stats.mean_std(np.array([0, 2]), np.array([4, 10]))
+    assert mean.tolist() == [1.5, 5.5]
+    empty = stats.summary(3, 3)
+    assert empty.count == 0 and np.isnan(empty.median)
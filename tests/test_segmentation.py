@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.segmentation import (
+    SegmentCost,
+    detect_change_points,
+    pelt,
+    segmentation_results,
+    select_penalty,
+    tau_prior_bounds,
+)
+
+
+def _series() -> np.ndarray:
+    rng = np.random.default_rng(3)
+    return np.concatenate((rng.normal(0, 1, 40), rng.normal(2.5, 1, 35), rng.normal(0, 3, 45)))
+
+
+def _optimal_cost(values: np.ndarray, cost: str, penalty: float, min_size: int) -> float:
+    segment_cost = SegmentCost(values, cost)
+    n = len(values)
+    best = [-penalty] + [np.inf] * n
+    for end in range(1, n + 1):
+        starts = [s for s in range(0, end - min_size + 1) if s == 0 or s >= min_size]
+        best[end] = min([best[s] + segment_cost(s, end) + penalty for s in starts], default=np.inf)
+    return best[n]
+
+
+@pytest.mark.parametrize("cost", ["mean", "var", "meanvar"])
+def test_pelt_matches_exhaustive_optimal_partition(cost: str) -> None:
+    values = _series()
+    penalty = select_penalty(len(values), cost, "bic")
+    segment_cost = SegmentCost(values, cost)
+    breaks = pelt(segment_cost, penalty, min_size=3)
+
+    bounds = [0] + breaks + [len(values)]
+    total = sum(segment_cost(s, e) for s, e in zip(bounds[:-1], bounds[1:])) + penalty * len(breaks)
+    assert total == pytest.approx(_optimal_cost(values, cost, penalty, 3))
+
+
+@pytest.mark.parametrize("method", ["pelt", "binseg"])
+def test_detects_mean_and_variance_breaks(method: str) -> None:
+    breaks = detect_change_points(_series(), method=method, cost="meanvar")
+    assert len(breaks) == 2
+    assert abs(breaks[0] - 40) <= 3 and abs(breaks[1] - 75) <= 3
+    assert detect_change_points(_series(), method=method, max_change_points=1) in ([breaks[0]], [breaks[1]])
+
+
+def test_results_follow_change_point_report_schema() -> None:
+    values = _series()
+    dates = pd.date_range("2020-01-01", periods=len(values), freq="D")
+    results = segmentation_results(values, dates, [40, 75])
+
+    assert results["n_change_points"] == 2
+    assert results["change_points"][0] == {"name": "cp_1", "tau_index": 39, "tau_date": "2020-02-09"}
+    assert [regime["duration"] for regime in results["regimes"]] == [40, 35, 45]
+    assert results["regimes"][1]["start_date"] == "2020-02-09"
+    assert results["business_impact"][0]["transition"] == "regime_1 -> regime_2"
+    assert tau_prior_bounds([40, 75], len(values), width=5) == (34, 44)
+    assert tau_prior_bounds([], len(values)) is None
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from utils.serializers import RawJSON, columnar_json, dumps, matrix_json, records_json  # noqa: E402
+
+
+def _columns() -> dict:
+    return {
+        "Date": np.array(["2020-01-01", "NaT", "2020-01-03"], dtype="datetime64[ns]"),
+        "Price": np.array([1.5, np.nan, np.inf]),
+        "label": np.array(["a, b", None, 'q"uote'], dtype=object),
+    }
+
+
+def test_records_json_matches_row_dicts_with_nulls() -> None:
+    decoded = json.loads(records_json(_columns()))
+    assert decoded == [
+        {"Date": "2020-01-01", "Price": 1.5, "label": "a, b"},
+        {"Date": None, "Price": None, "label": None},
+        {"Date": "2020-01-03", "Price": None, "label": 'q"uote'},
+    ]
+    assert records_json({"Price": np.array([])}) == "[]"
+
+
+def test_columnar_json_and_raw_fragments() -> None:
+    decoded = json.loads(columnar_json(_columns()))
+    assert decoded["Price"] == [1.5, None, None]
+    assert decoded["Date"] == ["2020-01-01", None, "2020-01-03"]
+
+    body = dumps({"count": 2, "data": RawJSON("[1,2]"), "filters": {"start": None}})
+    assert json.loads(body) == {"count": 2, "data": [1, 2], "filters": {"start": None}}
+
+
+def test_matrix_json_nests_rows_with_nulls() -> None:
+    values = np.array([[1.0, np.nan, 2.5], [np.inf, 0.0, -1.0]])
+
+    assert json.loads(matrix_json(values)) == [[1.0, None, 2.5], [None, 0.0, -1.0]]
+    assert json.loads(matrix_json(np.empty((2, 0)))) == [[], []]
+
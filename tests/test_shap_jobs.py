@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services.shap_jobs import ShapJobQueue, artifact_key  # noqa: E402
+
+
+def _wait(queue: ShapJobQueue, job_id: str) -> None:
+    queue._jobs[job_id].exception(timeout=5)
+
+
+def test_duplicate_jobs_are_coalesced_and_stored_by_key(tmp_path) -> None:
+    queue = ShapJobQueue(InMemoryCache(), tmp_path)
+    release = threading.Event()
+    calls = []
+
+    def task(global_path: Path, local_path: Path) -> None:
+        calls.append(global_path)
+        release.wait(5)
+        global_path.write_bytes(b"global")
+        local_path.write_bytes(b"local")
+
+    key = artifact_key("prices-v1", "model-v1", "2020-01-01")
+    assert queue.lookup(key) is None
+    assert queue.submit(key, task) == queue.submit(key, task) == key
+    release.set()
+    _wait(queue, key)
+
+    assert len(calls) == 1
+    assert queue.status(key) == {"status": "done"}
+    artifacts = queue.lookup(key)
+    assert artifacts.global_png == b"global"
+    assert artifacts.local_path == tmp_path / key / "shap_local.png"
+    assert ShapJobQueue(None, tmp_path).lookup(key).local_png == b"local"
+    assert artifact_key("prices-v1", "model-v1", "2020-01-02") != key
+
+
+def test_failed_job_reports_error_and_can_be_retried(tmp_path) -> None:
+    queue = ShapJobQueue(None, tmp_path)
+
+    def broken(global_path: Path, local_path: Path) -> None:
+        raise RuntimeError("macro data unavailable")
+
+    key = artifact_key("prices-v1", "model-v1", None)
+    queue.submit(key, broken)
+    _wait(queue, key)
+    assert queue.status(key) == {"status": "failed", "error": "macro data unavailable"}
+    assert queue.status("unknown-job") == {"status": "unknown"}
+
+    def fixed(global_path: Path, local_path: Path) -> None:
+        global_path.write_bytes(b"g")
+        local_path.write_bytes(b"l")
+
+    queue.submit(key, fixed)
+    _wait(queue, key)
+    assert queue.status(key) == {"status": "done"}
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services.price_store import PriceSeries  # noqa: E402
+from services.shared_dataset import (  # noqa: E402
+    KEEP_GENERATIONS,
+    SharedPriceStore,
+    attach_dataset,
+    publish_dataset,
+    publish_source,
+    read_current,
+)
+from services.volatility import VolatilityService  # noqa: E402
+
+
+def _series(periods: int = 120) -> PriceSeries:
+    rng = np.random.default_rng(5)
+    prices = 60 * np.exp(rng.normal(0, 0.02, periods).cumsum())
+    return PriceSeries.from_frame(pd.DataFrame({"Date": pd.bdate_range("2020-01-01", periods=periods), "Price": prices}))
+
+
+def test_attach_maps_the_published_arrays(tmp_path) -> None:
+    series = _series()
+    publish_dataset(tmp_path, series, windows=(5, 30))
+    dataset = attach_dataset(tmp_path)
+
+    assert dataset.generation == 1
+    assert dataset.series.version == series.version
+    assert isinstance(dataset.series.prices, np.memmap)
+    assert not dataset.series.prices.flags.writeable
+    np.testing.assert_array_equal(dataset.series.dates, series.dates)
+    expected = VolatilityService(None, preset_windows=()).rolling(series, [5, 30])
+    for window in (5, 30):
+        np.testing.assert_allclose(dataset.volatility[window], expected[window], equal_nan=True)
+
+
+def test_generations_count_up_and_old_ones_are_pruned(tmp_path) -> None:
+    series = _series()
+    for _ in range(KEEP_GENERATIONS + 2):
+        publish_dataset(tmp_path, series, windows=())
+
+    assert read_current(tmp_path)["generation"] == KEEP_GENERATIONS + 2
+    assert len(list(tmp_path.glob("gen-*"))) == KEEP_GENERATIONS
+
+
+def test_store_reattaches_after_a_new_generation(tmp_path) -> None:
+    cache = InMemoryCache()
+    volatility = VolatilityService(cache, preset_windows=(5,))
+    store = SharedPriceStore(tmp_path, on_attach=lambda dataset: volatility.preload(dataset.series, dataset.volatility))
+    series = _series()
+    publish_dataset(tmp_path, series, windows=(5,))
+
+    assert store.get().version == series.version
+    assert isinstance(volatility.get(store.get(), 5), np.memmap)
+
+    longer = series.append(pd.DataFrame({"Date": [pd.Timestamp("2021-01-01")], "Price": [61.0]}))
+    publish_dataset(tmp_path, longer, windows=(5,))
+    assert store.get().version == series.version
+    store.clear()
+    assert store.get().version == longer.version
+    assert store.generation == 2
+
+
+def test_appends_reach_every_attached_store(tmp_path) -> None:
+    source = tmp_path / "prices.csv"
+    _series(30).to_frame().to_csv(source, index=False)
+    root = tmp_path / "shared"
+    publish_dataset(root, PriceSeries.from_csv(source), windows=(5,))
+    first = SharedPriceStore(root, source=source)
+    second = SharedPriceStore(root, source=source)
+    assert first.get().version == second.get().version
+
+    original = first.get()
+    appended = first.append(pd.DataFrame({"Date": [pd.Timestamp("2021-01-01")], "Price": [61.0]}))
+    assert len(appended) == 31 and first.generation == 2
+    # Published with its lineage, so derived arrays can be extended rather than recomputed.
+    assert appended.lineage[-1] == (original.version, 30)
+    # The file watcher clears the other workers' stores when ``CURRENT`` changes.
+    second.clear()
+    assert second.get().version == appended.version
+    np.testing.assert_array_equal(second.get().prices, appended.prices)
+    np.testing.assert_array_equal(PriceSeries.from_csv(source).prices, appended.prices)
+
+    # The watcher's publish of the same file change is skipped; a different change is not.
+    assert publish_source(root, source, windows=(5,)) == 2
+    assert read_current(root)["generation"] == 2
+    _series(32).to_frame().to_csv(source, index=False)
+    assert publish_source(root, source, windows=(5,)) == 3
+    assert publish_source(root, source, windows=(5,)) == 3
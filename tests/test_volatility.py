@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+backend_path = repo_root / "dashboard" / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from cache import InMemoryCache  # noqa: E402
+from services.price_store import PriceSeries  # noqa: E402
+from services.volatility import VolatilityService  # noqa: E402
+
+
+def _frame(periods: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    prices = 70 * np.exp(rng.normal(0, 0.02, periods).cumsum())
+    return pd.DataFrame({"Date": pd.bdate_range("2015-01-01", periods=periods), "Price": prices})
+
+
+def test_multi_window_rolling_matches_pandas() -> None:
+    series = PriceSeries.from_frame(_frame(300))
+    service = VolatilityService(InMemoryCache(), preset_windows=(5, 30))
+    result = service.rolling(series, [2, 5, 30])
+
+    returns = pd.Series(series.log_returns)
+    for window, values in result.items():
+        expected = returns.rolling(window=window).std().to_numpy()
+        assert np.allclose(values, expected, equal_nan=True)
+        assert not values.flags.writeable
+
+
+def test_appended_series_extends_cached_volatility() -> None:
+    frame = _frame(260)
+    cache = InMemoryCache()
+    service = VolatilityService(cache, preset_windows=())
+    base = PriceSeries.from_frame(frame.iloc[:200])
+    service.get(base, 20)
+
+    appended = base.append(frame.iloc[200:])
+    extended = service.get(appended, 20)
+    full = VolatilityService(InMemoryCache(), preset_windows=()).get(PriceSeries.from_frame(frame), 20)
+    assert appended.lineage == ((base.version, 200),)
+    assert np.allclose(extended, full, equal_nan=True)